@@ -0,0 +1,144 @@
+"""
+Exact survival probabilities for the Glass Bridge game.
+
+Under the engine's rules players go in queue order and everybody sees the
+revealed panes, so each row eliminates a random number of players X that does
+not depend on who reaches it: the first player to arrive picks uniformly
+among the panes not yet seen breaking, and the row is known once a safe pane
+holds or only safe panes are left. The player at queue position k (0-based)
+crosses exactly when the rows eliminate at most k players in total.
+
+Without a time limit the answer only needs the distribution of the total
+eliminations over L rows, truncated to the number of players. It is built by
+memoized halving (rows -> rows // 2 + rows - rows // 2), so L=10,000 with 456
+players takes milliseconds. With a step budget the DP also tracks the steps
+spent by eliminated players, which costs O(L * players * budget).
+
+These closed-form answers are the reference for bridge_simulation.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from bridge_engine import DEFAULT_BRIDGE_LENGTH, MOVE_DURATION
+from bridge_simulation import step_budget_for
+
+
+def row_elimination_distribution(columns=2, safe_per_row=1):
+    """
+    Probability that a row eliminates x players, for x = 0 .. columns - safe_per_row.
+    """
+    if not 1 <= safe_per_row < columns:
+        raise ValueError("Rows need at least one safe and one breaking pane")
+    broken = columns - safe_per_row
+    probabilities = []
+    all_broken_so_far = 1.0 # Probability the first x guesses all broke
+    for x in range(broken):
+        remaining = columns - x
+        probabilities.append(all_broken_so_far * safe_per_row / remaining)
+        all_broken_so_far *= (broken - x) / remaining
+    probabilities.append(all_broken_so_far) # Every breaking pane was tried; the row is now known
+    return tuple(probabilities)
+
+
+@lru_cache(maxsize=1024)
+def _eliminations_distribution(rows, columns, safe_per_row, cap):
+    """
+    Distribution of the players eliminated by `rows` rows, for 0 .. cap eliminations
+    (mass beyond cap is dropped). Memoized on (rows, players) so halving reuses results.
+    """
+    if rows == 0:
+        distribution = np.zeros(cap + 1)
+        distribution[0] = 1.0
+    elif rows == 1:
+        kernel = np.asarray(row_elimination_distribution(columns, safe_per_row))
+        distribution = np.zeros(cap + 1)
+        distribution[:min(cap + 1, kernel.size)] = kernel[:cap + 1]
+    else:
+        half = rows // 2
+        front = _eliminations_distribution(half, columns, safe_per_row, cap)
+        back = _eliminations_distribution(rows - half, columns, safe_per_row, cap)
+        distribution = np.convolve(front, back)[:cap + 1]
+    distribution.flags.writeable = False # Shared through the cache
+    return distribution
+
+
+def _survival_with_step_budget(bridge_length, num_players, kernel, step_budget):
+    """
+    Joint DP over (eliminations so far, steps spent by eliminated players), row by row.
+    A player eliminated on row r walked r + 1 steps; a player who crosses walks bridge_length.
+    """
+    dist = np.zeros((num_players, step_budget + 1))
+    dist[0, 0] = 1.0
+    for row in range(bridge_length):
+        cost = row + 1
+        updated = dist * kernel[0]
+        for x in range(1, len(kernel)):
+            shift = x * cost
+            if x >= num_players or shift > step_budget:
+                break
+            updated[x:, shift:] += dist[:num_players - x, :step_budget + 1 - shift] * kernel[x]
+        dist = updated
+
+    steps_cdf = np.cumsum(dist, axis=1)
+    survival = []
+    for position in range(num_players):
+        total = 0.0
+        for eliminated in range(position + 1):
+            # Players eliminated..position all walk the whole bridge, one after another
+            spare = step_budget - bridge_length * (position - eliminated + 1)
+            if spare >= 0:
+                total += steps_cdf[eliminated, spare]
+        survival.append(float(total))
+    return survival
+
+
+def survival_probabilities(bridge_length=DEFAULT_BRIDGE_LENGTH, num_players=7, columns=2, safe_per_row=1, step_budget=None):
+    """
+    Exact probability that the player at each queue position crosses the bridge.
+    step_budget limits the total steps all players may take (see step_budget_for); None means no limit.
+    """
+    if num_players < 1 or bridge_length < 0:
+        raise ValueError("Need at least one player and a non-negative bridge length")
+    if step_budget is None:
+        distribution = _eliminations_distribution(bridge_length, columns, safe_per_row, num_players - 1)
+        return np.cumsum(distribution).clip(0.0, 1.0).tolist()
+    kernel = row_elimination_distribution(columns, safe_per_row)
+    return _survival_with_step_budget(bridge_length, num_players, kernel, step_budget)
+
+
+def survival_probability(position, bridge_length=DEFAULT_BRIDGE_LENGTH, num_players=None, columns=2, safe_per_row=1, step_budget=None):
+    """Exact probability that the player at queue position (0-based) crosses the bridge."""
+    num_players = num_players if num_players is not None else position + 1
+    if not 0 <= position < num_players:
+        raise ValueError("position must be inside the player queue")
+    return survival_probabilities(bridge_length, num_players, columns, safe_per_row, step_budget)[position]
+
+
+def expected_survivors(bridge_length=DEFAULT_BRIDGE_LENGTH, num_players=7, columns=2, safe_per_row=1, step_budget=None):
+    """Expected number of players who cross."""
+    return sum(survival_probabilities(bridge_length, num_players, columns, safe_per_row, step_budget))
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Exact Glass Bridge survival probabilities.")
+    parser.add_argument("--bridge-length", type=int, default=DEFAULT_BRIDGE_LENGTH)
+    parser.add_argument("--players", type=int, default=7)
+    parser.add_argument("--columns", type=int, default=2)
+    parser.add_argument("--safe-per-row", type=int, default=1)
+    parser.add_argument("--time-limit", type=float, default=0, help="Seconds, converted to a step budget; 0 for no time limit")
+    args = parser.parse_args()
+
+    budget = step_budget_for(args.time_limit, MOVE_DURATION) if args.time_limit else None
+    started = time.perf_counter()
+    rates = survival_probabilities(args.bridge_length, args.players, args.columns, args.safe_per_row, budget)
+    print(json.dumps({
+        'bridge_length': args.bridge_length, 'num_players': args.players, 'columns': args.columns,
+        'safe_per_row': args.safe_per_row, 'step_budget': budget,
+        'position_survival_rate': rates, 'expected_survivors': sum(rates),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+    }, indent=2))
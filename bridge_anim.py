@@ -0,0 +1,186 @@
+"""
+Pooled animations for the Glass Bridge scene.
+
+Panda3D intervals are convenient but heavy for what the scene needs: every
+step, fall and falling tile used to build new Interval objects (plus their
+C++ counterparts, names and messenger events). The AnimationManager instead keeps a fixed pool of small animation records and
+drives them all from one task that only runs while something is animating.
+
+Animations are time-based, so the per-frame budget can spread a burst (for
+example every unrevealed tile falling at time-up) over several frames: an
+animation that is skipped for a frame simply jumps further along next time.
+When the pool is exhausted a new animation snaps to its end state at once
+and still calls its on_done callback.
+
+Every animation here ends, so the task stops once the scene is still. Looping
+effects such as the highlight pulse stay C++ intervals, which the interval
+manager steps without a Python task of their own.
+"""
+from panda3d.core import ClockObject, LPoint3
+
+DEFAULT_CAPACITY = 512 # Animation records allocated up front
+DEFAULT_FRAME_BUDGET = 256 # Animations advanced per frame at most
+
+ANIM_POS = 0   # NodePath position, start -> end
+ANIM_VALUE = 1 # setter(value[, arg]) with a float, start -> end
+
+
+class _Animation:
+    __slots__ = ("kind", "target", "start", "end", "start_time", "duration", "on_done", "arg", "key", "index")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.kind = ANIM_POS
+        self.target = None # NodePath, or the setter for ANIM_VALUE
+        self.start = None
+        self.end = None
+        self.start_time = 0.0
+        self.duration = 0.0
+        self.on_done = None
+        self.arg = None
+        self.key = None
+        self.index = -1 # Position in the active list
+
+
+class AnimationManager:
+    """
+    Runs position and value animations from one task with a bounded pool.
+    Animations started with a key replace any running animation with the same key
+    and can be stopped with cancel(key).
+    """
+    def __init__(self, task_mgr, capacity=DEFAULT_CAPACITY, frame_budget=DEFAULT_FRAME_BUDGET, clock=None):
+        self.task_mgr = task_mgr
+        self.clock = clock if clock is not None else ClockObject.getGlobalClock()
+        self.capacity = capacity
+        self.frame_budget = frame_budget
+        self._free = [_Animation() for _ in range(capacity)]
+        self._active = []
+        self._by_key = {}
+        self._cursor = 0 # Round-robin start when more animations are active than the budget allows
+        self._finished = [] # Reused between frames
+        self._task_name = f"animations_{id(self)}"
+        self._running = False # Whether the update task is scheduled
+        self.snapped = 0 # Animations finished at once because the pool was empty
+
+    def __len__(self):
+        return len(self._active)
+
+    def __contains__(self, key):
+        return key in self._by_key
+
+    # --- Starting animations ---
+    def move(self, node_path, end, duration, on_done=None, key=None):
+        """Moves node_path from where it is to end (a point) over duration seconds."""
+        return self._start(ANIM_POS, node_path, node_path.getPos(), LPoint3(end), duration, on_done, None, key)
+
+    def lerp(self, setter, start, end, duration, on_done=None, key=None, arg=None):
+        """Calls setter(value) (or setter(value, arg)) with value going from start to end, like LerpFunc."""
+        return self._start(ANIM_VALUE, setter, start, end, duration, on_done, arg, key)
+
+    def _start(self, kind, target, start, end, duration, on_done, arg, key):
+        if key is not None:
+            self.cancel(key)
+        if not self._free:
+            self.snapped += 1
+            self._apply(kind, target, start, end, 1.0, arg)
+            if on_done is not None:
+                on_done()
+            return False
+        anim = self._free.pop()
+        anim.kind, anim.target, anim.start, anim.end = kind, target, start, end
+        anim.start_time = self.clock.getFrameTime()
+        anim.duration = duration
+        anim.on_done, anim.arg, anim.key = on_done, arg, key
+        anim.index = len(self._active)
+        self._active.append(anim)
+        if key is not None:
+            self._by_key[key] = anim
+        if not self._running:
+            self._running = True
+            self.task_mgr.add(self._step, self._task_name)
+        return True
+
+    # --- Stopping animations ---
+    def cancel(self, key, finish=False):
+        """
+        Stops the animation started with key. finish=True applies its end state
+        and calls on_done first.
+        """
+        anim = self._by_key.get(key)
+        if anim is None:
+            return False
+        on_done = anim.on_done
+        if finish:
+            self._apply(anim.kind, anim.target, anim.start, anim.end, 1.0, anim.arg)
+        self._release(anim)
+        if finish and on_done is not None:
+            on_done()
+        return True
+
+    def clear(self):
+        """Stops every animation where it is, without callbacks."""
+        while self._active:
+            self._release(self._active[-1])
+
+    def _release(self, anim):
+        last = self._active.pop()
+        if last is not anim: # Swap the last animation into the freed place
+            self._active[anim.index] = last
+            last.index = anim.index
+        if anim.key is not None:
+            del self._by_key[anim.key]
+        anim.reset()
+        self._free.append(anim)
+
+    # --- Per-frame update ---
+    @staticmethod
+    def _apply(kind, target, start, end, t, arg):
+        if kind == ANIM_POS:
+            target.setPos(start + (end - start) * t)
+        elif kind == ANIM_VALUE:
+            value = start + (end - start) * t
+            if arg is None:
+                target(value)
+            else:
+                target(value, arg)
+
+    def _step(self, task):
+        active = self._active
+        count = len(active)
+        if not count:
+            self._running = False
+            return task.done
+        now = self.clock.getFrameTime()
+        budget = min(count, self.frame_budget)
+        start = self._cursor % count if count > budget else 0
+        finished = self._finished
+        for offset in range(budget):
+            anim = active[(start + offset) % count]
+            elapsed = now - anim.start_time
+            if anim.duration <= 0.0 or elapsed >= anim.duration:
+                self._apply(anim.kind, anim.target, anim.start, anim.end, 1.0, anim.arg)
+                finished.append(anim)
+            else:
+                self._apply(anim.kind, anim.target, anim.start, anim.end, elapsed / anim.duration, anim.arg)
+        self._cursor = start + budget
+
+        # Release before calling back, so callbacks may start new animations
+        callbacks = []
+        for anim in finished:
+            if anim.on_done is not None:
+                callbacks.append(anim.on_done)
+            self._release(anim)
+        finished.clear()
+        for on_done in callbacks:
+            on_done()
+        if self._active:
+            return task.cont
+        self._running = False
+        return task.done
+
+    def destroy(self):
+        self.clear()
+        self.task_mgr.remove(self._task_name)
+        self._running = False
@@ -0,0 +1,219 @@
+"""
+Headless rendering benchmark for the Glass Bridge scene.
+
+Runs GlassBridgeScene in an offscreen buffer (or with no graphics output at
+all) for a fixed number of frames, driven by a bot policy or by a script of
+key presses sent through the same messenger events the keyboard would send.
+The game clock is forced to a fixed frame rate, so a given seed replays the
+same game however fast the machine renders it.
+
+Reports frame-time percentiles, draw calls per display region (sampled from
+the cull results), scene-graph node counts, geometry memory and how often
+HUD text was regenerated and how many glass shards were spawned as JSON:
+
+    python bridge_benchmark.py --display offscreen --bridge-length 1000 --players 200 --staff 4
+
+Display modes:
+    offscreen  OpenGL through EGL (p3headlessgl); Mesa's llvmpipe is enough, no GPU or X server needed
+    software   Panda3D's CPU rasterizer (p3tinydisplay); no shaders, so the non-instanced fallbacks run
+    none       No graphics output; measures the per-frame Python and scene-graph work only
+"""
+import os
+import random
+import sys
+import time
+from array import array
+from contextlib import redirect_stdout
+
+from panda3d.core import ClockObject, NodePath, SceneGraphAnalyzer, ShaderAttrib, loadPrcFileData
+
+from bridge_bots import make_policy
+from bridge_game import COLUMN_KEYS, GlassBridgeScene
+
+DISPLAY_MODES = {
+    'offscreen': "load-display p3headlessgl\nwindow-type offscreen",
+    'software': "load-display p3tinydisplay\nwindow-type offscreen",
+    'none': "window-type none",
+}
+STAFF_NAMES = ("Front Man", "Square Guard", "Triangle Guard", "Circle Guard") # Repeated for larger staff counts
+DEFAULT_FRAMES = 1200
+DEFAULT_WARMUP_FRAMES = 60
+DEFAULT_FRAME_RATE = 60 # Game seconds advance 1/frame_rate per frame, whatever the wall time
+DEFAULT_SAMPLE_EVERY = 30 # Frames between draw-call samples (building the cull graph is not free)
+
+
+def configure_display(mode, width=800, height=600):
+    """Loads the Panda3D config for a display mode. Must run before the scene (ShowBase) is created."""
+    try:
+        display = DISPLAY_MODES[mode]
+    except KeyError:
+        raise ValueError(f"Unknown display mode '{mode}'. Choose from: {', '.join(sorted(DISPLAY_MODES))}") from None
+    loadPrcFileData('bridge_benchmark', f"{display}\nwin-size {width} {height}\nsync-video false\n"
+                                        "audio-library-name null\nnotify-level-device fatal")
+
+
+def scripted_input(scene, keys):
+    """
+    Task function that presses the next key of keys (cycled) whenever the
+    current player is waiting for a choice, as a person at the keyboard would.
+    """
+    position = 0
+
+    def press_next_key(task):
+        nonlocal position
+        engine = scene.engine
+        if engine.game_over_flag:
+            return task.done
+        if engine.current_player is not None and engine.pending_move is None:
+            scene.messenger.send(keys[position % len(keys)])
+            position += 1
+        return task.cont
+
+    return press_next_key
+
+
+def draw_calls(window):
+    """Geoms drawn last frame per display region, keyed by camera name; None without a window."""
+    if window is None:
+        return None
+    counts = {}
+    for region in window.getActiveDisplayRegions():
+        camera = region.getCamera()
+        if camera.isEmpty():
+            continue
+        cull_result = NodePath(region.makeCullResultGraph())
+        counts[camera.getName()] = sum(geom_np.node().getNumGeoms() for geom_np in cull_result.findAllMatches('**/+GeomNode'))
+    return counts
+
+
+def scene_graph_stats(root):
+    """Node counts and geometry memory under root, with shared vertex data counted once."""
+    analyzer = SceneGraphAnalyzer()
+    analyzer.addNode(root.node())
+    # Instance buffers are bound as shader inputs, which the analyzer does not see
+    instance_buffers = {}
+    for node_np in [root] + list(root.findAllMatches('**')):
+        shader_attrib = node_np.node().getAttrib(ShaderAttrib)
+        if shader_attrib is not None and shader_attrib.getShaderInput('instances').getValueType():
+            texture = shader_attrib.getShaderInputTexture('instances')
+            instance_buffers[texture.getName()] = texture.getRamImageSize()
+    return {
+        'nodes': analyzer.getNumNodes(),
+        'geom_nodes': analyzer.getNumGeomNodes(),
+        'geoms': analyzer.getNumGeoms(),
+        'lod_nodes': analyzer.getNumLodNodes(),
+        'vertices': analyzer.getNumVertices(),
+        'vertex_data_bytes': analyzer.getVertexDataSize(),
+        'texture_bytes': analyzer.getTextureBytes(),
+        'instance_buffer_bytes': sum(instance_buffers.values()),
+    }
+
+
+def percentiles_ms(samples, fractions=(0.5, 0.9, 0.99)):
+    """Nearest-rank percentiles of samples (seconds), in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    report = {f"p{round(fraction * 100)}_ms": round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+              for fraction in fractions}
+    report['mean_ms'] = round(sum(ordered) / len(ordered) * 1000, 3)
+    report['max_ms'] = round(ordered[-1] * 1000, 3)
+    return report
+
+
+def run_benchmark(display='offscreen', bridge_length=10, num_players=7, num_staff=2, frames=DEFAULT_FRAMES,
+                  warmup_frames=DEFAULT_WARMUP_FRAMES, frame_rate=DEFAULT_FRAME_RATE, policy='memory', script=None,
+                  seed=0, columns=2, safe_per_row=1, sample_every=DEFAULT_SAMPLE_EVERY, verbose=False):
+    """
+    Plays one scripted game for warmup_frames + frames frames and returns the report dict.
+    script is a string of column keys ("1212...") pressed in turn; otherwise policy plays.
+    The scene's DEBUG output is discarded unless verbose.
+    """
+    configure_display(display)
+    clock = ClockObject.getGlobalClock()
+    clock.setMode(ClockObject.MNonRealTime) # Exactly 1/frame_rate game seconds per frame, and no sleeping
+    clock.setFrameRate(frame_rate)
+    random.seed(seed) # The engine and bots draw from the module-level generator
+
+    player_names = [f"Player {i+1}" for i in range(num_players)]
+    staff_names = [STAFF_NAMES[i % len(STAFF_NAMES)] for i in range(num_staff)]
+    sink = sys.stdout if verbose else open(os.devnull, "w")
+    try:
+        with redirect_stdout(sink):
+            started = time.perf_counter()
+            scene = GlassBridgeScene(player_names, staff_names, None,
+                                     bot_policy=None if script else make_policy(policy),
+                                     columns=columns, safe_per_row=safe_per_row, bridge_length=bridge_length)
+            startup_seconds = time.perf_counter() - started
+            if script:
+                keys = [key for key in script if key in COLUMN_KEYS[:columns]]
+                if not keys:
+                    raise ValueError(f"script has no keys for {columns} columns (use {COLUMN_KEYS[:columns]})")
+                scene.taskMgr.add(scripted_input(scene, keys), "benchmark_scripted_input")
+
+            frame_times = array('d')
+            draw_call_samples = []
+            game_over_frame = None
+            for frame in range(warmup_frames + frames):
+                frame_started = time.perf_counter()
+                scene.taskMgr.step()
+                elapsed = time.perf_counter() - frame_started
+                if frame >= warmup_frames:
+                    frame_times.append(elapsed)
+                    if (frame - warmup_frames) % sample_every == 0:
+                        draw_call_samples.append(draw_calls(scene.win))
+                if game_over_frame is None and scene.engine.game_over_flag:
+                    game_over_frame = frame
+
+            report = {
+                'display': display, 'bridge_length': bridge_length, 'num_players': num_players, 'num_staff': num_staff,
+                'columns': columns, 'safe_per_row': safe_per_row, 'driver': 'script' if script else policy, 'seed': seed,
+                'frames': frames, 'warmup_frames': warmup_frames,
+                'startup_ms': round(startup_seconds * 1000, 3),
+                'frame_time': percentiles_ms(frame_times),
+                'game_over_frame': game_over_frame,
+                'scene': scene_graph_stats(scene.render),
+                'hud': scene_graph_stats(scene.render2d),
+                'hud_text_updates': scene.hud.text_updates,
+                'shards': {'spawned': scene.shards.spawned, 'peak': scene.shards.peak, 'dropped_bursts': scene.shards.dropped},
+            }
+            if draw_call_samples and draw_call_samples[0] is not None:
+                regions = draw_call_samples[0].keys()
+                report['draw_calls'] = {
+                    region: {'mean': round(sum(sample.get(region, 0) for sample in draw_call_samples) / len(draw_call_samples), 1),
+                             'max': max(sample.get(region, 0) for sample in draw_call_samples)}
+                    for region in regions}
+            else:
+                report['draw_calls'] = None
+            scene.destroy()
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark the Glass Bridge scene without a display.")
+    parser.add_argument("--display", choices=sorted(DISPLAY_MODES), default='offscreen')
+    parser.add_argument("--bridge-length", type=int, default=10)
+    parser.add_argument("--players", type=int, default=7)
+    parser.add_argument("--staff", type=int, default=2)
+    parser.add_argument("--columns", type=int, default=2, help="Panes per bridge row")
+    parser.add_argument("--safe-per-row", type=int, default=1, help="Safe panes per bridge row")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="Measured frames")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP_FRAMES, help="Frames run before measuring")
+    parser.add_argument("--frame-rate", type=float, default=DEFAULT_FRAME_RATE, help="Game-clock frames per second")
+    parser.add_argument("--bot", default='memory', help="Bot policy that plays when no --script is given")
+    parser.add_argument("--script", default=None, help="Column keys pressed in turn, e.g. 1221 (cycled)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample-every", type=int, default=DEFAULT_SAMPLE_EVERY, help="Frames between draw-call samples")
+    parser.add_argument("--verbose", action="store_true", help="Keep the scene's DEBUG output")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.display, args.bridge_length, args.players, args.staff, args.frames, args.warmup,
+                           args.frame_rate, args.bot, args.script, args.seed, args.columns, args.safe_per_row,
+                           args.sample_every, args.verbose)
+    print(json.dumps(report, indent=2))
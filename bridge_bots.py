@@ -0,0 +1,101 @@
+"""
+Bot players for the Glass Bridge game.
+
+A policy looks at a GameSnapshot (see BridgeEngine.fill_snapshot) and returns
+the column to step on next, the same choice a human makes with the number
+keys. Policies keep no per-game state and allocate nothing per decision, so
+one instance can drive the 3D scene at frame rate or thousands of headless games.
+
+    engine.autoplay(bot_chooser(make_policy("memory")))
+    GlassBridgeScene(players, staff, storage, bot_policy=make_policy("random"))
+"""
+from bridge_engine import GameSnapshot
+
+
+class BotPolicy:
+    """
+    Base class for bot policies. Subclasses implement choose(snapshot).
+    """
+    name = "base"
+
+    def choose(self, snapshot):
+        """Returns the column (0 .. snapshot.columns - 1) for snapshot.next_row."""
+        raise NotImplementedError
+
+
+class RandomPolicy(BotPolicy):
+    """Ignores everything that has been revealed and picks any pane."""
+    name = "random"
+
+    def choose(self, snapshot):
+        return snapshot.rng.randrange(snapshot.columns)
+
+
+class MemoryPolicy(BotPolicy):
+    """
+    Plays like an attentive human: walks the revealed safe path,
+    never steps on a pane already seen breaking, and guesses among the rest.
+    """
+    name = "memory"
+
+    def choose(self, snapshot):
+        if snapshot.known_safe_column is not None:
+            return snapshot.known_safe_column
+        columns = snapshot.columns
+        revealed_bits = snapshot.revealed_tiles.bits
+        first_tile = snapshot.next_row * columns
+        # In a row that is still unknown every revealed pane is a broken one
+        untried = 0
+        for tile in range(first_tile, first_tile + columns):
+            if not (revealed_bits[tile >> 3] >> (tile & 7)) & 1:
+                untried += 1
+        pick = snapshot.rng.randrange(untried)
+        for tile in range(first_tile, first_tile + columns):
+            if not (revealed_bits[tile >> 3] >> (tile & 7)) & 1:
+                if pick == 0:
+                    return tile - first_tile
+                pick -= 1
+        return 0 # Unreachable: an unknown row always has an untried pane
+
+
+class AdversarialPolicy(BotPolicy):
+    """
+    Tries to lose: steps off the known safe path whenever it can.
+    Useful for soak tests that should churn through players quickly.
+    """
+    name = "adversarial"
+
+    def choose(self, snapshot):
+        known = snapshot.known_safe_column
+        if known is None:
+            return snapshot.rng.randrange(snapshot.columns)
+        # Step anywhere but the pane everyone knows is safe
+        return (known + 1 + snapshot.rng.randrange(snapshot.columns - 1)) % snapshot.columns
+
+
+POLICIES = {
+    RandomPolicy.name: RandomPolicy,
+    MemoryPolicy.name: MemoryPolicy,
+    AdversarialPolicy.name: AdversarialPolicy,
+}
+
+
+def make_policy(name):
+    """Creates the policy registered under name ('random', 'memory' or 'adversarial')."""
+    try:
+        return POLICIES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown bot policy '{name}'. Choose from: {', '.join(sorted(POLICIES))}") from None
+
+
+def bot_chooser(policy):
+    """
+    Adapts a policy to BridgeEngine.autoplay's choose_column(engine) callback.
+    The snapshot is allocated once and refilled for every decision.
+    """
+    snapshot = GameSnapshot()
+
+    def choose_column(engine):
+        return policy.choose(engine.fill_snapshot(snapshot))
+
+    return choose_column
@@ -0,0 +1,163 @@
+"""
+Pooled MySQL access for the Glass Bridge game.
+
+Database keeps a mysql.connector connection pool instead of one global
+connection and cursor. Every operation checks a connection out, gets its
+own cursor, runs in its own transaction and hands the connection back, so
+login, the session writer thread and analytics queries can run at the same
+time without sharing a cursor.
+
+- Health checks: the pool pings a connection when it is checked out and
+  reconnects it if the server dropped it.
+- Retries: an operation that fails because the connection was lost is
+  rolled back and retried up to retries times, with exponential backoff.
+  Other errors (bad SQL, constraint violations) are raised at once.
+- More callers than connections wait (up to checkout_timeout) for one to
+  come back instead of failing with "pool exhausted".
+
+A retried operation starts again from the top, so it must not have side
+effects outside the transaction. If the connection drops in the middle of
+COMMIT the outcome is unknown and the write may be applied twice.
+"""
+import threading
+import time
+
+from mysql.connector import errors, pooling
+
+DEFAULT_POOL_SIZE = 5 # Connections kept open
+DEFAULT_RETRIES = 3 # Retries after the first attempt
+DEFAULT_BACKOFF = 0.05 # Seconds before the first retry; doubled for every retry after
+MAX_BACKOFF = 2.0
+DEFAULT_CHECKOUT_TIMEOUT = 10.0 # Seconds to wait for a free pooled connection
+
+# Errors that mean "try again on a fresh connection" rather than "this operation is wrong"
+TRANSIENT_ERRORS = (errors.OperationalError, errors.InterfaceError)
+
+
+class Database:
+    """
+    A connection pool plus retrying helpers. config is the keyword arguments
+    for mysql.connector.connect (host, user, password, database, ...).
+    """
+    def __init__(self, config, pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                 checkout_timeout=DEFAULT_CHECKOUT_TIMEOUT, pool_name="glass_bridge"):
+        self.retries = retries
+        self.backoff = backoff
+        self.checkout_timeout = checkout_timeout
+        self.pool = pooling.MySQLConnectionPool(pool_name=pool_name, pool_size=pool_size, pool_reset_session=True, **config)
+        self._free = threading.BoundedSemaphore(pool_size) # mysql.connector's pool fails at once when empty
+        self._closed = False
+        self._counter_lock = threading.Lock() # Login, the session writer and analytics all count at once
+        self.operations = 0
+        self.retried = 0 # Attempts that failed with a transient error and were tried again
+        self.failed = 0 # Operations that gave up
+
+    def run(self, operation):
+        """
+        Calls operation(cursor) in a transaction on a pooled connection, commits and
+        returns its result. Rolls back and retries on a lost connection; raises once
+        the retries are used up, or at once for any other error.
+        """
+        self._count('operations')
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                return self._run_once(operation)
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.retries:
+                    self._count('failed')
+                    raise
+                self._count('retried')
+                print(f"WARNING: Database operation failed ({e}); retrying in {delay:.2f}s.")
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_BACKOFF)
+            except Exception:
+                self._count('failed')
+                raise
+
+    def _count(self, counter):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _run_once(self, operation):
+        if self._closed:
+            raise errors.PoolError("Database is closed")
+        if not self._free.acquire(timeout=self.checkout_timeout):
+            raise errors.PoolError(f"No pooled connection free after {self.checkout_timeout}s")
+        try:
+            connection = self.pool.get_connection() # Pings, and reconnects a dropped connection
+        except Exception:
+            self._free.release()
+            raise
+        try:
+            cursor = connection.cursor()
+            try:
+                result = operation(cursor)
+                connection.commit()
+                return result
+            except Exception:
+                try:
+                    connection.rollback()
+                except errors.Error:
+                    pass # The connection is gone; the server discards the transaction
+                raise
+            finally:
+                try:
+                    cursor.close()
+                except errors.Error:
+                    pass
+        finally:
+            connection.close() # Back to the pool
+            self._free.release()
+
+    def execute(self, sql, params=()):
+        """Runs one statement and returns (rowcount, lastrowid)."""
+        def operation(cursor):
+            cursor.execute(sql, params)
+            return cursor.rowcount, cursor.lastrowid
+        return self.run(operation)
+
+    def fetchone(self, sql, params=()):
+        def operation(cursor):
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+        return self.run(operation)
+
+    def fetchall(self, sql, params=()):
+        def operation(cursor):
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+        return self.run(operation)
+
+    def ping(self):
+        """True if a pooled connection can reach the server."""
+        try:
+            return self.fetchone("SELECT 1") is not None
+        except errors.Error:
+            return False
+
+    def stats(self):
+        with self._counter_lock:
+            return {'operations': self.operations, 'retried': self.retried, 'failed': self.failed,
+                    'pool_size': self.pool.pool_size}
+
+    def close(self, timeout=DEFAULT_CHECKOUT_TIMEOUT):
+        """
+        Disconnects every pooled connection, waiting up to timeout for ones in use
+        to come back. Operations started after close() fail with PoolError.
+        """
+        self._closed = True
+        # mysql.connector has no public way to drain a pool, so check every connection
+        # out and disconnect it; they are never handed back
+        closed = 0
+        deadline = time.monotonic() + timeout
+        for _ in range(self.pool.pool_size):
+            if not self._free.acquire(timeout=max(deadline - time.monotonic(), 0.0)):
+                print(f"WARNING: Closed the database with {self.pool.pool_size - closed} connections still in use.")
+                break
+            try:
+                self.pool.get_connection().disconnect()
+            except errors.Error:
+                pass # Already gone (or could not reconnect); nothing left to close
+            closed += 1
+        return closed
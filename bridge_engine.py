@@ -0,0 +1,539 @@
+"""
+Headless rules engine for the Glass Bridge game.
+
+BridgeEngine owns everything that decides the outcome of a game: the bridge
+layout, the turn order (active_players_queue), the revealed tiles and rows
+and the countdown timer. It has no Panda3D or Tk
+imports, so thousands of games can be played per second for balancing and QA.
+
+GlassBridgeScene drives the same engine and only renders what it is told
+through the events below.
+"""
+import random
+from array import array
+from collections import deque
+
+from bridge_layout import (BridgeLayout, TileBitset, LAYOUT_COLUMNS, LAYOUT_SAFE_PER_ROW, generate_layout,
+                           generator_version_for, layout_key, new_layout_seed)
+
+# --- Engine events (subscribe with BridgeEngine.subscribe) ---
+# Every handler receives the positional arguments listed next to the event.
+EVENT_TIMER_STARTED = "timer_started"       # ()
+EVENT_TURN_STARTED = "turn_started"         # (player)
+EVENT_MOVE_STARTED = "move_started"         # (player, row, col)
+EVENT_INVALID_MOVE = "invalid_move"         # (player, reason)
+EVENT_TILE_SAFE = "tile_safe"               # (player, row, col)
+EVENT_TILE_BROKEN = "tile_broken"           # (player, row, col)
+EVENT_PLAYER_CROSSED = "player_crossed"     # (player)
+EVENT_PLAYER_FELL = "player_fell"           # (player, row, col)
+EVENT_PLAYER_TIMED_OUT = "player_timed_out" # (player)
+EVENT_TIME_UP = "time_up"                   # (falling_tiles) list of (row, col) that drop
+EVENT_GAME_OVER = "game_over"               # (winners, time_limit_reached)
+
+# Default game parameters (match the original GlassBridgeScene values)
+DEFAULT_BRIDGE_LENGTH = 10
+DEFAULT_TIME_LIMIT = 40.0
+MOVE_DURATION = 0.5 # Seconds a single step takes (the posInterval length in the scene)
+
+# Set bit positions of every byte value, for walking sparse bitsets a byte at a time
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+
+
+class EnginePlayer:
+    """
+    Rules-side state of a single player. Carries no rendering data.
+    """
+    __slots__ = ("name", "index", "current_tile_row", "current_tile_col",
+                 "fallen", "crossed", "turn_active", "is_on_bridge")
+
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index # Position in the original turn order
+        self.current_tile_row = -1 # Starts before the first bridge tile (on the starting platform)
+        self.current_tile_col = -1
+        self.fallen = False
+        self.crossed = False
+        self.turn_active = False # True only when it's this player's turn to make a choice
+        self.is_on_bridge = False
+
+    def __repr__(self):
+        return f"EnginePlayer({self.name!r}, row={self.current_tile_row}, fallen={self.fallen}, crossed={self.crossed})"
+
+
+class GameSnapshot:
+    """
+    Compact, reusable view of the state a player sees before choosing a pane.
+    BridgeEngine.fill_snapshot() overwrites the fields in place, so deciding a
+    move allocates nothing. The bitsets are the engine's own (read-only).
+    """
+    __slots__ = ("current_row", "next_row", "bridge_length", "columns", "known_safe_column",
+                 "revealed_tiles", "revealed_rows", "time_left", "players_left", "rng")
+
+    def __init__(self):
+        self.current_row = -1 # Row the current player stands on (-1 = starting platform)
+        self.next_row = 0
+        self.bridge_length = 0
+        self.columns = 0
+        self.known_safe_column = None # Safe column of next_row if it is revealed
+        self.revealed_tiles = None # TileBitset: a revealed tile in an unknown row is a broken one
+        self.revealed_rows = None # TileBitset of rows whose safe pane is known
+        self.time_left = 0.0
+        self.players_left = 0
+        self.rng = None # The game's random stream, for reproducible decisions
+
+
+class BridgeEngine:
+    """
+    Pure-Python Glass Bridge rules.
+
+    A move is split in two so a renderer can animate between the halves:
+    attempt_move() validates the choice and emits EVENT_MOVE_STARTED, and
+    resolve_move() decides whether the tile holds (the scene calls it when the
+    step animation completes). Headless callers use play_move() or autoplay().
+
+    Rows have `columns` panes with `safe_per_row` of them safe (two and one by
+    default). A row becomes known to everyone once a safe pane holds or every
+    breaking pane has been seen breaking; both are tracked with O(1) work per step.
+    """
+    def __init__(self, player_names, bridge_length=None, time_limit=DEFAULT_TIME_LIMIT,
+                 layout=None, rng=None, layout_seed=None, columns=LAYOUT_COLUMNS, safe_per_row=LAYOUT_SAFE_PER_ROW):
+        # An explicit layout decides the length; bridge_length may only repeat it
+        if layout is not None and not isinstance(layout, BridgeLayout):
+            layout = BridgeLayout.from_rows(layout) # Legacy list of [left, right] rows
+        if layout is None:
+            bridge_length = bridge_length if bridge_length is not None else DEFAULT_BRIDGE_LENGTH
+        elif bridge_length is None:
+            bridge_length = layout.bridge_length
+        elif bridge_length != layout.bridge_length:
+            raise ValueError(f"bridge_length {bridge_length} does not match the layout's {layout.bridge_length} rows")
+        self.bridge_length = bridge_length
+        self.time_limit = time_limit
+        self.rng = rng if rng is not None else random
+
+        # The true safe/broken configuration, packed one bit per tile.
+        # Generated layouts are reproducible from layout_seed + layout_version alone.
+        self.layout_seed = None
+        self.layout_version = None
+        if layout is None:
+            self.layout_seed = layout_seed if layout_seed is not None else new_layout_seed(self.rng)
+            self.layout_version = generator_version_for(columns, safe_per_row)
+            layout = generate_layout(self.layout_seed, bridge_length, self.layout_version, columns, safe_per_row)
+            # Every row has the same number of breaking panes
+            breaking_left = array('H', [columns - safe_per_row]) * bridge_length
+        else:
+            breaking_left = array('H', (layout.columns - layout.safe_count(row) for row in range(bridge_length)))
+        self.actual_bridge_layout = layout
+        self.columns = layout.columns
+        self.safe_per_row = safe_per_row if self.layout_seed is not None else None # None: may vary per row
+        self.revealed_tiles = TileBitset(bridge_length * self.columns) # Tiles someone has stepped on
+        self.revealed_rows = TileBitset(bridge_length) # Rows whose safe pane is known to everyone
+        self.breaking_left = breaking_left # Per row: breaking panes nobody has stepped on yet
+        self.kept_tiles = TileBitset(bridge_length * self.columns) # Safe panes of known rows (they survive time-up)
+
+        self.time_left = time_limit
+        self.timer_active = False # Becomes True when the first player steps on the bridge
+        self.game_over_flag = False
+        self.time_limit_reached = False
+
+        self.players = [EnginePlayer(name, i) for i, name in enumerate(player_names)]
+        # DSA Concept: deque gives O(1) removal of the finished player at the front
+        self.active_players_queue = deque(self.players)
+        self.current_player = None
+        self.pending_move = None # (row, col) while a step is in progress
+
+        self._listeners = {} # event name -> list of handlers
+
+    # --- Event subscription ---
+    def subscribe(self, event, handler):
+        """Registers handler to be called with the event's arguments."""
+        self._listeners.setdefault(event, []).append(handler)
+
+    def unsubscribe(self, event, handler):
+        """Removes a handler previously passed to subscribe()."""
+        handlers = self._listeners.get(event)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+
+    def _emit(self, event, *args):
+        if not self._listeners: # Headless runs usually have no subscribers at all
+            return
+        handlers = self._listeners.get(event)
+        if handlers:
+            for handler in tuple(handlers):
+                handler(*args)
+
+    # --- Game flow ---
+    def start(self):
+        """Activates the first player's turn. Returns False if there are no players."""
+        if not self.active_players_queue:
+            self.game_over()
+            return False
+        self.current_player = self.active_players_queue[0]
+        self.current_player.turn_active = True
+        self._emit(EVENT_TURN_STARTED, self.current_player)
+        return True
+
+    def layout_key(self):
+        """The "version:rows:seed" key that rebuilds this layout, or None for an explicit layout."""
+        if self.layout_seed is None:
+            return None
+        return layout_key(self.layout_seed, self.bridge_length, self.layout_version, self.columns, self.safe_per_row)
+
+    def is_safe(self, row, col):
+        """Returns True if the tile at (row, col) holds a player's weight."""
+        return self.actual_bridge_layout.safe.get(row * self.columns + col)
+
+    def is_revealed(self, row, col):
+        """Returns True if someone has stepped on the tile at (row, col)."""
+        return self.revealed_tiles.get(row * self.columns + col)
+
+    def known_safe_column(self, row):
+        """The safe column of row if it has been revealed, otherwise None."""
+        if not (self.revealed_rows.bits[row >> 3] >> (row & 7)) & 1:
+            return None
+        return self.actual_bridge_layout.safe_column(row)
+
+    def _mark_row_known(self, row):
+        """Records that everyone now knows a safe pane of row. Runs once per row."""
+        self.revealed_rows.bits[row >> 3] |= 1 << (row & 7)
+        safe_bits = self.actual_bridge_layout.safe.bits
+        kept_bits = self.kept_tiles.bits
+        tile = row * self.columns
+        for _ in range(self.columns):
+            if (safe_bits[tile >> 3] >> (tile & 7)) & 1:
+                kept_bits[tile >> 3] |= 1 << (tile & 7)
+            tile += 1
+
+    def fill_snapshot(self, snapshot):
+        """
+        Writes the current player's view of the game into snapshot and returns it.
+        """
+        player = self.current_player
+        row = player.current_tile_row if player is not None else -1
+        snapshot.current_row = row
+        snapshot.next_row = row + 1
+        snapshot.bridge_length = self.bridge_length
+        snapshot.columns = self.columns
+        snapshot.known_safe_column = self.known_safe_column(row + 1) if row + 1 < self.bridge_length else None
+        snapshot.revealed_tiles = self.revealed_tiles
+        snapshot.revealed_rows = self.revealed_rows
+        snapshot.time_left = self.time_left
+        snapshot.players_left = len(self.active_players_queue)
+        snapshot.rng = self.rng
+        return snapshot
+
+    def attempt_move(self, chosen_col):
+        """
+        Starts the current player's step onto the next row.
+        Returns True if the move was accepted, False if it was ignored.
+        """
+        player = self.current_player
+        if self.game_over_flag:
+            return False
+        if player is None or not player.turn_active:
+            self._emit(EVENT_INVALID_MOVE, player, "not_your_turn")
+            return False
+        if player.fallen or player.crossed:
+            self._emit(EVENT_INVALID_MOVE, player, "already_finished")
+            return False
+
+        next_row = player.current_tile_row + 1
+        if next_row >= self.bridge_length:
+            self._emit(EVENT_INVALID_MOVE, player, "at_end")
+            return False
+        if not 0 <= chosen_col < self.columns:
+            self._emit(EVENT_INVALID_MOVE, player, "invalid_column")
+            return False
+
+        # Start the global timer on the very first step onto the bridge
+        if not self.timer_active:
+            self.timer_active = True
+            self._emit(EVENT_TIMER_STARTED)
+
+        player.turn_active = False # Deactivate turn while move is in progress
+        player.current_tile_row = next_row
+        player.current_tile_col = chosen_col
+        player.is_on_bridge = True
+        self.pending_move = (next_row, chosen_col)
+        self._emit(EVENT_MOVE_STARTED, player, next_row, chosen_col)
+        return True
+
+    def resolve_move(self):
+        """
+        Checks the tile the current player just stepped on (the old check_tile).
+        Returns True if the tile held, False if it broke, None if there was no pending move.
+        """
+        if self.pending_move is None:
+            return None
+        row, col = self.pending_move
+        self.pending_move = None
+        player = self.current_player
+        if self.game_over_flag or player is None or player.fallen or player.crossed:
+            return None
+
+        # Bit operations are inlined here: this runs once per step in every simulated game
+        tile = row * self.columns + col
+        revealed_bits = self.revealed_tiles.bits
+        newly_revealed = not (revealed_bits[tile >> 3] >> (tile & 7)) & 1
+        revealed_bits[tile >> 3] |= 1 << (tile & 7)
+        if (self.actual_bridge_layout.safe.bits[tile >> 3] >> (tile & 7)) & 1:
+            if not (self.revealed_rows.bits[row >> 3] >> (row & 7)) & 1:
+                self._mark_row_known(row)
+            self._emit(EVENT_TILE_SAFE, player, row, col)
+            if row == self.bridge_length - 1:
+                player.crossed = True
+                player.is_on_bridge = False
+                self._emit(EVENT_PLAYER_CROSSED, player)
+                self.next_player_turn()
+            else:
+                player.turn_active = True # Landed safely, turn continues
+            return True
+
+        if newly_revealed: # Stepping on a pane already seen breaking proves nothing new
+            breaking_left = self.breaking_left[row] - 1
+            self.breaking_left[row] = breaking_left
+            if breaking_left == 0 and not (self.revealed_rows.bits[row >> 3] >> (row & 7)) & 1:
+                self._mark_row_known(row) # Only safe panes are left in this row
+        player.fallen = True
+        player.is_on_bridge = False
+        self._emit(EVENT_TILE_BROKEN, player, row, col)
+        self._emit(EVENT_PLAYER_FELL, player, row, col)
+        self.next_player_turn()
+        return False
+
+    def play_move(self, chosen_col):
+        """Attempts and immediately resolves a move. Used by headless callers."""
+        if not self.attempt_move(chosen_col):
+            return None
+        return self.resolve_move()
+
+    def next_player_turn(self):
+        """
+        Removes the finished player from the front of the queue and starts the next turn.
+        Ends the game if nobody is left.
+        """
+        if self.game_over_flag:
+            return
+
+        if self.current_player:
+            self.current_player.turn_active = False
+            if self.active_players_queue and self.active_players_queue[0] is self.current_player:
+                self.active_players_queue.popleft()
+
+        if not self.active_players_queue:
+            self.game_over()
+            return
+
+        self.current_player = self.active_players_queue[0]
+        self.current_player.turn_active = True
+        self._emit(EVENT_TURN_STARTED, self.current_player)
+
+    def forfeit(self, player):
+        """
+        Times out a player who left the game, like time-up does for everyone.
+        The current player's step in progress (if any) is dropped and the next turn starts.
+        Returns False if the player had already finished or the game is over.
+        """
+        if self.game_over_flag or player.fallen or player.crossed:
+            return False
+        player.fallen = True
+        player.is_on_bridge = False
+        player.turn_active = False
+        self._emit(EVENT_PLAYER_TIMED_OUT, player)
+        if player is self.current_player:
+            self.pending_move = None
+            self.next_player_turn()
+        elif player in self.active_players_queue:
+            self.active_players_queue.remove(player)
+        return True
+
+    def tick(self, dt):
+        """
+        Advances the countdown by dt seconds while the timer runs.
+        Triggers handle_time_up() when it reaches zero.
+        """
+        if not self.timer_active or self.game_over_flag:
+            return
+        self.time_left -= dt
+        if self.time_left <= 0:
+            self.time_left = 0
+            self.handle_time_up()
+
+    def unrevealed_tiles(self):
+        """
+        Returns the (row, col) tiles that were never stepped on and drop when time runs out.
+        A known row keeps its safe panes even if they were only proven by elimination.
+        Whole bitsets are combined at once, so only bytes holding falling tiles are visited.
+        """
+        size = self.revealed_tiles.size
+        standing = (int.from_bytes(self.revealed_tiles.bits, "little")
+                    | int.from_bytes(self.kept_tiles.bits, "little"))
+        falling = (((1 << size) - 1) & ~standing).to_bytes(len(self.revealed_tiles.bits), "little")
+        columns = self.columns
+        tiles = []
+        for byte_index, value in enumerate(falling):
+            if value:
+                base = byte_index << 3
+                for bit in _BYTE_BITS[value]:
+                    tiles.append(divmod(base + bit, columns))
+        return tiles
+
+    def handle_time_up(self):
+        """
+        Eliminates every remaining player and collapses the unrevealed bridge tiles.
+        """
+        if self.game_over_flag:
+            return
+
+        self.timer_active = False
+        self.pending_move = None
+        for player in list(self.active_players_queue):
+            if not player.fallen and not player.crossed:
+                player.fallen = True
+                player.is_on_bridge = False
+                player.turn_active = False
+                self._emit(EVENT_PLAYER_TIMED_OUT, player)
+        self.active_players_queue.clear()
+
+        self._emit(EVENT_TIME_UP, self.unrevealed_tiles())
+        self.game_over(time_limit_reached_flag=True)
+
+    def game_over(self, time_limit_reached_flag=False):
+        """Ends the game and reports the winners."""
+        if self.game_over_flag:
+            return
+        self.game_over_flag = True
+        self.timer_active = False
+        self.time_limit_reached = time_limit_reached_flag
+        self.current_player = None
+        self._emit(EVENT_GAME_OVER, self.winners(), time_limit_reached_flag)
+
+    # --- Results ---
+    def winners(self):
+        """Names of the players who crossed, in turn order."""
+        return [player.name for player in self.players if player.crossed]
+
+    def fallen_players(self):
+        """Names of the players who fell or timed out, in turn order."""
+        return [player.name for player in self.players if player.fallen]
+
+    def autoplay(self, choose_column, move_duration=MOVE_DURATION):
+        """
+        Plays the game to the end without a renderer.
+        choose_column(engine) returns the column for the current player's next step;
+        every step consumes move_duration seconds of the timer, like the step animation does.
+        Returns the list of winners.
+        """
+        if self.current_player is None and not self.game_over_flag:
+            self.start()
+        if not self._listeners and self.pending_move is None:
+            self._autoplay_unobserved(choose_column, move_duration)
+        while not self.game_over_flag:
+            if self.play_move(choose_column(self)) is None and not self.game_over_flag:
+                raise ValueError("choose_column returned an invalid column")
+            self.tick(move_duration)
+        return self.winners()
+
+    def _autoplay_unobserved(self, choose_column, move_duration):
+        """
+        autoplay() for an engine nobody subscribed to: play_move() and tick() with the
+        method calls, event checks and pending_move tuple of every step taken out.
+        Most steps walk rows that are already known; for the default chooser those
+        are looked up here instead of calling it (it draws nothing from rng for them).
+        Moves, rng draws and results are exactly those of the general loop.
+        """
+        layout = self.actual_bridge_layout
+        columns = self.columns
+        last_row = self.bridge_length - 1
+        revealed_bits = self.revealed_tiles.bits
+        known_rows = self.revealed_rows.bits
+        safe_bits = layout.safe.bits
+        breaking_left = self.breaking_left
+        # Per row: the column choose_remembered_or_random would return once the row is known
+        walk_columns = [None] * self.bridge_length if choose_column is choose_remembered_or_random else None
+        if walk_columns is not None:
+            for row in range(self.bridge_length):
+                if (known_rows[row >> 3] >> (row & 7)) & 1:
+                    walk_columns[row] = layout.safe_column(row)
+        while not self.game_over_flag:
+            player = self.current_player
+            row = player.current_tile_row + 1
+            col = walk_columns[row] if walk_columns is not None else None
+            if col is not None and row < last_row:
+                # Safe steps onto known rows short of the end only reveal a tile and tick
+                time_left = self.time_left
+                while True:
+                    tile = row * columns + col
+                    revealed_bits[tile >> 3] |= 1 << (tile & 7)
+                    time_left -= move_duration
+                    if time_left <= 0 or row + 1 == last_row or walk_columns[row + 1] is None:
+                        break
+                    row += 1
+                    col = walk_columns[row]
+                self.timer_active = True
+                player.current_tile_row = row
+                player.current_tile_col = col
+                player.is_on_bridge = True
+                self.time_left = time_left
+                if time_left <= 0:
+                    self.time_left = 0
+                    self.handle_time_up()
+                continue
+            if col is None:
+                col = choose_column(self)
+                if not 0 <= col < columns:
+                    raise ValueError("choose_column returned an invalid column")
+            self.timer_active = True
+            player.current_tile_row = row
+            player.current_tile_col = col
+            player.is_on_bridge = True
+
+            tile = row * columns + col
+            newly_revealed = not (revealed_bits[tile >> 3] >> (tile & 7)) & 1
+            revealed_bits[tile >> 3] |= 1 << (tile & 7)
+            if (safe_bits[tile >> 3] >> (tile & 7)) & 1:
+                if not (known_rows[row >> 3] >> (row & 7)) & 1:
+                    self._mark_row_known(row)
+                    if walk_columns is not None:
+                        walk_columns[row] = layout.safe_column(row)
+                if row == last_row:
+                    player.crossed = True
+                    player.is_on_bridge = False
+                    self.next_player_turn()
+            else:
+                if newly_revealed:
+                    left = breaking_left[row] - 1
+                    breaking_left[row] = left
+                    if left == 0 and not (known_rows[row >> 3] >> (row & 7)) & 1:
+                        self._mark_row_known(row)
+                        if walk_columns is not None:
+                            walk_columns[row] = layout.safe_column(row)
+                player.fallen = True
+                player.is_on_bridge = False
+                self.next_player_turn()
+
+            if not self.game_over_flag:
+                self.time_left -= move_duration
+                if self.time_left <= 0:
+                    self.time_left = 0
+                    self.handle_time_up()
+
+
+def choose_remembered_or_random(engine):
+    """
+    Default headless chooser: steps on the revealed safe tile if the next row is known,
+    avoids a revealed broken tile, and guesses otherwise.
+    """
+    row = engine.current_player.current_tile_row + 1
+    known = engine.known_safe_column(row)
+    if known is not None:
+        return known
+    columns = engine.columns
+    if columns == 2: # An unknown two-pane row has no revealed tiles yet
+        return engine.rng.getrandbits(1)
+    # Every revealed pane of an unknown row is a broken one; guess among the others
+    revealed_bits = engine.revealed_tiles.bits
+    first_tile = row * columns
+    untried = [tile - first_tile for tile in range(first_tile, first_tile + columns)
+               if not (revealed_bits[tile >> 3] >> (tile & 7)) & 1]
+    return untried[engine.rng.randrange(len(untried))]
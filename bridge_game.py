@@ -1,39 +1,60 @@
-import random
 import re
 import threading
 from tkinter import *
 from tkinter import messagebox
 from PIL import Image, ImageTk
 import os # Import os module for file operations
-import mysql.connector # Import mysql.connector for database operations
-from mysql.connector import Error as MySQLConnectionError # Specific error for connection issues
 import json # Import json for serializing data to store in database
 import datetime # Import datetime for timestamps
+import time # perf_counter for timing database writes
 
 # --- Panda3D Imports ---
 from panda3d.core import *
 from direct.showbase.ShowBase import ShowBase
-from panda3d.core import TransparencyAttrib, Vec4, Material, LVector3, LPoint3, GeomVertexFormat, GeomVertexData, GeomTriangles, GeomNode, NodePath, VBase4, AmbientLight, DirectionalLight, Geom, GeomVertexWriter, TextNode
-from direct.gui.OnscreenText import OnscreenText
-from direct.interval.IntervalGlobal import Sequence, Parallel, Func
-from collections import deque # Importing deque for efficient player queue management
+from panda3d.core import Vec4, Material, LVector3, LPoint3, GeomVertexFormat, GeomVertexData, GeomTriangles, GeomNode, NodePath, VBase4, AmbientLight, DirectionalLight, Geom, GeomVertexWriter
+from direct.interval.IntervalGlobal import Sequence, Parallel
+from bridge_engine import (BridgeEngine, MOVE_DURATION, EVENT_TIMER_STARTED, EVENT_TURN_STARTED, EVENT_MOVE_STARTED,
+                           EVENT_INVALID_MOVE, EVENT_TILE_SAFE, EVENT_PLAYER_CROSSED, EVENT_PLAYER_FELL,
+                           EVENT_PLAYER_TIMED_OUT, EVENT_TIME_UP, EVENT_GAME_OVER) # Headless game rules
+from bridge_engine import GameSnapshot
+from bridge_layout import BridgeLayout, LAYOUT_COLUMNS, layout_from_key # Bit-packed, seed-reproducible bridge layouts
+from bridge_bots import make_policy, POLICIES # Bot players for unattended runs
+from bridge_replay import TurnLog # Event-sourced record of every turn, for replays and post-mortems
+from bridge_render import make_tile_renderer, TilePool, TILE_GLASS_COLOR, TILE_SAFE_COLOR, TILE_BROKEN_COLOR # One shared, instanced tile mesh, streamed around the camera
+from bridge_render import CharacterModelFactory, make_crowd_renderer # Flattened, cached character meshes
+from bridge_hud import Hud # Dirty-tracked status lines and a virtualized player roster
+from bridge_anim import AnimationManager # Pooled moves and falls driven from one task
+from bridge_particles import ShardPool # Fixed-budget glass shatter effect
+from bridge_persistence import SessionWriter # Write-behind queue so database latency never stalls a frame
+from bridge_storage import open_storage, STORAGE_BACKENDS, STORAGE_ERRORS, DEFAULT_SQLITE_PATH # MySQL or embedded SQLite
 
 
 # --- Global variable for login status file ---
 LOGIN_STATUS_FILE = "login_status.txt"
 
-# !!! IMPORTANT: CONFIGURE YOUR MYSQL DATABASE DETAILS HERE !!!
+# !!! IMPORTANT: CONFIGURE YOUR DATABASE DETAILS HERE !!!
+# 'mysql' uses the server in DB_CONFIG; 'sqlite' keeps everything in SQLITE_PATH, no server needed
+STORAGE_BACKEND = 'mysql'
+SQLITE_PATH = DEFAULT_SQLITE_PATH
 DB_CONFIG = {
     'host': '127.0.0.1', # Or 'localhost' or your MySQL server IP
     'user': 'root', # The user you created in MySQL
     'password': 'admin123', # The password for 'game_user'
     'database': 'squid_game_db' # The database name you created
 }
+# Sessions store only their layout key (seed + generator version) in game_sessions.bridge_layout_seed.
+# Set to True to also write the full layout (bridge_layout_json and one bridge_info row per tile)
+# for external reporting tools that read those directly.
+STORE_FULL_BRIDGE_LAYOUT = False
 # !!! END CONFIGURATION !!!
 
-# Global database connection and cursor
-db_connection = None
-db_cursor = None
+# Keys that pick a pane, left to right. Panes past the tenth are reachable by bots only.
+COLUMN_KEYS = "1234567890"
+
+# Global storage backend (bridge_storage.Storage); None when the database is unreachable
+database = None
+# Background writer for game session data
+session_writer = None
 
 # --- Utility functions for login persistence ---
 def save_login_status(logged_in=True):
@@ -67,93 +88,67 @@ def check_login_status():
         return False
 
 # --- Database Setup Functions (moved outside GlassBridgeScene) ---
-def connect_db():
-    """Establishes a connection to the MySQL database and sets global db_connection and db_cursor."""
-    global db_connection, db_cursor
+def connect_db(backend=None):
+    """
+    Opens the storage backend (STORAGE_BACKEND unless given) and sets the global database,
+    plus the session_writer that game sessions are saved through.
+    """
+    global database, session_writer
+    backend = backend or STORAGE_BACKEND
     try:
-        db_connection = mysql.connector.connect(**DB_CONFIG)
-        db_cursor = db_connection.cursor()
-        print(f"DEBUG: Connected to MySQL database: {DB_CONFIG['database']}")
-    except MySQLConnectionError as e:
-        print(f"ERROR: MySQL database connection failed: {e}")
+        database = open_storage(backend, DB_CONFIG, SQLITE_PATH)
+        session_writer = SessionWriter(database.run)
+        print(f"DEBUG: Opened {backend} storage: {database.stats()}")
+    except STORAGE_ERRORS as e:
+        print(f"ERROR: {backend} database connection failed: {e}")
         print("WARNING: Game will run without session logging due to database connection issue.")
-        db_connection = None
-        db_cursor = None
+        database = None
     except Exception as e:
         print(f"ERROR: An unexpected error occurred during database connection: {e}")
         print("WARNING: Game will run without session logging due to unexpected database issue.")
-        db_connection = None
-        db_cursor = None
+        database = None
 
 def create_tables():
     """
     Creates the game_sessions, staff, bridge_info, and users tables if they don't exist.
-    Uses the global db_connection and db_cursor.
+    Uses the global database.
     """
-    global db_connection, db_cursor
-    if not db_cursor:
-        print("WARNING: No database cursor available to create table. Skipping table creation.")
+    if not database:
+        print("WARNING: No database connection available to create table. Skipping table creation.")
         return
 
     try:
-        # Create game_sessions table
-        db_cursor.execute('''
-            CREATE TABLE IF NOT EXISTS game_sessions (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                start_time DATETIME NOT NULL,
-                end_time DATETIME,
-                duration_seconds DECIMAL(10, 2),
-                players_selected_json TEXT,
-                players_crossed_json TEXT,
-                players_fallen_json TEXT,
-                time_limit_reached BOOLEAN,
-                bridge_layout_json TEXT
-            )
-        ''')
-        print("DEBUG: Table 'game_sessions' checked/created in MySQL.")
-
-        # Create staff table
-        db_cursor.execute('''
-            CREATE TABLE IF NOT EXISTS staff (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                role VARCHAR(255),
-                staff_id VARCHAR(50) UNIQUE
-            )
-        ''')
-        print("DEBUG: Table 'staff' checked/created in MySQL.")
-
-        # Create bridge_info table
-        db_cursor.execute('''
-            CREATE TABLE IF NOT EXISTS bridge_info (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                game_session_id INT NOT NULL,
-                row_index INT NOT NULL,
-                column_index INT NOT NULL,
-                is_safe BOOLEAN NOT NULL,
-                FOREIGN KEY (game_session_id) REFERENCES game_sessions(id)
-            )
-        ''')
-        print("DEBUG: Table 'bridge_info' checked/created in MySQL.")
-
-        # Create users table
-        db_cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(255) UNIQUE NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL
-            )
-        ''')
-        print("DEBUG: Table 'users' checked/created in MySQL.")
-
-        db_connection.commit()
-        print("DEBUG: All tables checked/created in MySQL.")
-    except MySQLConnectionError as e:
-        print(f"ERROR: Could not create tables in MySQL: {e}. Ensure user has privileges.")
+        database.create_tables()
+        print(f"DEBUG: All tables checked/created in {database.name}.")
+    except STORAGE_ERRORS as e:
+        print(f"ERROR: Could not create tables in {database.name}: {e}. Ensure user has privileges.")
     except Exception as e:
         print(f"ERROR: An unexpected error occurred during table creation: {e}")
 
+def load_session_layout(game_session_id):
+    """
+    Returns the BridgeLayout played in a stored game session, or None if it cannot be found.
+    Seeded sessions are rebuilt from their layout key (with a small LRU cache);
+    older sessions fall back to their bridge_layout_json.
+    Uses the global database.
+    """
+    if not database:
+        print("WARNING: No database connection available to load a session layout.")
+        return None
+    try:
+        record = database.session_layout_record(game_session_id)
+    except STORAGE_ERRORS as e:
+        print(f"ERROR: Could not load layout for game session {game_session_id}: {e}")
+        return None
+    if not record:
+        return None
+    layout_seed, layout_json = record
+    if layout_seed:
+        return layout_from_key(layout_seed)
+    if layout_json:
+        return BridgeLayout.from_json(layout_json)
+    return None
+
 # --- Tkinter UI Functions and Classes ---
 
 # Global variables for screen dimensions, initialized after root
@@ -185,33 +180,25 @@ def _handle_user_login_or_registration(username, email, password):
     Handles user login or registration by interacting with the 'users' table.
     If the user does not exist, it inserts them.
     For this demo, it assumes successful login if user exists.
-    Uses the global db_connection and db_cursor.
+    Uses the global database; the check and the insert run in one transaction.
     """
-    global db_connection, db_cursor
-    if not db_cursor or not db_connection or not db_connection.is_connected():
-        messagebox.showerror("Database Error", "Database connection not established. Please check your MySQL server.")
+    if not database or not database.ping():
+        messagebox.showerror("Database Error", "Database connection not established. Please check your database settings.")
         return False
 
     try:
         print(f"DEBUG: Attempting to check for user '{username}' (email: {email}).")
-        # Check if user already exists by email or username
-        db_cursor.execute("SELECT id FROM users WHERE email = %s OR username = %s", (email, username))
-        user_exists = db_cursor.fetchone()
-
+        # Registers the user if no one has this email or username yet
+        user_exists = database.find_or_register_user(username, email, password)
+        # Message boxes only once the pooled connection is back in the pool
         if user_exists:
             print(f"DEBUG: User '{username}' (email: {email}) already exists. Proceeding with login.")
             messagebox.showinfo("Login Successful", "You are already registered. Logging in.")
-            return True
         else:
-            print(f"DEBUG: User '{username}' (email: {email}) not found. Attempting to register new user.")
-            # User does not exist, insert new user
-            db_cursor.execute("INSERT INTO users (username, email, password) VALUES (%s, %s, %s)",
-                           (username, email, password))
-            db_connection.commit()
             print(f"DEBUG: New user '{username}' (email: {email}) registered successfully and changes committed.")
             messagebox.showinfo("Registration Successful", "New account created and logged in!")
-            return True
-    except MySQLConnectionError as e:
+        return True
+    except STORAGE_ERRORS as e:
         print(f"ERROR: Database operation failed for user login/registration: {e}")
         messagebox.showerror("Database Error", f"Could not connect to or interact with the user database: {e}")
         return False
@@ -506,28 +493,36 @@ def start_game():
     root.destroy() # Close the Tkinter window
 
     # Now, initialize and run the Panda3D game
-    global selected_players, selected_staff, db_connection, db_cursor # Access the global list populated by Tkinter and db connection
-    game = GlassBridgeScene(list(selected_players), list(selected_staff), db_connection, db_cursor) # Pass a copy of selected players and DB connection to the game
+    global selected_players, selected_staff, database, session_writer # Access the global list populated by Tkinter and db connection
+    game = GlassBridgeScene(list(selected_players), list(selected_staff), database, # Pass a copy of selected players and the DB pool to the game
+                            session_writer=session_writer)
     game.run()
 
 
 # --- Panda3D Game Classes and Logic ---
 
+CHARACTER_MODELS = CharacterModelFactory() # Shared by every Player and Staff model
+
+# --- Turn states of GlassBridgeScene (see _set_turn_state) ---
+TURN_STARTING = "starting" # Before the engine's first turn
+TURN_CHOOSING = "choosing" # The current player must pick a pane (keyboard or bot)
+TURN_MOVING = "moving"     # Step animation running; the engine resolves the move when it completes
+TURN_OVER = "over"         # Game over; no more input, timers or camera updates
+HUD_TIMER_INTERVAL = 1.0 # Seconds between "Time Left" updates (the display shows whole seconds)
+CAMERA_SETTLE_DISTANCE = 0.01 # The camera task sleeps once it is this close to its target
+PLAYER_SHAPE = (0.6, 0.8, 0.5, 1.0, 0.3, 0.3, 0.7, 0.8) # _create_character_model's default proportions
+
 class Player:
     """
     Represents a single player character in the Glass Bridge game.
-    Handles player model creation, movement, and status.
+    Handles player model creation and movement animation.
+    Game state (row, fallen, crossed, ...) lives in the engine's EnginePlayer.
     """
-    def __init__(self, name, start_pos, game_instance, head_color, body_color):
-        self.name = name
+    def __init__(self, state, start_pos, game_instance, head_color, body_color):
+        self.state = state # bridge_engine.EnginePlayer owned by the game's BridgeEngine
+        self.name = state.name
         self.game = game_instance
-        self.current_tile_row = -1  # Starts before the first bridge tile (on the starting platform)
-        self.current_tile_col = -1  # Column doesn't matter until they are on the bridge
-        self.fallen = False
-        self.crossed = False
-        self.turn_active = False # True only when it's this player's turn to make a choice
         self.original_color = body_color # Store original color for resetting highlight
-        self.is_on_bridge = False # True if player is on any tile of the bridge
         # Create the player's segmented model
         self.np = self._create_character_model(start_pos, head_color=head_color, body_color=body_color)
         self.np.reparentTo(self.game.render) # <--- ADDED: Reparent player model to the scene
@@ -538,212 +533,72 @@ class Player:
                              limb_width=0.3, limb_depth=0.3, arm_length=0.7, leg_length=0.8,
                              head_color=VBase4(1, 0.8, 0, 1), body_color=VBase4(0, 0.5, 1, 1)):
         """
-        Creates a segmented character model (head, torso, arms, legs) from cubes.
+        Creates a segmented character model (head, torso, arms, legs).
+        The mesh is built and flattened once per shape by CHARACTER_MODELS and shared;
+        this only creates the character's own root node.
         The character_root's Z=0 is designed to be the bottom of the character's feet.
         This is a static method to be reused for both Players and Staff.
         """
-        character_root = NodePath("character_root")
-        # Legs (base at Z=0 of the character_root)
-        left_leg = Player._create_cube(limb_width, limb_depth, leg_length, body_color)
-        left_leg.setPos(-(torso_width / 4), 0, leg_length / 2)
-        left_leg.reparentTo(character_root)
-        right_leg = Player._create_cube(limb_width, limb_depth, leg_length, body_color)
-        right_leg.setPos(torso_width / 4, 0, leg_length / 2)
-        right_leg.reparentTo(character_root)
-        # Torso (base at Z=leg_length)
-        torso = Player._create_cube(torso_width, torso_depth, torso_height, body_color)
-        torso.setPos(0, 0, leg_length + torso_height / 2)
-        torso.reparentTo(character_root)
-        # Arms (attached to torso, positioned relative to character_root's Z=0)
-        left_arm = Player._create_cube(limb_width, limb_depth, arm_length, body_color)
-        left_arm.setPos(-(torso_width / 2 + limb_width / 2), 0, leg_length + torso_height * 0.7)
-        left_arm.reparentTo(character_root)
-        right_arm = Player._create_cube(limb_width, limb_depth, arm_length, body_color)
-        right_arm.setPos(torso_width / 2 + limb_width / 2, 0, leg_length + torso_height * 0.7)
-        right_arm.reparentTo(character_root)
-        # Head (base at Z=leg_length + torso_height)
-        head = Player._create_cube(head_size, head_size, head_size, head_color)
-        head.setPos(0, 0, leg_length + torso_height + head_size / 2)
-        head.reparentTo(character_root)
-        character_root.setPos(pos)
+        shape = (head_size, torso_width, torso_depth, torso_height, limb_width, limb_depth, arm_length, leg_length)
+        character_root = CHARACTER_MODELS.make(pos, head_color, body_color, shape)
         character_root.setScale(0.8) # Overall scale for the entire character model
-        
-        material = Material()
-        material.setDiffuse(VBase4(0.8, 0.8, 0.8, 1))
-        material.setSpecular(VBase4(0.5, 0.5, 0.5, 1))
-        material.setShininess(50.0)
-        character_root.setMaterial(material)
         return character_root
 
-    @staticmethod
-    def _create_cube(sx, sy, sz, color):
-        """
-        Helper method to create a single cube GeomNodePath.
-        The cube is centered at (0,0,0) and has dimensions sx, sy, sz.
-        Made static to be callable by both Player and Staff.
-        """
-        format = GeomVertexFormat.getV3n3cpt2()
-        vdata = GeomVertexData('cube', format, Geom.UHDynamic)
-        vertex = GeomVertexWriter(vdata, 'vertex')
-        normal = GeomVertexWriter(vdata, 'normal')
-        color_writer = GeomVertexWriter(vdata, 'color')
-        texcoord = GeomVertexWriter(vdata, 'texcoord')
+    # --- Read-only views of the engine state, kept for the rendering code ---
+    @property
+    def current_tile_row(self):
+        return self.state.current_tile_row
 
-        half_sx, half_sy, half_sz = sx / 2, sy / 2, sz / 2
-
-        # Front face (Y-negative)
-        vertex.addData3f(-half_sx, -half_sy, -half_sz); normal.addData3f(0,-1,0); color_writer.addData4f(color); texcoord.addData2f(0,0)
-        vertex.addData3f( half_sx, -half_sy, -half_sz); normal.addData3f(0,-1,0); color_writer.addData4f(color); texcoord.addData2f(1,0)
-        vertex.addData3f( half_sx, -half_sy,  half_sz); normal.addData3f(0,-1,0); color_writer.addData4f(color); texcoord.addData2f(1,1)
-        vertex.addData3f(-half_sx, -half_sy,  half_sz); normal.addData3f(0,-1,0); color_writer.addData4f(color); texcoord.addData2f(0,1)
-        # Back face (Y-positive)
-        vertex.addData3f( half_sx,  half_sy, -half_sz); normal.addData3f(0,1,0); color_writer.addData4f(color); texcoord.addData2f(0,0)
-        vertex.addData3f(-half_sx,  half_sy, -half_sz); normal.addData3f(0,1,0); color_writer.addData4f(color); texcoord.addData2f(1,0)
-        vertex.addData3f(-half_sx,  half_sy,  half_sz); normal.addData3f(0,1,0); color_writer.addData4f(color); texcoord.addData2f(1,1)
-        vertex.addData3f( half_sx,  half_sy,  half_sz); normal.addData3f(0,1,0); color_writer.addData4f(color); texcoord.addData2f(0,1)
-        # Right face (X-positive)
-        vertex.addData3f( half_sx, -half_sy, -half_sz); normal.addData3f(1,0,0); color_writer.addData4f(color); texcoord.addData2f(0,0)
-        vertex.addData3f( half_sx,  half_sy, -half_sz); normal.addData3f(1,0,0); color_writer.addData4f(color); texcoord.addData2f(1,0)
-        vertex.addData3f( half_sx,  half_sy,  half_sz); normal.addData3f(1,0,0); color_writer.addData4f(color); texcoord.addData2f(1,1)
-        vertex.addData3f( half_sx, -half_sy,  half_sz); normal.addData3f(1,0,0); color_writer.addData4f(color); texcoord.addData2f(0,1)
-        # Left face (X-negative)
-        vertex.addData3f(-half_sx,  half_sy, -half_sz); normal.addData3f(-1,0,0); color_writer.addData4f(color); texcoord.addData2f(0,0)
-        vertex.addData3f(-half_sx, -half_sy, -half_sz); normal.addData3f(-1,0,0); color_writer.addData4f(color); texcoord.addData2f(1,0)
-        vertex.addData3f(-half_sx, -half_sy,  half_sz); normal.addData3f(-1,0,0); color_writer.addData4f(color); texcoord.addData2f(1,1)
-        vertex.addData3f(-half_sx,  half_sy,  half_sz); normal.addData3f(-1,0,0); color_writer.addData4f(color); texcoord.addData2f(0,1) # Corrected normal
-        # Top face (Z-positive)
-        vertex.addData3f(-half_sx,  half_sy,  half_sz); normal.addData3f(0,0,1); color_writer.addData4f(color); texcoord.addData2f(0,0)
-        vertex.addData3f(-half_sx, -half_sy,  half_sz); normal.addData3f(0,0,1); color_writer.addData4f(color); texcoord.addData2f(1,0)
-        vertex.addData3f( half_sx, -half_sy,  half_sz); normal.addData3f(0,0,1); color_writer.addData4f(color); texcoord.addData2f(1,1)
-        vertex.addData3f( half_sx,  half_sy,  half_sz); normal.addData3f(0,0,1); color_writer.addData4f(color); texcoord.addData2f(0,1)
-        # Bottom face (Z-negative)
-        vertex.addData3f(-half_sx, -half_sy, -half_sz); normal.addData3f(0,0,-1); color_writer.addData4f(color); texcoord.addData2f(0,0)
-        vertex.addData3f(-half_sx,  half_sy, -half_sz); normal.addData3f(0,0,-1); color_writer.addData4f(color); texcoord.addData2f(1,0)
-        vertex.addData3f( half_sx,  half_sy, -half_sz); normal.addData3f(0,0,-1); color_writer.addData4f(color); texcoord.addData2f(1,1)
-        vertex.addData3f( half_sx, -half_sy, -half_sz); normal.addData3f(0,0,-1); color_writer.addData4f(color); texcoord.addData2f(0,1)
+    @property
+    def current_tile_col(self):
+        return self.state.current_tile_col
 
-        tris = GeomTriangles(Geom.UHDynamic)
-        tris.addVertices(0,1,2); tris.addVertices(0,2,3) # Front
-        tris.addVertices(4,5,6); tris.addVertices(4,6,7) # Back
-        tris.addVertices(8,9,10); tris.addVertices(8,10,11) # Right
-        tris.addVertices(12,13,14); tris.addVertices(12,14,15) # Left
-        tris.addVertices(16,17,18); tris.addVertices(16,18,19) # Top
-        tris.addVertices(20,21,22); tris.addVertices(20,22,23) # Bottom
+    @property
+    def fallen(self):
+        return self.state.fallen
 
-        geom = Geom(vdata)
-        geom.addPrimitive(tris)
-        node = GeomNode('cube_model')
-        node.addGeom(geom)
-        np = NodePath(node)
-        return np
+    @property
+    def crossed(self):
+        return self.state.crossed
+
+    @property
+    def turn_active(self):
+        return self.state.turn_active
+
+    @property
+    def is_on_bridge(self):
+        return self.state.is_on_bridge
 
     def move_to_tile(self, row, col):
         """
-        Moves the player to the specified tile on the bridge.
-        This function handles the actual movement animation and updates player/tile state.
+        Animates the player onto the specified tile on the bridge.
+        The engine decides whether the tile holds once the animation completes.
         """
-        print(f"DEBUG: Player {self.name} (current_tile_row={self.current_tile_row}, current_tile_col={self.current_tile_col}) called to move to ({row}, {col}).")
+        print(f"DEBUG: Player {self.name} called to move to ({row}, {col}).")
 
-        if self.fallen or self.crossed:
-            print(f"DEBUG: {self.name} is already out of the game. Cannot move.")
-            return
-
-        # Start the global timer if this is the very first move of the game
-        # This condition ensures the timer starts only once, when the first player makes their very first step onto the bridge.
-        if not self.game.timer_active and self.game.current_player == self:
-            self.game.timer_active = True
-            print("DEBUG: Global game timer activated!")
-        target_tile = self.game.bridge_tiles[row][col]
-        target_pos = target_tile['np'].getPos()
-        
-        # Player stands on top of the tile, so Z is tile's Z + tile_depth
-        player_z_on_tile = target_pos.getZ() + self.game.tile_depth
+        target_x, target_y = self.game.tile_position(row, col)
         
-        # Update player's position before animation
-        self.current_tile_row = row
-        self.current_tile_col = col
-        self.is_on_bridge = True # Player is now on the bridge
-        print(f"DEBUG: {self.name} moving to tile ({row}, {col}) at Y: {target_pos.getY()}, Z: {player_z_on_tile}")
-
-        # Use posInterval to animate the existing player model
-        move_interval = Sequence(
-            self.np.posInterval(0.5, LPoint3(target_pos.getX(), target_pos.getY(), player_z_on_tile)),
-            Func(self.check_tile, row, col)
-        )
-        move_interval.start()
+        # Player stands on top of the tile, so Z is tile's Z (0) + tile_depth
+        player_z_on_tile = self.game.tile_depth
+        print(f"DEBUG: {self.name} moving to tile ({row}, {col}) at Y: {target_y}, Z: {player_z_on_tile}")
 
-    def check_tile(self, row, col):
-        """
-        Checks if the tile the player landed on is safe or broken.
-        This is called after the player's movement animation completes.
-        """
-        if self.fallen or self.crossed:
-            return
+        # Animate the existing player model, then let the engine check the tile
+        self.game.animations.move(self.np, LPoint3(target_x, target_y, player_z_on_tile), MOVE_DURATION,
+                                  on_done=self.game.resolve_move, key=('player', self.state.index))
 
-        tile_info = self.game.bridge_tiles[row][col]
-        
-        print(f"DEBUG (Check Tile): {self.name} landed on ({row}, {col}). Is safe: {tile_info['is_safe']}.")
-
-        if tile_info['is_safe']:
-            print(f"DEBUG: {self.name} landed safely on tile ({row}, {col}).")
-            # Mark this tile as safe for observation
-            self.game.revealed_safe_path[row] = col 
-
-            # Change color of the safe tile to indicate it's proven
-            tile_info['np'].setColorScale(VBase4(0.5, 1.0, 0.5, 0.6)) # Light green for safe tile
-            tile_info['np'].setTransparency(TransparencyAttrib.M_alpha) # Ensure transparency is still active
-
-            self.game.player_status_text[self.name].setText(f"{self.name}: On tile {row+1}/{self.game.bridge_length}")
-
-            if row == self.game.bridge_length - 1:
-                print(f"DEBUG: {self.name} has crossed the bridge!")
-                self.crossed = True
-                self.game.player_status_text[self.name].setText(f"{self.name}: Crossed!")
-                # Move player to a safe "crossed" area off the bridge
-                # Offset slightly to prevent stacking at the end if multiple cross
-                self.np.setPos(self.np.getPos().getX() + (self.game.players.index(self) - (len(self.game.players) - 1) / 2) * 0.5, 
-                                 self.np.getPos().getY() + 2, self.game.tile_depth)
-                
-                # Player crossed, their turn ends, next player's turn starts
-                self.turn_active = False 
-                self.game.next_player_turn() 
-            else:
-                # Player landed safely and has not crossed, their turn continues
-                self.turn_active = True 
-                print(f"DEBUG: {self.name}'s turn continues. Choose next tile (1 for Left, 2 for Right)")
-                self.game.game_status_text.setText(f"{self.name}: Choose next tile (1 for Left, 2 for Right)")
-        else: # Player landed on a broken tile
-            print(f"DEBUG: {self.name} landed on a broken tile ({row}, {col}).")
-            # Mark this tile as broken for observation
-            self.game.revealed_broken_path[row] = col
-            self._fall(broken_tile_info=tile_info)
-            self.game.player_status_text[self.name].setText(f"{self.name}: Fallen!")
-            # Player fell, their turn ends, next player's turn starts
-            self.turn_active = False 
-            self.game.next_player_turn() 
-
-    def _fall(self, broken_tile_info=None):
+    def _fall(self, broken_tile=None):
         """
         Animates the player falling and removes their model.
-        Also animates the broken tile falling.
+        Also animates the broken tile, given as (row, col), falling.
         """
         print(f"DEBUG: {self.name} is falling. Current tile: ({self.current_tile_row}, {self.current_tile_col})")
-        self.fallen = True
-        self.is_on_bridge = False
-
-        if broken_tile_info:
-            # Animate the broken tile falling
-            broken_tile_info['np'].setTransparency(TransparencyAttrib.M_alpha)
-            broken_tile_info['np'].setColor(Vec4(0.2, 0.2, 0.2, 0.3)) # Make it look broken/darker
-            fall_tile_interval = broken_tile_info['np'].posInterval(0.5, LPoint3(broken_tile_info['x'], broken_tile_info['y'], -5),
-                                                                     startPos=broken_tile_info['np'].getPos())
-            fall_tile_interval.start()
-
-        fall_interval = Sequence(
-            self.np.posInterval(0.5, LPoint3(self.np.getPos().getX(), self.np.getPos().getY(), -5)),
-            Func(self.np.detachNode) # Remove player model after falling
-        )
-        fall_interval.start()
+
+        if broken_tile:
+            self.game.drop_tile(*broken_tile)
+
+        self.game.animations.move(self.np, LPoint3(self.np.getPos().getX(), self.np.getPos().getY(), -5), 0.5,
+                                  on_done=self.np.detachNode, # Remove player model after falling
+                                  key=('player', self.state.index))
 
 class Staff:
     """
@@ -802,18 +657,31 @@ class GlassBridgeScene(ShowBase):
     Main game class for the Glass Bridge game, implementing Squid Game rules.
     Manages the scene, bridge, players, and game flow.
     """
-    def __init__(self, selected_players_from_tkinter, selected_staff_from_tkinter, conn, cursor):
+    def __init__(self, selected_players_from_tkinter, selected_staff_from_tkinter, conn, bot_policy=None,
+                 columns=LAYOUT_COLUMNS, safe_per_row=1, bridge_length=10, session_writer=None):
         ShowBase.__init__(self)
         print("DEBUG: Initializing GlassBridgeScene.")
         self.disableMouse()
-
-        # --- Database Setup (using passed connection) ---
-        self.conn = conn
-        self.cursor = cursor
-        self.game_session_id = None # To store the ID of the current game session in the DB
+        if self.camera is None: # window-type none (headless benchmarks) opens no window and makes no camera
+            self.camera = self.render.attachNewNode('camera')
+
+        # --- Database Setup (using passed storage) ---
+        self.conn = conn # A bridge_storage.Storage, or None to play without saving
+        # Session rows are written on a background thread; without a shared writer the scene gets its own
+        if session_writer is None and conn:
+            session_writer = SessionWriter(conn.run)
+        self.session_writer = session_writer
+        self._session_key = id(self) # Writer queue key prefix for this game's session
+        # Committed initial save: {'id': session ID, 'stats': rows, statements and seconds}. Only the
+        # session writer replaces it, once the save has committed; the scene only reads it
+        self._saved_session = {'id': None, 'stats': None}
+        self._pending_session = {'id': None} # Uncommitted session ID; read and written on the writer thread only
         self.session_start_time = datetime.datetime.now() # Record start time for DB
         self.selected_players_names = selected_players_from_tkinter # Store players from Tkinter selection
         self.selected_staff_names = selected_staff_from_tkinter # Store selected staff from Tkinter
+        # Optional bridge_bots policy that plays every turn instead of the number keys
+        self.bot_policy = bot_policy
+        self.bot_snapshot = GameSnapshot() # Reused for every bot decision
 
         # --- Camera Setup for 3D Perspective ---
         self.camera.setPos(0, -10, 15) # Closer to the action
@@ -832,127 +700,154 @@ class GlassBridgeScene(ShowBase):
         alightNP = self.render.attachNewNode(alight)
         self.render.setLight(alightNP)
         # --- Game Parameters ---
-        self.bridge_length = 10 # Number of rows of tiles
+        self.bridge_length = bridge_length # Number of rows of tiles
         self.tile_width = 3.0
         self.tile_gap = 0.5
         self.tile_depth = 0.2
+        self.tile_window_rows = 64 # Rows of tiles materialized around the camera target at any time
+        self.tile_rows_behind = 8 # ... of which this many behind the current player
         self.bridge_start_y = 0
-        self.revealed_safe_path = {} # Stores {row: safe_column} for proven safe tiles
-        self.revealed_broken_path = {} # NEW: Stores {row: broken_column} for tiles that broke
-        self.pulse_interval = None # Initialize pulse_interval here
+        self.animations = AnimationManager(self.taskMgr) # Every move and fall in the scene
+        self.shards = ShardPool(self.render, self.taskMgr) # Glass shards of broken tiles
 
         # --- Time Limit for the game ---
         self.time_limit = 40.0 # Total seconds for all players to cross
-        self.time_left = self.time_limit
-        self.timer_active = False # Becomes True when the first player steps on the bridge
-        self.game_over_flag = False # Flag to indicate if the game has concluded
+
+        # --- Game Rules ---
+        # The engine owns the layout, turn queue, revealed paths and timer; this scene only renders its events.
+        player_names_for_game = self.selected_players_names if self.selected_players_names else [f"Player {i+1}" for i in range(7)] # Default to 7 players
+        self.engine = BridgeEngine(player_names_for_game, bridge_length=self.bridge_length, time_limit=self.time_limit,
+                                   columns=columns, safe_per_row=safe_per_row)
+        self.turn_log = TurnLog(self.engine) # Subscribed before start() so the first turn is recorded
 
         # --- Bridge Generation ---
-        self.bridge_tiles = [] # Stores tile NodePaths and their properties
-        self.actual_bridge_layout = [] # Stores the true safe/broken configuration for DB
+        self.actual_bridge_layout = self.engine.actual_bridge_layout # Bit-packed safe/broken configuration
+        self.tile_pool = None # Draws the rows of tiles around the camera target
+        self.bridge_collapsed = False # Set when time ran out and every unrevealed tile fell
         self.end_platform_y = 0 # Will be set during bridge generation
         self.create_bridge_and_platforms() # Renamed and refactored
-        print("DEBUG: Initial bridge_tiles after generation:")
-        for r_idx, row_tiles in enumerate(self.bridge_tiles):
-            for c_idx, tile_info in enumerate(row_tiles):
-                print(f"   Tile ({r_idx},{c_idx}): is_safe={tile_info['is_safe']}")
+        if self.bridge_length <= self.tile_window_rows:
+            print("DEBUG: Initial bridge layout after generation:")
+            for r_idx, c_idx, is_safe in self.actual_bridge_layout.tiles():
+                print(f"   Tile ({r_idx},{c_idx}): is_safe={is_safe}")
+        else:
+            print(f"DEBUG: Generated a {self.bridge_length}-row bridge (layout key {self.engine.layout_key()}).")
 
         # Initialize players and staff
-        self.players = [] # All player objects (Player 1, Player 2, etc.)
+        self.players = [] # Player renderers, indexed like engine.players
+        self.crowd = None # Instanced draw of the players still waiting on the start platform (None: drawn one by one)
+        self.highlighted_player = None # Player whose tint/pulse highlight_current_player has to undo
+        self.pulse_interval = None # Looping scale pulse of the highlighted player
         self.staff_members = [] # All staff objects
-        # DSA Concept: Using a deque for active_players_queue for efficient player queue management (O(1) rotations)
-        self.active_players_queue = deque() # Deque of players still in the game, in turn order (for manual choices)
-        
-        self.current_player = None # The Player object whose turn it currently is
+        self.camera_follow_player = None
         self.setup_characters() # New method to set up both players and staff
 
-        # Set initial current player and activate their turn
-        if self.active_players_queue:
-            self.current_player = self.active_players_queue[0] # First player in the deque
-            self.current_player.turn_active = True
-            self.camera_follow_player = self.current_player.np
-            print(f"DEBUG: Initial current player set to {self.current_player.name}. Turn active: {self.current_player.turn_active}")
-        else:
-            print("ERROR: No players created. Game cannot start.")
-            self.current_player = None 
-
         # --- Save initial game session data to DB (only if connection exists) ---
-        if self.conn:
+        if self.session_writer:
             self._save_initial_game_session()
 
 
         # --- UI Elements ---
-        self.player_info_text = OnscreenText(text="", pos=(0.0, 0.9), scale=0.07, fg=(1,1,1,1), align=TextNode.ACenter, mayChange=True)
-        self.instructions_text = OnscreenText(text="Press '1' for Left, '2' for Right", pos=(0, -0.9), scale=0.07, fg=(1,1,1,1), align=TextNode.ACenter, mayChange=True)
-        self.game_status_text = OnscreenText(text="Game Start!", pos=(0, 0.8), scale=0.08, fg=(1,1,1,1), align=TextNode.ACenter, mayChange=True)
-        self.timer_text = OnscreenText(text=f"Time Left: {self.time_limit:.0f}", pos=(1.0, 0.9), scale=0.06, fg=(1,1,1,1), align=TextNode.ARight, mayChange=True) # Timer display
-        self.player_status_text = {} # To display individual player status
-        self.display_player_status_ui()
+        # Text is only regenerated when a visible string changes; the roster shows a window of players
+        self.hud = Hud(self.aspect2d, [player.name for player in self.players])
+        self.hud.set_line('instructions', f"Press {self.column_choice_hint()}")
+        self.hud.set_line('timer', f"Time Left: {self.time_limit:.0f}") # Timer display
 
         # --- Input Handling ---
-        self.accept("1", self.attempt_move, [0]) # Left tile
-        self.accept("2", self.attempt_move, [1]) # Right tile
+        for col, key in enumerate(COLUMN_KEYS[:self.engine.columns]): # '1' is the leftmost pane, '2' the next, ...
+            self.accept(key, self.attempt_move, [col])
         self.accept("escape", self.userExit) # Allow ESC to exit
 
-        # --- Game Loop/Task ---
-        self.taskMgr.add(self.update_game_state, "update_game_state")
-        self.taskMgr.add(self.update_camera, "update_camera")
-        self.taskMgr.add(self.update_timer, "update_game_timer") # Add timer update task
-        
-        self.update_player_info_display()
-        # Initial highlight for the first player
-        self.highlight_current_player()
+        # --- Turn State Machine ---
+        # Nothing polls every frame: engine events move the turn state, the step animation
+        # resolves the move when it completes, and the timer only wakes up for the HUD (1 Hz)
+        # and at the timeout instant. The camera task runs only while the camera is catching up.
+        self.turn_state = TURN_STARTING
+        self._timer_synced_at = 0.0 # Frame time up to which the engine's timer has been ticked
+
+        # --- Engine Events ---
+        self.engine.subscribe(EVENT_TIMER_STARTED, self._on_timer_started)
+        self.engine.subscribe(EVENT_TURN_STARTED, self._on_turn_started)
+        self.engine.subscribe(EVENT_MOVE_STARTED, self._on_move_started)
+        self.engine.subscribe(EVENT_INVALID_MOVE, self._on_invalid_move)
+        self.engine.subscribe(EVENT_TILE_SAFE, self._on_tile_safe)
+        self.engine.subscribe(EVENT_PLAYER_CROSSED, self._on_player_crossed)
+        self.engine.subscribe(EVENT_PLAYER_FELL, self._on_player_fell)
+        self.engine.subscribe(EVENT_PLAYER_TIMED_OUT, self._on_player_timed_out)
+        self.engine.subscribe(EVENT_TIME_UP, self._on_time_up)
+        self.engine.subscribe(EVENT_GAME_OVER, self._on_game_over)
+
+        # Set initial current player and activate their turn
+        if self.engine.start():
+            print(f"DEBUG: Initial current player set to {self.current_player.name}. Turn active: {self.current_player.turn_active}")
+            self.hud.set_line('game_status', "Game Start!")
+        else:
+            print("ERROR: No players created. Game cannot start.")
 
     def _save_initial_game_session(self):
-        """Saves initial game session data to the database."""
-        if not self.cursor or not self.conn:
-            print("WARNING: No database cursor or connection available to save initial session. Skipping.")
+        """
+        Queues the initial game session data for the session writer, which saves it in
+        a single transaction: the session row, then each table's rows in bulk.
+        Once it has committed, game_session_id and session_save_stats report it.
+        """
+        if not self.session_writer:
+            print("WARNING: No database connection available to save initial session. Skipping.")
             return
 
-        try:
-            # Use %s as placeholder for MySQL connector
-            self.cursor.execute('''
-                INSERT INTO game_sessions (start_time, players_selected_json, bridge_layout_json)
-                VALUES (%s, %s, %s)
-            ''', (
-                self.session_start_time.isoformat(sep=' ', timespec='seconds'), # Format for MySQL DATETIME
-                json.dumps(self.selected_players_names),
-                json.dumps(self.actual_bridge_layout)
-            ))
-            self.game_session_id = self.cursor.lastrowid # Get the ID of the newly inserted row
-            self.conn.commit()
-            print(f"DEBUG: Initial game session saved with ID: {self.game_session_id}")
-
-            # Insert staff data (example, you might want to fetch this from char_data)
-            staff_data = [
-                ("Front Man", "S1"), ("Square Guard", "SG"), ("Triangle Guard", "TG"), ("Circle Guard", "CG")
-            ]
-            for name, staff_id in staff_data:
-                self.cursor.execute('''
-                    INSERT IGNORE INTO staff (name, role, staff_id) VALUES (%s, %s, %s)
-                ''', (name, "Guard", staff_id)) # Assuming 'Guard' role for simplicity
-            self.conn.commit()
-            print("DEBUG: Staff data inserted/checked.")
-
-            # Insert bridge_info for this session
-            for r_idx, row_config in enumerate(self.actual_bridge_layout):
-                for c_idx, is_safe in enumerate(row_config):
-                    self.cursor.execute('''
-                        INSERT INTO bridge_info (game_session_id, row_index, column_index, is_safe)
-                        VALUES (%s, %s, %s, %s)
-                    ''', (self.game_session_id, r_idx, c_idx, is_safe))
-            self.conn.commit()
-            print("DEBUG: Bridge info for current session inserted.")
-
-        except MySQLConnectionError as e:
-            print(f"ERROR: Could not save initial game session or related data to MySQL: {e}")
-        except Exception as e:
-            print(f"ERROR: An unexpected error occurred while saving initial session or related data: {e}")
+        # Everything the write needs is read now, on the main thread
+        storage = self.conn
+        start_time = self.session_start_time.isoformat(sep=' ', timespec='seconds') # Format for MySQL DATETIME
+        players_json = json.dumps(self.selected_players_names)
+        layout_key = self.engine.layout_key()
+        layout_json = self.actual_bridge_layout.to_json() if STORE_FULL_BRIDGE_LAYOUT else None
+        # Insert staff data (example, you might want to fetch this from char_data)
+        staff_data = [
+            ("Front Man", "S1"), ("Square Guard", "SG"), ("Triangle Guard", "TG"), ("Circle Guard", "CG")
+        ]
+        staff_rows = [(name, "Guard", staff_id) for name, staff_id in staff_data] # Assuming 'Guard' role for simplicity
+        tiles = list(self.actual_bridge_layout.tiles()) if STORE_FULL_BRIDGE_LAYOUT else None
+        # Shared with the results job, which may run in the same transaction
+        self._pending_session = pending = {'id': None}
+
+        def write(cursor):
+            started = time.perf_counter()
+            # The layout key is enough to rebuild the bridge; the full layout is optional
+            session_id = storage.insert_session(cursor, start_time, players_json, layout_key, layout_json)
+            rows_written, statements = 1, 1
+
+            written, sent = storage.insert_rows(cursor, 'staff', ('name', 'role', 'staff_id'), staff_rows, ignore=True)
+            rows_written += written
+            statements += sent
+
+            # Insert bridge_info for this session (only when full layouts are requested)
+            if tiles is not None:
+                written, sent = storage.insert_rows(cursor, 'bridge_info', ('game_session_id', 'row_index', 'column_index', 'is_safe'),
+                                                    [(session_id, r_idx, c_idx, is_safe) for r_idx, c_idx, is_safe in tiles])
+                rows_written += written
+                statements += sent
+
+            pending['id'] = session_id # failed() clears it again if the transaction rolls back
+            return {'id': session_id, 'stats': {'rows': rows_written, 'statements': statements,
+                                                'seconds': time.perf_counter() - started}}
+
+        def saved(record):
+            self._saved_session = record # Replaced whole, so readers never see half of it
+            stats = record['stats']
+            print(f"DEBUG: Initial game session saved with ID: {record['id']} "
+                  f"({stats['rows']} rows in {stats['statements']} statements, {stats['seconds'] * 1000:.1f} ms).")
+
+        def failed(error):
+            # The writer rolled the transaction back, so no session row is left without its staff or bridge rows
+            pending['id'] = None # Nothing to update at game over
+            print(f"ERROR: Could not save initial game session or related data to {storage.name}: {error}")
+
+        if not self.session_writer.submit((self._session_key, 'start'), write, failed, saved):
+            print(f"WARNING: Session writer is backed up ({self.session_writer.stats()}); initial game session not saved.")
 
     def _update_game_session_results(self, time_limit_reached_flag=False):
-        """Updates the game session with final results."""
-        if not self.cursor or not self.conn or self.game_session_id is None:
-            print("WARNING: No database cursor, connection, or session ID to update results. Skipping.")
+        """Queues the game session's final results for the session writer."""
+        if not self.session_writer:
+            print("WARNING: No database connection available to update results. Skipping.")
             return
 
         end_time = datetime.datetime.now()
@@ -960,146 +855,116 @@ class GlassBridgeScene(ShowBase):
         
         players_crossed = [player.name for player in self.players if player.crossed]
         players_fallen = [player.name for player in self.players if player.fallen]
+        storage = self.conn
+        pending = self._pending_session
+        values = (
+            end_time.isoformat(sep=' ', timespec='seconds'), # Format for MySQL DATETIME
+            duration,
+            json.dumps(players_crossed),
+            json.dumps(players_fallen),
+            time_limit_reached_flag,
+        )
 
-        try:
-            # Use %s as placeholder for MySQL connector
-            self.cursor.execute('''
-                UPDATE game_sessions
-                SET end_time = %s,
-                    duration_seconds = %s,
-                    players_crossed_json = %s,
-                    players_fallen_json = %s,
-                    time_limit_reached = %s
-                WHERE id = %s
-            ''', (
-                end_time.isoformat(sep=' ', timespec='seconds'), # Format for MySQL DATETIME
-                duration,
-                json.dumps(players_crossed),
-                json.dumps(players_fallen),
-                1 if time_limit_reached_flag else 0, # MySQL BOOLEAN is often stored as TINYINT(1) or 0/1
-                self.game_session_id
-            ))
-            self.conn.commit()
-            print(f"DEBUG: Game session {self.game_session_id} updated with final results.")
-        except MySQLConnectionError as e:
-            print(f"ERROR: Could not update game session results in MySQL: {e}")
-        except Exception as e:
-            print(f"ERROR: An unexpected error occurred while updating session results: {e}")
+        def write(cursor):
+            # Runs after the initial save (the writer keeps submission order), so the session ID is known by now
+            session_id = pending['id']
+            if session_id is None:
+                print("WARNING: No game session ID to update results. Skipping.")
+                return
+            storage.update_session_results(cursor, session_id, *values)
+            print(f"DEBUG: Game session {session_id} updated with final results.")
+
+        def failed(error):
+            print(f"ERROR: Could not update game session results in {storage.name}: {error}")
+
+        # A newer result for this session replaces one that is still queued
+        if not self.session_writer.submit((self._session_key, 'results'), write, failed):
+            print(f"WARNING: Session writer is backed up ({self.session_writer.stats()}); final results not saved.")
+
+    @property
+    def game_session_id(self):
+        """ID of this game's session row once the initial save has committed, else None."""
+        return self._saved_session['id']
+
+    @property
+    def session_save_stats(self):
+        """Rows, statements and seconds spent on the committed initial save, or None."""
+        return self._saved_session['stats']
+
+    def userExit(self):
+        """Writes out queued session data before Panda3D exits."""
+        if self.session_writer:
+            print(f"DEBUG: Flushing session writes before exit: {self.session_writer.stats()}")
+            self.session_writer.close()
+        super().userExit()
 
     def create_bridge_and_platforms(self):
         """
         Generates the starting platform, bridge tiles, and end platform.
-        Also records the actual safe/broken layout for database storage.
+        The safe/broken layout itself comes from the engine.
         """
-        # Create start platform
-        self.create_platform(LPoint3(0, self.bridge_start_y - self.tile_width * 1.5, 0), self.tile_width * 3, self.tile_width * 2)
-
-        self.actual_bridge_layout = [] # Reset for each new bridge generation
-        for row in range(self.bridge_length):
-            row_tiles = []
-            safe_column = random.randint(0, 1) # 0 for left, 1 for right
-            
-            # Record the safe column for this row in the actual_bridge_layout
-            row_config = [False, False] # [is_left_safe, is_right_safe]
-            row_config[safe_column] = True
-            self.actual_bridge_layout.append(row_config)
-
-            for col in range(2): # Two columns for the bridge
-                x_pos = (col - 0.5) * (self.tile_width + self.tile_gap)
-                y_pos = self.bridge_start_y + row * (self.tile_width + self.tile_gap)
-                is_safe = (col == safe_column)
-                tile_color = VBase4(0.7, 0.7, 0.9, 0.6) # Default glass color
-                
-                tile_np = self.create_tile(LPoint3(x_pos, y_pos, 0), self.tile_width, self.tile_width, self.tile_depth, tile_color)
-                row_tiles.append({'np': tile_np, 'is_safe': is_safe, 'x': x_pos, 'y': y_pos})
-            self.bridge_tiles.append(row_tiles)
+        # Create start platform (at least as wide as the bridge)
+        platform_width = max(self.tile_width * 3, self.bridge_width())
+        self.create_platform(LPoint3(0, self.bridge_start_y - self.tile_width * 1.5, 0), platform_width, self.tile_width * 2)
+
+        # Every tile shares one static mesh; only the rows near the camera target get a slot in the renderer
+        columns = self.actual_bridge_layout.columns
+        window_rows = min(self.tile_window_rows, self.bridge_length)
+        renderer = make_tile_renderer(self.render, self.win, self.animations, window_rows * columns, self.tile_width, self.tile_width, self.tile_depth)
+        self.tile_pool = TilePool(renderer, self.bridge_length, columns, window_rows, self.tile_rows_behind,
+                                  self.tile_position, self.tile_look)
+        self.tile_pool.focus(0)
 
         # Create end platform
         self.end_platform_y = self.bridge_start_y + self.bridge_length * (self.tile_width + self.tile_gap) + self.tile_width * 1.5
-        self.create_platform(LPoint3(0, self.end_platform_y, 0), self.tile_width * 3, self.tile_width * 2)
-
-    def create_tile(self, pos, width, length, depth, color=VBase4(0.7, 0.7, 0.9, 0.6)):
+        self.create_platform(LPoint3(0, self.end_platform_y, 0), platform_width, self.tile_width * 2)
+
+    def bridge_width(self):
+        """Width of one row of panes, gaps included."""
+        columns = self.actual_bridge_layout.columns
+        return columns * self.tile_width + (columns - 1) * self.tile_gap
+
+    def column_choice_hint(self):
+        """Key help for choosing a pane, e.g. "1 for Left, 2 for Right" on the classic bridge."""
+        columns = self.engine.columns
+        if columns == 2:
+            return "1 for Left, 2 for Right"
+        return f"1-{COLUMN_KEYS[min(columns, len(COLUMN_KEYS)) - 1]} for panes left to right"
+
+    def tile_position(self, row, col):
+        """Returns the (x, y) centre of the tile at (row, col)."""
+        x_pos = (col - (self.actual_bridge_layout.columns - 1) / 2) * (self.tile_width + self.tile_gap)
+        y_pos = self.bridge_start_y + row * (self.tile_width + self.tile_gap)
+        return x_pos, y_pos
+
+    def tile_index(self, row, col):
+        """Index of the tile at (row, col) in the layout bits."""
+        return row * self.actual_bridge_layout.columns + col
+
+    def tile_look(self, row, col):
         """
-        Creates a single tile model for the bridge.
-        The tile's bottom surface will be at pos.z.
+        Returns (color, dropped) for the tile at (row, col) from the engine state.
+        Used by the tile pool when a row scrolls back into view.
         """
-        format = GeomVertexFormat.getV3n3cpt2()
-        vdata = GeomVertexData('tile', format, Geom.UHDynamic)
-        vertex = GeomVertexWriter(vdata, 'vertex')
-        normal = GeomVertexWriter(vdata, 'normal')
-        color_writer = GeomVertexWriter(vdata, 'color')
-        texcoord = GeomVertexWriter(vdata, 'texcoord')
-
-        half_width, half_length = width / 2, length / 2
-
-        # Define vertices for a cuboid, with Z from 0 to depth (bottom at 0)
-        vertices = [
-            # Front face (Y-negative)
-            (-half_width, -half_length, 0), (half_width, -half_length, 0), (half_width, -half_length, depth), (-half_width, -half_length, depth),
-            # Back face (along +Y)
-            (half_width, half_length, 0), (-half_width, half_length, 0), (-half_width, half_length, depth), (half_width, half_length, depth),
-            # Right face (along +X)
-            (half_width, -half_length, 0), (half_width, half_length, 0), (half_width, half_length, depth), (half_width, -half_length, depth),
-            # Left face (along -X)
-            (-half_width, half_length, 0), (-half_width, -half_length, 0), (-half_width, -half_length, depth), (-half_width, half_length, depth),
-            # Top face (along +Z)
-            (-half_width, -half_length, depth), (half_width, -half_length, depth), (half_width, half_length, depth), (-half_width, half_length, depth),
-            # Bottom face (along -Z)
-            (-half_width, half_length, 0), (half_width, half_length, 0), (half_width, -half_length, 0), (-half_width, -half_length, 0)
-        ]
-        
-        normals = [
-            (0,-1,0), (0,-1,0), (0,-1,0), (0,-1,0), # Front
-            (0,1,0), (0,1,0), (0,1,0), (0,1,0),     # Back
-            (1,0,0), (1,0,0), (1,0,0), (1,0,0),     # Right
-            (-1,0,0), (-1,0,0), (-1,0,0), (-1,0,0), # Left
-            (0,0,1), (0,0,1), (0,0,1), (0,0,1),     # Top
-            (0,0,-1), (0,0,-1), (0,0,-1), (0,0,-1) # Bottom
-        ]
-
-        texcoords = [
-            (0,0), (1,0), (1,1), (0,1),
-            (0,0), (1,0), (1,1), (0,1),
-            (0,0), (1,0), (1,1), (0,1),
-            (0,0), (1,0), (1,1), (0,1),
-            (0,0), (1,0), (1,1), (0,1),
-            (0,0), (1,0), (1,1), (0,1)
-        ]
-        
-        for i in range(len(vertices)):
-            vertex.addData3f(*vertices[i])
-            normal.addData3f(*normals[i])
-            color_writer.addData4f(color)
-            texcoord.addData2f(*texcoords[i])
-
-        tris = GeomTriangles(Geom.UHDynamic)
-        indices = [
-            0,1,2, 0,2,3,   # Front
-            4,5,6, 4,6,7,   # Back
-            8,9,10, 8,10,11, # Right
-            12,13,14, 12,14,15, # Left
-            16,17,18, 16,18,19, # Top
-            20,21,22, 20,22,23  # Bottom
-        ]
-        for i in range(0, len(indices), 3):
-            tris.addVertices(indices[i], indices[i+1], indices[i+2])
-        
-        geom = Geom(vdata)
-        geom.addPrimitive(tris)
-        node = GeomNode('tile_model')
-        node.addGeom(geom)
-        np = NodePath(node)
-        np.setPos(pos)
-        np.reparentTo(self.render)
-
-        material = Material()
-        material.setDiffuse(color)
-        material.setAmbient(VBase4(0.5, 0.5, 0.5, 1))
-        material.setSpecular(VBase4(1, 1, 1, 1))
-        material.setShininess(96.0)
-        np.setMaterial(material)
-        np.setTransparency(TransparencyAttrib.M_alpha)
-        return np
+        tile = self.tile_index(row, col)
+        if self.engine.revealed_tiles.get(tile):
+            if self.engine.is_safe(row, col):
+                return TILE_SAFE_COLOR, False
+            return TILE_BROKEN_COLOR, True
+        if self.bridge_collapsed and not self.engine.kept_tiles.get(tile):
+            return TILE_BROKEN_COLOR, True
+        return TILE_GLASS_COLOR, False
+
+    def drop_tile(self, row, col):
+        """
+        Makes the tile at (row, col) look broken, animates it falling and shatters it.
+        Tiles outside the materialized window only change state.
+        """
+        if not self.tile_pool.is_materialized(row):
+            return
+        self.tile_pool.drop(row, col)
+        x, y = self.tile_position(row, col)
+        self.shards.shatter(x, y, self.tile_depth)
 
     def create_platform(self, pos, width, length):
         """
@@ -1187,7 +1052,7 @@ class GlassBridgeScene(ShowBase):
     def setup_characters(self):
         """
         Creates player and staff objects and positions them.
-        Initializes the active_players_queue.
+        Player renderers wrap the engine's players, in the same turn order.
         """
         player_colors = [
             VBase4(1.0, 0.8, 0.0, 1.0), # Yellow
@@ -1200,33 +1065,29 @@ class GlassBridgeScene(ShowBase):
         ]
         
         # --- Setup Players ---
-        player_names_for_game = self.selected_players_names if self.selected_players_names else [f"Player {i+1}" for i in range(7)] # Default to 7 players
-        self.num_players = len(player_names_for_game) # Update num_players based on selection or default to 7
-
-        player_start_y = self.bridge_start_y - (self.tile_width * 1.5)
-        player_z_on_platform = self.tile_depth # Players stand on top of the platform
-
-        # Calculate player starting positions to spread them out on the platform
-        num_players_per_row = 4 # Max players per row on the starting platform
-        player_spacing_x = self.tile_width / (num_players_per_row + 1)
-        player_spacing_y = self.tile_width / 2
-
-        for i, player_name in enumerate(player_names_for_game):
-            row_idx = i // num_players_per_row
-            col_idx = i % num_players_per_row
-            
-            x_offset = (col_idx - (num_players_per_row - 1) / 2) * player_spacing_x
-            y_offset = row_idx * player_spacing_y 
+        self.num_players = len(self.engine.players) # Selected players, or the default 7
 
+        for i, player_state in enumerate(self.engine.players):
             body_color = player_colors[i % len(player_colors)] # Cycle through the defined colors
             head_color = body_color 
 
-            start_pos = LPoint3(x_offset, player_start_y + y_offset, player_z_on_platform)
+            start_pos = self._player_start_pos(i)
             
-            player = Player(player_name, start_pos, self, head_color=head_color, body_color=body_color)
+            player = Player(player_state, start_pos, self, head_color=head_color, body_color=body_color)
             self.players.append(player)
-            self.active_players_queue.append(player) # All players are active initially (added to deque)
-            print(f"DEBUG (setup_characters): Player {player.name} added to active_players_queue.")
+            print(f"DEBUG (setup_characters): Player {player.name} placed on the starting platform.")
+
+        # Waiting players are drawn together in one instanced draw call; each one gets
+        # its own node back when its turn starts (see _on_turn_started)
+        self.crowd = make_crowd_renderer(self.render, self.win, CHARACTER_MODELS.prototype_geom(PLAYER_SHAPE),
+                                         len(self.players), scale=0.8,
+                                         far_geom=CHARACTER_MODELS.prototype_geom(PLAYER_SHAPE, level=1),
+                                         center=self._player_start_pos(0))
+        if self.crowd is not None:
+            for i, player in enumerate(self.players):
+                self.crowd.add(i, player.np.getPos(), player.original_color)
+                player.np.detachNode()
+            print(f"DEBUG (setup_characters): {len(self.crowd)} waiting players drawn as one instanced crowd.")
 
         # --- Setup Staff ---
         staff_colors = {
@@ -1236,7 +1097,8 @@ class GlassBridgeScene(ShowBase):
             "Circle Guard": VBase4(0.0, 0.0, 0.7, 1.0)  # Blue for Circle Guard
         }
         
-        guard_patrol_x_offsets = [-self.tile_width * 2, self.tile_width * 2] # Left and Right sides of bridge
+        patrol_x = max(self.tile_width * 2, self.bridge_width() / 2 + self.tile_width / 2)
+        guard_patrol_x_offsets = [-patrol_x, patrol_x] # Left and Right sides of bridge
         guard_index = 0 # To alternate guards between left and right patrol paths
 
         for staff_name in self.selected_staff_names:
@@ -1261,285 +1123,299 @@ class GlassBridgeScene(ShowBase):
                 print(f"WARNING: Unrecognized staff member '{staff_name}'. Skipping.")
 
 
-    def display_player_status_ui(self):
+    def _player_start_pos(self, player_index):
         """
-        Creates OnscreenText elements for each player's status.
-        Adjusts Y offset for more players.
+        Returns the spot on the starting platform for the player at player_index.
+        Players are spread out in rows of num_players_per_row.
         """
-        y_offset = 0.7 # Start Y for status text
-        if self.num_players > 5:
-            y_offset = 0.8 - (self.num_players * 0.03) 
+        player_start_y = self.bridge_start_y - (self.tile_width * 1.5)
+        player_z_on_platform = self.tile_depth # Players stand on top of the platform
+        num_players_per_row = 4 # Max players per row on the starting platform
+        player_spacing_x = self.tile_width / (num_players_per_row + 1)
+        player_spacing_y = self.tile_width / 2
 
-        for player in self.players:
-            text_node = OnscreenText(text=f"{player.name}: Ready", pos=(-1.2, y_offset), scale=0.04, fg=(1,1,1,1), align=TextNode.ALeft, mayChange=True)
-            self.player_status_text[player.name] = text_node
-            y_offset -= 0.05 # Smaller step for more players
+        row_idx = player_index // num_players_per_row
+        col_idx = player_index % num_players_per_row
+        x_offset = (col_idx - (num_players_per_row - 1) / 2) * player_spacing_x
+        y_offset = row_idx * player_spacing_y
+        return LPoint3(x_offset, player_start_y + y_offset, player_z_on_platform)
 
     def update_player_info_display(self):
         """
         Updates the UI text showing the current player and instructions.
         """
         if self.current_player and not self.current_player.fallen and not self.current_player.crossed:
-            self.player_info_text.setText(f"Current Player: {self.current_player.name}")
-            self.instructions_text.setText("Press '1' for Left, '2' for Right")
+            self.hud.set_line('player_info', f"Current Player: {self.current_player.name}")
+            self.hud.set_line('instructions', f"Press {self.column_choice_hint()}")
         elif self.game_over_flag: # Check this flag to ensure game is truly over
-            self.player_info_text.setText("Game Over!")
-            self.instructions_text.setText("Press ESC to exit.")
+            self.hud.set_line('player_info', "Game Over!")
+            self.hud.set_line('instructions', "Press ESC to exit.")
         else: # Likely a transition state or all players finished but game_over hasn't been called yet
-            self.player_info_text.setText("Waiting for next turn...")
-            self.instructions_text.setText("")
+            self.hud.set_line('player_info', "Waiting for next turn...")
+            self.hud.set_line('instructions', "")
 
     def highlight_current_player(self):
         """
         Highlights the current player and resets the highlight for others.
         """
-        # Stop any existing pulse interval before resetting colors/scales
-        if self.pulse_interval and self.pulse_interval.isPlaying():
+        # Stop any existing pulse before resetting colors/scales
+        if self.pulse_interval is not None:
             self.pulse_interval.finish()
             self.pulse_interval = None
 
-        # Reset color and scale of all players to their original state
-        for player in self.players:
-            player.np.setColorScale(1, 1, 1, 1) # Reset color scale to normal (no tint)
-            player.np.setScale(0.8) # Reset scale
+        # Reset color and scale of the previously highlighted player (nobody else is tinted)
+        if self.highlighted_player is not None:
+            self.highlighted_player.np.setColorScale(1, 1, 1, 1) # Reset color scale to normal (no tint)
+            self.highlighted_player.np.setScale(0.8) # Reset scale
+            self.highlighted_player = None
 
         # Apply highlight to the current player
         if self.current_player and not self.current_player.fallen and not self.current_player.crossed:
             # Apply a yellowish tint for highlight
             self.current_player.np.setColorScale(1.5, 1.5, 0.5, 1) 
-            # Simple pulse animation: grow from 0.8 to 0.9 and shrink back to 0.8
+            self.highlighted_player = self.current_player
+            # Simple pulse animation: grow from 0.8 to 0.9 and shrink back to 0.8. Scale intervals
+            # run in C++ from the interval manager, so a waiting player costs no Python task per frame
             self.pulse_interval = Sequence(
-                self.current_player.np.scaleInterval(0.2, 0.9), # Grow slightly to 0.9
+                self.current_player.np.scaleInterval(0.2, 0.9, startScale=0.8), # Grow slightly to 0.9
                 self.current_player.np.scaleInterval(0.2, 0.8) # Shrink back to 0.8
             )
             self.pulse_interval.loop() # Use loop for continuous pulsing
 
+    # --- Engine state views ---
+    @property
+    def current_player(self):
+        """The Player renderer whose turn it currently is, or None."""
+        state = self.engine.current_player
+        return self.players[state.index] if state is not None else None
+
+    @property
+    def time_left(self):
+        return self.engine.time_left
+
+    @property
+    def timer_active(self):
+        return self.engine.timer_active
+
+    @property
+    def game_over_flag(self):
+        return self.engine.game_over_flag
+
     def attempt_move(self, chosen_col):
         """
         Handles player input for choosing a tile to move to.
-        Only the current active player can make a choice.
+        The engine validates the choice; rejected moves come back as EVENT_INVALID_MOVE.
         """
-        if self.game_over_flag: # If game is over, ignore input
+        if self.turn_state == TURN_OVER: # If game is over, ignore input
             print("DEBUG: Game is over. Ignoring input.")
             return
+        self._sync_timer()
+        self.engine.attempt_move(chosen_col)
+
+    def resolve_move(self):
+        """Called when a step animation completes: the engine decides whether the tile holds."""
+        self._sync_timer()
+        self.engine.resolve_move()
+
+    # --- Turn state machine and scheduling ---
+    def _set_turn_state(self, state):
+        """Moves the turn state machine to state; leaving the game cancels every scheduled wake-up."""
+        if state == self.turn_state:
+            return
+        print(f"DEBUG: Turn state {self.turn_state} -> {state}")
+        self.turn_state = state
+        if state == TURN_OVER:
+            for task_name in ("game_timeout", "hud_timer", "bot_move", "update_camera"):
+                self.taskMgr.remove(task_name)
 
-        if not self.current_player or not self.current_player.turn_active:
+    def _sync_timer(self):
+        """
+        Ticks the engine's timer up to the current frame time. The timer is only
+        brought up to date when something reads or changes the game state.
+        """
+        now = globalClock.getFrameTime() # type: ignore
+        if self.timer_active:
+            self.engine.tick(now - self._timer_synced_at)
+        self._timer_synced_at = now
+
+    def _on_timeout_due(self, task):
+        """One-shot task scheduled for the instant the time limit runs out."""
+        self._sync_timer()
+        if not self.game_over_flag: # Frame times are floats; finish off whatever rounding left
+            self.engine.tick(self.time_left)
+        return task.done
+
+    def _update_timer_text(self, task):
+        """HUD timer task, woken once per second while the timer runs."""
+        self._sync_timer()
+        if self.game_over_flag:
+            return task.done
+        self.hud.set_line('timer', f"Time Left: {self.time_left:.0f}") # Display as whole seconds
+        return task.again
+
+    def _wake_camera(self):
+        """Starts the camera task if it is asleep; it stops itself once the camera has caught up."""
+        if self.turn_state != TURN_OVER and not self.taskMgr.hasTaskNamed("update_camera"):
+            self.taskMgr.add(self.update_camera, "update_camera")
+
+    # --- Engine event handlers (rendering only) ---
+    def _on_timer_started(self):
+        print("DEBUG: Global game timer activated!")
+        self._timer_synced_at = globalClock.getFrameTime() # type: ignore
+        self.taskMgr.doMethodLater(self.time_left, self._on_timeout_due, "game_timeout")
+        self.taskMgr.doMethodLater(HUD_TIMER_INTERVAL, self._update_timer_text, "hud_timer")
+
+    def _on_move_started(self, player_state, row, col):
+        player = self.players[player_state.index]
+        print(f"DEBUG: {player.name} attempting to move to row {row}, col {col}")
+        self.hud.set_line('game_status', f"{player.name}'s turn: Moving...")
+        self._set_turn_state(TURN_MOVING)
+        self.tile_pool.focus(row) # Keep the rows around the player materialized
+        player.move_to_tile(row, col)
+        self._wake_camera()
+
+    def _on_invalid_move(self, player_state, reason):
+        if reason == "not_your_turn":
             print("DEBUG: Not current player's turn or no active player. Ignoring input.")
-            self.game_status_text.setText("Not your turn or game ended!")
-            return
-        
-        if self.current_player.fallen or self.current_player.crossed:
+            self.hud.set_line('game_status', "Not your turn or game ended!")
+        elif reason == "already_finished":
             print("DEBUG: Current player already finished. Ignoring input.")
-            self.game_status_text.setText(f"{self.current_player.name} already finished!")
-            return
-
-        next_row = self.current_player.current_tile_row + 1
-
-        if next_row >= self.bridge_length:
-            print(f"DEBUG: {self.current_player.name} is at the end of the bridge or crossed. No more moves needed.")
-            self.game_status_text.setText(f"{self.current_player.name} already at the end!")
-            return
-
-        # Check if the chosen tile exists and is valid
-        if 0 <= next_row < self.bridge_length and 0 <= chosen_col < 2:
-            # In Squid Game rules, we don't check if the tile is "occupied" by another player,
-            # only if it's a valid tile to step on based on the game's rules.
-            # The "observation" comes from knowing which tiles broke.
-            
-            print(f"DEBUG: {self.current_player.name} attempting to move to row {next_row}, col {chosen_col}")
-            self.game_status_text.setText(f"{self.current_player.name}'s turn: Moving...")
-            self.current_player.turn_active = False # Deactivate turn while move is in progress
-            self.current_player.move_to_tile(next_row, chosen_col)
+            self.hud.set_line('game_status', f"{player_state.name} already finished!")
+        elif reason == "at_end":
+            print(f"DEBUG: {player_state.name} is at the end of the bridge or crossed. No more moves needed.")
+            self.hud.set_line('game_status', f"{player_state.name} already at the end!")
         else:
-            print("Invalid move. Please choose '1' for Left or '2' for Right for the current tile.")
-            self.game_status_text.setText("Invalid move! Try again.")
-            self.current_player.turn_active = True # Keep turn active for invalid input
-
-    def next_player_turn(self):
+            print(f"Invalid move. Please press {self.column_choice_hint()} for the current tile.")
+            self.hud.set_line('game_status', "Invalid move! Try again.")
+
+    def _on_tile_safe(self, player_state, row, col):
+        print(f"DEBUG: {player_state.name} landed safely on tile ({row}, {col}).")
+
+        # Change color of the safe tile to indicate it's proven (light green)
+        self.tile_pool.set_color(row, col, TILE_SAFE_COLOR)
+
+        self.hud.set_player_status(player_state.index, f"{player_state.name}: On tile {row+1}/{self.bridge_length}")
+        if row < self.bridge_length - 1:
+            # Player landed safely and has not crossed, their turn continues
+            print(f"DEBUG: {player_state.name}'s turn continues. Choose next tile ({self.column_choice_hint()})")
+            self.hud.set_line('game_status', f"{player_state.name}: Choose next tile ({self.column_choice_hint()})")
+            self._set_turn_state(TURN_CHOOSING)
+            self._request_bot_move()
+
+    def _on_player_crossed(self, player_state):
+        player = self.players[player_state.index]
+        print(f"DEBUG: {player.name} has crossed the bridge!")
+        self.hud.set_player_status(player_state.index, f"{player.name}: Crossed!")
+        # Move player to a safe "crossed" area off the bridge
+        # Offset slightly to prevent stacking at the end if multiple cross
+        player.np.setPos(player.np.getPos().getX() + (player_state.index - (len(self.players) - 1) / 2) * 0.5, 
+                         player.np.getPos().getY() + 2, self.tile_depth)
+
+    def _on_player_fell(self, player_state, row, col):
+        player = self.players[player_state.index]
+        print(f"DEBUG: {player.name} landed on a broken tile ({row}, {col}).")
+        player._fall(broken_tile=(row, col))
+        self.hud.set_player_status(player_state.index, f"{player.name}: Fallen!")
+
+    def _on_turn_started(self, player_state):
         """
-        Advances the game to the next active player's turn for making a choice.
-        This is called when the current player falls or crosses.
+        Shows the next active player's turn.
+        Called by the engine when the game starts and whenever the current player falls or crosses.
         """
-        if self.game_over_flag:
-            print("DEBUG (next_player_turn): Game is over. Not processing next turn.")
-            return
-
-        print(f"DEBUG (next_player_turn): Called. Current player before change: {self.current_player.name if self.current_player else 'None'}. Active queue size: {len(self.active_players_queue)}")
-
-        # Ensure previous player's turn is properly ended and highlight removed
-        if self.current_player:
-            self.current_player.turn_active = False
-            self.current_player.np.setColorScale(1, 1, 1, 1) # Reset color scale to normal
-            self.current_player.np.setScale(0.8)
-
-            # Remove the current player (who just fell or crossed) from the active queue
-            # Only remove if they are still at the front of the queue (meaning their turn just finished)
-            if self.active_players_queue and self.active_players_queue[0] == self.current_player:
-                removed_player = self.active_players_queue.popleft()
-                print(f"DEBUG (next_player_turn): Removed {removed_player.name} from active queue.")
-
-        # Re-evaluate active players for game over condition
-        if not self.active_players_queue:
-            self.game_over()
-            return
-
-        # The new current player is now at the front of the deque
-        self.current_player = self.active_players_queue[0]
-        self.current_player.turn_active = True
+        player = self.players[player_state.index]
+        print(f"DEBUG: Turn started for {player.name}. Active queue size: {len(self.engine.active_players_queue)}")
+        if self.crowd is not None and self.crowd.remove(player_state.index):
+            player.np.reparentTo(self.render) # Leaves the crowd to be animated on its own
         
         # ONLY reset player's *visual* position to the start platform if they haven't stepped on the bridge yet (current_tile_row == -1)
         # This ensures players who haven't started yet appear at the start,
         # but players who are midway through stay where they are.
-        if self.current_player.current_tile_row == -1: # Only reset visual position for players who haven't started
-            player_start_y = self.bridge_start_y - (self.tile_width * 1.5)
-            player_z_on_platform = self.tile_depth
-            num_players_per_row = 4
-            player_spacing_x = self.tile_width / (num_players_per_row + 1)
-            player_spacing_y = self.tile_width / 2
-            
-            player_idx_in_all_players = self.players.index(self.current_player)
-            row_idx = player_idx_in_all_players // num_players_per_row
-            col_idx = player_idx_in_all_players % num_players_per_row
-            x_offset = (col_idx - (num_players_per_row - 1) / 2) * player_spacing_x
-            y_offset = row_idx * player_spacing_y 
-            start_pos = LPoint3(x_offset, player_start_y + y_offset, player_z_on_platform)
-            self.current_player.np.setPos(start_pos)
-            print(f"DEBUG: {self.current_player.name} (new turn) reset to start platform position ({start_pos.getX():.2f}, {start_pos.getY():.2f}).")
+        if player.current_tile_row == -1: # Only reset visual position for players who haven't started
+            start_pos = self._player_start_pos(player_state.index)
+            player.np.setPos(start_pos)
+            print(f"DEBUG: {player.name} (new turn) reset to start platform position ({start_pos.getX():.2f}, {start_pos.getY():.2f}).")
         else:
-            print(f"DEBUG: {self.current_player.name} (new turn) is already on tile ({self.current_player.current_tile_row}, {self.current_player.current_tile_col}). No position reset.")
-
+            print(f"DEBUG: {player.name} (new turn) is already on tile ({player.current_tile_row}, {player.current_tile_col}). No position reset.")
 
-        self.camera_follow_player = self.current_player.np
+        self.camera_follow_player = player.np
+        self._set_turn_state(TURN_CHOOSING)
+        self.tile_pool.focus(max(player.current_tile_row, 0))
+        self.hud.scroll_to(player_state.index) # Keep the current player's roster row on screen
+        self._wake_camera()
         self.update_player_info_display()
         self.highlight_current_player() # Highlight the new current player
-        self.game_status_text.setText(f"It's {self.current_player.name}'s turn! Choose next tile (1 for Left, 2 for Right).")
+        self.hud.set_line('game_status', f"It's {player.name}'s turn! Choose next tile ({self.column_choice_hint()}).")
+        self._request_bot_move()
 
-    def handle_time_up(self):
+    def _request_bot_move(self):
         """
-        Called when the game timer runs out.
-        All remaining active players are considered to have timed out.
-        All unrevealed bridge tiles will fall.
+        Schedules the bot's choice for the next frame when a bot is playing.
         """
-        if self.game_over_flag: # Prevent multiple calls to game_over
-            return
+        if self.bot_policy is not None and not self.game_over_flag:
+            self.taskMgr.doMethodLater(0, self._bot_move, "bot_move")
 
+    def _bot_move(self, task):
+        """
+        Lets the bot policy choose the current player's next tile.
+        """
+        player_state = self.engine.current_player
+        if self.game_over_flag or player_state is None or not player_state.turn_active:
+            return task.done
+        chosen_col = self.bot_policy.choose(self.engine.fill_snapshot(self.bot_snapshot))
+        self.attempt_move(chosen_col)
+        return task.done
+
+    def _on_player_timed_out(self, player_state):
+        player = self.players[player_state.index]
+        self.hud.set_player_status(player_state.index, f"{player.name}: Timed Out!")
+        if self.crowd is not None:
+            self.crowd.remove(player_state.index)
+        if player.np: # Detach their model if it's still there
+            player.np.detachNode()
+
+    def _on_time_up(self, falling_tiles):
+        """
+        Called when the game timer runs out.
+        All unrevealed bridge tiles fall; the engine has already eliminated the remaining players.
+        """
         print("DEBUG: Time has run out! All remaining players are eliminated and bridge breaks.")
-        self.game_status_text.setText("TIME OUT! Bridge breaks and players eliminated!")
-        self.timer_active = False # Stop the timer
-
-        # Mark all active players as fallen (timed out)
-        players_timed_out = list(self.active_players_queue) # Create a copy to iterate
-        for player in players_timed_out:
-            if not player.fallen and not player.crossed:
-                player.fallen = True
-                player.is_on_bridge = False
-                player.turn_active = False
-                self.player_status_text[player.name].setText(f"{player.name}: Timed Out!")
-                if player.np: # Detach their model if it's still there
-                    player.np.detachNode()
-        
-        self.active_players_queue.clear() # Clear the queue as all are out
-
-        # Make all unrevealed bridge tiles fall
-        for r_idx, row_tiles in enumerate(self.bridge_tiles):
-            for c_idx, tile_info in enumerate(row_tiles):
-                # Check if this tile has NOT been revealed as safe or broken yet
-                if r_idx not in self.revealed_safe_path and r_idx not in self.revealed_broken_path:
-                    # Animate the tile falling
-                    fall_tile_interval = tile_info['np'].posInterval(0.5, LPoint3(tile_info['x'], tile_info['y'], -5),
-                                                                    startPos=tile_info['np'].getPos())
-                    # Also make it look broken/darker and transparent as it falls
-                    tile_info['np'].setTransparency(TransparencyAttrib.M_alpha)
-                    tile_info['np'].setColor(Vec4(0.2, 0.2, 0.2, 0.3)) 
-                    fall_tile_interval.start()
-                elif r_idx in self.revealed_safe_path and self.revealed_safe_path[r_idx] != c_idx:
-                    # If the other tile in this row was safe, but this one wasn't revealed, it must be the broken one
-                    # This handles cases where a player stepped on the safe one, leaving the other unrevealed.
-                    fall_tile_interval = tile_info['np'].posInterval(0.5, LPoint3(tile_info['x'], tile_info['y'], -5),
-                                                                    startPos=tile_info['np'].getPos())
-                    tile_info['np'].setTransparency(TransparencyAttrib.M_alpha)
-                    tile_info['np'].setColor(Vec4(0.2, 0.2, 0.2, 0.3)) 
-                    fall_tile_interval.start()
-
-
-        self.game_over(time_limit_reached_flag=True) # Call game over to finalize state, indicating time limit was reached
-
-    def game_over(self, time_limit_reached_flag=False):
+        self.hud.set_line('game_status', "TIME OUT! Bridge breaks and players eliminated!")
+
+        self.bridge_collapsed = True # Rows streamed in from now on show their fallen tiles
+        for r_idx, c_idx in falling_tiles:
+            self.drop_tile(r_idx, c_idx) # Also makes it look broken/darker and transparent as it falls
+
+    def _on_game_over(self, winners, time_limit_reached_flag):
         """
         Ends the game, displays results, and disables further input.
         Also updates the database with final game results.
         """
-        if self.game_over_flag:
-            return # Already handled game over
-
         print("DEBUG: All players have finished their attempt (either fallen or crossed). Game Over!")
-        self.game_over_flag = True
-        self.timer_active = False # Ensure timer stops
+        self._set_turn_state(TURN_OVER)
+        self.hud.set_line('timer', f"Time Left: 0") # Ensure timer shows 0 at end
+        self.highlight_current_player() # No current player any more: clears the last highlight
 
-        self.game_status_text.setText("Game Over!")
-        winners = [player.name for player in self.players if player.crossed]
+        self.hud.set_line('game_status', "Game Over!")
         if winners:
-            self.player_info_text.setText(f"Winners: {', '.join(winners)}")
+            self.hud.set_line('player_info', f"Winners: {', '.join(winners)}")
         else:
-            self.player_info_text.setText("No one crossed the bridge.")
-        self.instructions_text.setText("Press ESC to exit.")
+            self.hud.set_line('player_info', "No one crossed the bridge.")
+        self.hud.set_line('instructions', "Press ESC to exit.")
         self.ignore_all() # Ignore all previous inputs
         self.accept("escape", self.userExit) # Re-enable ESC to exit
-        self.current_player = None # Clear current player as game is over
         self.camera_follow_player = None # Stop camera following a specific player
 
+        print(f"DEBUG: Turn log recorded {len(self.turn_log)} events ({len(self.turn_log.to_bytes())} bytes).")
+
         # --- Save final game results to database ---
         self._update_game_session_results(time_limit_reached_flag)
         # We no longer close the connection here, it's closed by on_closing
         print("DEBUG: Database connection will be closed on application exit.")
 
-
-    def update_game_state(self, task):
-        """
-        Main game loop task to check for game over condition and manage turn progression.
-        """
-        if self.game_over_flag:
-            return task.done # Stop this task if game is over
-
-        # If no active players left, game is over.
-        if not self.active_players_queue and not self.game_over_flag: # Added game_over_flag check
-            self.game_over()
-            return task.done
-        
-        # This task loop mainly ensures that if a player somehow becomes inactive without
-        # next_player_turn being called, it will be triggered.
-        if self.current_player is None or (self.current_player.fallen or self.current_player.crossed):
-            self.next_player_turn()
-        # If the current player is active and waiting for input, do nothing in this task loop.
-        # Their turn will progress via attempt_move -> check_tile.
-        elif self.current_player and self.current_player.turn_active:
-            pass # Current player is active, waiting for input.
-
-        return task.cont
-
-    def update_timer(self, task):
-        """
-        Updates the global game timer.
-        """
-        if self.game_over_flag:
-            self.timer_text.setText(f"Time Left: 0") # Ensure timer shows 0 at end
-            return task.done # Stop the timer task
-
-        if self.timer_active:
-            self.time_left -= globalClock.getDt() # type: ignore
-            if self.time_left <= 0:
-                self.time_left = 0
-                self.timer_text.setText(f"Time Left: 0")
-                self.handle_time_up()
-                return task.done # Stop the timer task
-
-            self.timer_text.setText(f"Time Left: {self.time_left:.0f}") # Display as whole seconds
-        
-        return task.cont
-
     def update_camera(self, task):
         """
         Smoothly moves the camera to follow the current lead player.
+        Runs only while woken by _wake_camera and stops once the camera has settled.
         """
         target_follow_node = None
         
@@ -1549,15 +1425,19 @@ class GlassBridgeScene(ShowBase):
         
         self.camera_follow_player = target_follow_node # Update the camera_follow_player reference
 
-        if self.camera_follow_player:
-            # Adjust camera position relative to the target player
-            target_pos = self.camera_follow_player.getPos() + LVector3(0, -15, 10) 
-            current_pos = self.camera.getPos()
-            
-            # Smooth interpolation for camera movement
-            new_pos = current_pos + (target_pos - current_pos) * 0.05
-            self.camera.setPos(new_pos)
-            self.camera.lookAt(self.camera_follow_player.getPos() + LVector3(0, 0, 0.5)) 
+        if not self.camera_follow_player:
+            return task.done # Nobody to follow (game over)
+
+        # Adjust camera position relative to the target player
+        target_pos = self.camera_follow_player.getPos() + LVector3(0, -15, 10) 
+        current_pos = self.camera.getPos()
+        
+        # Smooth interpolation for camera movement
+        new_pos = current_pos + (target_pos - current_pos) * 0.05
+        self.camera.setPos(new_pos)
+        self.camera.lookAt(self.camera_follow_player.getPos() + LVector3(0, 0, 0.5)) 
+        if self.turn_state != TURN_MOVING and (target_pos - new_pos).length() < CAMERA_SETTLE_DISTANCE:
+            return task.done # Caught up with a player who is standing still; sleep until the next event
         return task.cont
 
 
@@ -1565,38 +1445,60 @@ class GlassBridgeScene(ShowBase):
 def on_closing():
     """
     Handles the closing of the Tkinter window.
-    Closes the database connection.
+    Writes out queued session data, then closes the pooled database connections.
     """
-    global db_connection, db_cursor
-    if db_cursor:
-        db_cursor.close()
-        print("DEBUG: Database cursor closed.")
-    if db_connection and db_connection.is_connected():
-        db_connection.close()
-        print("DEBUG: Database connection closed on application exit.")
+    global database, session_writer
+    if session_writer:
+        session_writer.close()
+        session_writer = None
+    if database:
+        print(f"DEBUG: Database usage: {database.stats()}")
+        database.close()
+        database = None
+        print("DEBUG: Database connections closed on application exit.")
     root.destroy()
 
 
 if __name__ == '__main__':
-    root = Tk()
-    root.title("Squid Game - Glass Bridge")
-    root.state('zoomed') # Maximize the window
-    root.resizable(True, True)
+    import argparse
+    parser = argparse.ArgumentParser(description="Squid Game - Glass Bridge")
+    parser.add_argument("--bot", choices=sorted(POLICIES), help="Skip the menus and let a bot policy play every turn (unattended soak runs)")
+    parser.add_argument("--players", type=int, default=7, help="Number of players when running with --bot")
+    parser.add_argument("--columns", type=int, default=LAYOUT_COLUMNS, help="Panes per bridge row when running with --bot")
+    parser.add_argument("--safe-per-row", type=int, default=1, help="Safe panes per bridge row when running with --bot")
+    parser.add_argument("--bridge-length", type=int, default=10, help="Rows of tiles when running with --bot")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS, default=STORAGE_BACKEND, help="Where game sessions and users are saved")
+    parser.add_argument("--sqlite-path", default=SQLITE_PATH, help="Database file for --storage sqlite")
+    args = parser.parse_args()
+    SQLITE_PATH = args.sqlite_path
+
+    if args.bot:
+        connect_db(args.storage)
+        create_tables()
+        game = GlassBridgeScene([f"Player {i+1}" for i in range(args.players)], [], database,
+                                bot_policy=make_policy(args.bot), columns=args.columns, safe_per_row=args.safe_per_row,
+                                bridge_length=args.bridge_length, session_writer=session_writer)
+        game.run()
+    else:
+        root = Tk()
+        root.title("Squid Game - Glass Bridge")
+        root.state('zoomed') # Maximize the window
+        root.resizable(True, True)
 
-    # Initialize screen_width and screen_height globally after root is created
-    screen_width = root.winfo_screenwidth()
-    screen_height = root.winfo_screenheight()
+        # Initialize screen_width and screen_height globally after root is created
+        screen_width = root.winfo_screenwidth()
+        screen_height = root.winfo_screenheight()
 
-    # Set up database connection and tables immediately
-    connect_db()
-    create_tables()
+        # Set up database connection and tables immediately
+        connect_db(args.storage)
+        create_tables()
 
-    # Global variables to store selected players/staff from Tkinter
-    selected_players = []
-    selected_staff = []
+        # Global variables to store selected players/staff from Tkinter
+        selected_players = []
+        selected_staff = []
 
-    # Handle window closing to ensure DB connection is closed
-    root.protocol("WM_DELETE_WINDOW", on_closing)
+        # Handle window closing to ensure DB connection is closed
+        root.protocol("WM_DELETE_WINDOW", on_closing)
 
-    show_welcome_screen() # Call this to start the application
-    root.mainloop()
+        show_welcome_screen() # Call this to start the application
+        root.mainloop()
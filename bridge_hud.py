@@ -0,0 +1,104 @@
+"""
+Heads-up display for the Glass Bridge scene.
+
+Every status line is a plain TextNode that is only handed a new string when
+the visible text actually changes; TextNode rebuilds its glyph geometry
+lazily, so several updates in one frame still cost one rebuild.
+
+The player roster is virtualized: one multi-line TextNode shows
+visible_rows players at a time around the current player, however many are
+in the game. Status changes of players outside the visible rows only update
+a string in a list.
+"""
+from panda3d.core import TextNode
+
+# name -> (x, y, scale, align, initial text); positions are in aspect2d units
+HUD_LINES = {
+    'player_info': (0.0, 0.9, 0.07, TextNode.ACenter, ""),
+    'game_status': (0.0, 0.8, 0.08, TextNode.ACenter, "Game Start!"),
+    'timer': (1.0, 0.9, 0.06, TextNode.ARight, ""),
+    'instructions': (0.0, -0.9, 0.07, TextNode.ACenter, ""),
+}
+ROSTER_POS = (-1.2, 0.7)
+ROSTER_SCALE = 0.04
+DEFAULT_VISIBLE_ROWS = 12 # Roster rows on screen at once
+ROWS_ABOVE_CURRENT = 2 # Rows shown above the current player when the roster scrolls
+
+
+def _make_text(parent, name, x, y, scale, align, text):
+    node = TextNode(name)
+    node.setAlign(align)
+    node.setTextColor(1, 1, 1, 1)
+    node.setText(text)
+    text_np = parent.attachNewNode(node)
+    text_np.setScale(scale)
+    text_np.setPos(x, 0, y)
+    return node
+
+
+class Hud:
+    """
+    Status lines plus a scrolling player roster.
+    set_line/set_player_status return True when something visible changed.
+    """
+    def __init__(self, parent, player_names, visible_rows=DEFAULT_VISIBLE_ROWS):
+        self.root = parent.attachNewNode('hud')
+        self._lines = {}
+        self._texts = {}
+        for name, (x, y, scale, align, text) in HUD_LINES.items():
+            self._lines[name] = _make_text(self.root, f"hud_{name}", x, y, scale, align, text)
+            self._texts[name] = text
+
+        self.visible_rows = min(visible_rows, len(player_names))
+        self.statuses = [f"{name}: Ready" for name in player_names] # Full roster, visible or not
+        self.first_row = 0
+        self._roster = _make_text(self.root, "hud_roster", ROSTER_POS[0], ROSTER_POS[1], ROSTER_SCALE, TextNode.ALeft, "")
+        self._roster_text = None
+        self.text_updates = 0 # Strings actually handed to a TextNode (each costs one glyph rebuild)
+        self._refresh_roster()
+
+    def set_line(self, name, text):
+        """Shows text on the named status line ('player_info', 'game_status', 'timer' or 'instructions')."""
+        if self._texts[name] == text:
+            return False
+        self._texts[name] = text
+        self._lines[name].setText(text)
+        self.text_updates += 1
+        return True
+
+    def line(self, name):
+        return self._texts[name]
+
+    def set_player_status(self, index, text):
+        """Sets player index's roster line; only rebuilds the roster if that row is on screen."""
+        if self.statuses[index] == text:
+            return False
+        self.statuses[index] = text
+        if self.first_row <= index < self.first_row + self.visible_rows:
+            return self._refresh_roster()
+        return False
+
+    def scroll_to(self, index):
+        """Scrolls the roster so player index is visible, with a little context above it."""
+        first = max(0, min(index - ROWS_ABOVE_CURRENT, len(self.statuses) - self.visible_rows))
+        if first == self.first_row:
+            return False
+        self.first_row = first
+        return self._refresh_roster()
+
+    def _refresh_roster(self):
+        rows = self.statuses[self.first_row:self.first_row + self.visible_rows]
+        hidden = len(self.statuses) - len(rows)
+        if hidden:
+            last = self.first_row + len(rows)
+            rows = rows + [f"(players {self.first_row + 1}-{last} of {len(self.statuses)})"]
+        text = "\n".join(rows)
+        if text == self._roster_text:
+            return False
+        self._roster_text = text
+        self._roster.setText(text)
+        self.text_updates += 1
+        return True
+
+    def destroy(self):
+        self.root.removeNode()
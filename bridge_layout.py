@@ -0,0 +1,262 @@
+"""
+Bit-packed bridge layouts for the Glass Bridge game.
+
+A bridge is stored as one bit per tile (1 = the glass holds) in a bytearray,
+so a layout costs bridge_length * columns bits instead of a Python list per
+row. Revealed-tile tracking in the engine uses the same TileBitset type.
+
+Bridges may have any number of panes per row (columns) with one or more safe
+panes in each row; the classic game is two panes with one safe.
+
+Layouts are generated from a seed by a versioned generator, so a game session
+only has to store its layout key ("version:rows:seed", plus ":columns:safe"
+for non-classic bridges) and the full layout is rebuilt on demand.
+"""
+import json
+import random
+from functools import lru_cache
+
+LAYOUT_COLUMNS = 2 # Panes per row of the classic bridge
+LAYOUT_SAFE_PER_ROW = 1 # Safe panes per row of the classic bridge
+LAYOUT_GENERATOR_VERSION = 1 # Classic bridges; bump when generate_layout's output for a given seed changes
+MULTI_PANE_GENERATOR_VERSION = 2 # Bridges with any other columns / safe_per_row
+LAYOUT_CACHE_SIZE = 64 # Recently rebuilt layouts kept by rebuild_layout
+
+
+class TileBitset:
+    """
+    Fixed-size bitset backed by a bytearray. Bit i is tile i in row-major order
+    (row * columns + col). get/set are O(1) regardless of the bridge length.
+    """
+    __slots__ = ("size", "bits")
+
+    def __init__(self, size, bits=None):
+        self.size = size
+        num_bytes = (size + 7) >> 3
+        if bits is None:
+            self.bits = bytearray(num_bytes)
+        else:
+            if len(bits) != num_bytes:
+                raise ValueError(f"Expected {num_bytes} bytes for {size} bits, got {len(bits)}")
+            self.bits = bytearray(bits)
+
+    def get(self, index):
+        return (self.bits[index >> 3] >> (index & 7)) & 1 == 1
+
+    def set(self, index):
+        self.bits[index >> 3] |= 1 << (index & 7)
+
+    def clear(self, index):
+        self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def count(self):
+        """Number of set bits."""
+        return sum(bin(byte).count("1") for byte in self.bits)
+
+    def to_hex(self):
+        return self.bits.hex()
+
+    @classmethod
+    def from_hex(cls, size, hex_string):
+        return cls(size, bytes.fromhex(hex_string))
+
+    def __eq__(self, other):
+        return isinstance(other, TileBitset) and self.size == other.size and self.bits == other.bits
+
+    def __repr__(self):
+        return f"TileBitset(size={self.size}, bits={self.to_hex()!r})"
+
+
+class BridgeLayout:
+    """
+    The true safe/broken configuration of a bridge, as a packed TileBitset.
+    """
+    __slots__ = ("bridge_length", "columns", "safe")
+
+    def __init__(self, bridge_length, columns=LAYOUT_COLUMNS, safe=None):
+        self.bridge_length = bridge_length
+        self.columns = columns
+        self.safe = safe if safe is not None else TileBitset(bridge_length * columns)
+
+    def tile_index(self, row, col):
+        return row * self.columns + col
+
+    def is_safe(self, row, col):
+        """Returns True if the tile at (row, col) holds a player's weight."""
+        return self.safe.get(row * self.columns + col)
+
+    def safe_column(self, row):
+        """First safe column of row."""
+        bits = self.safe.bits
+        tile = row * self.columns
+        for col in range(self.columns):
+            if (bits[tile >> 3] >> (tile & 7)) & 1:
+                return col
+            tile += 1
+        raise ValueError(f"Row {row} has no safe tile")
+
+    def safe_count(self, row):
+        """Number of safe panes in row."""
+        bits = self.safe.bits
+        tile = row * self.columns
+        count = 0
+        for _ in range(self.columns):
+            count += (bits[tile >> 3] >> (tile & 7)) & 1
+            tile += 1
+        return count
+
+    def tiles(self):
+        """Yields (row, col, is_safe) for every tile, e.g. for bridge_info rows."""
+        safe = self.safe
+        columns = self.columns
+        for row in range(self.bridge_length):
+            base = row * columns
+            for col in range(columns):
+                yield row, col, safe.get(base + col)
+
+    def to_rows(self):
+        """Legacy form: a list of [is_left_safe, is_right_safe, ...] rows."""
+        return [[self.is_safe(row, col) for col in range(self.columns)] for row in range(self.bridge_length)]
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds a layout from the legacy list-of-rows form."""
+        columns = len(rows[0]) if rows else LAYOUT_COLUMNS
+        layout = cls(len(rows), columns)
+        for row, row_config in enumerate(rows):
+            for col, is_safe in enumerate(row_config):
+                if is_safe:
+                    layout.safe.set(row * columns + col)
+        return layout
+
+    def to_dict(self):
+        return {'rows': self.bridge_length, 'columns': self.columns, 'safe': self.safe.to_hex()}
+
+    def to_json(self):
+        """Compact JSON for the game_sessions.bridge_layout_json column."""
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, text):
+        """Reads to_json() output, or the legacy list-of-rows JSON."""
+        data = json.loads(text)
+        if isinstance(data, list):
+            return cls.from_rows(data)
+        rows, columns = data['rows'], data['columns']
+        return cls(rows, columns, TileBitset.from_hex(rows * columns, data['safe']))
+
+    def __eq__(self, other):
+        return (isinstance(other, BridgeLayout) and self.bridge_length == other.bridge_length
+                and self.columns == other.columns and self.safe == other.safe)
+
+    def __repr__(self):
+        return f"BridgeLayout(rows={self.bridge_length}, columns={self.columns}, safe={self.safe.to_hex()!r})"
+
+
+# --- Seeded layout generation ---
+def _generate_v1(seed, bridge_length, columns, safe_per_row):
+    """
+    Version 1: one safe pane per row; bit r of Random(seed).getrandbits(bridge_length)
+    is row r's safe column (0 for left, 1 for right).
+    """
+    if (columns, safe_per_row) != (LAYOUT_COLUMNS, LAYOUT_SAFE_PER_ROW):
+        raise ValueError("Layout generator version 1 only builds two-pane bridges with one safe pane")
+    layout = BridgeLayout(bridge_length, LAYOUT_COLUMNS)
+    if bridge_length == 0:
+        return layout
+    row_bits = random.Random(seed).getrandbits(bridge_length).to_bytes((bridge_length + 7) >> 3, "little")
+    safe_bits = layout.safe.bits
+    for row in range(bridge_length):
+        tile = row * LAYOUT_COLUMNS + ((row_bits[row >> 3] >> (row & 7)) & 1)
+        safe_bits[tile >> 3] |= 1 << (tile & 7)
+    return layout
+
+
+def _generate_v2(seed, bridge_length, columns, safe_per_row):
+    """
+    Version 2: columns panes per row, safe_per_row of them safe, drawn row by row
+    from Random(seed) (randrange for one safe pane, otherwise sample).
+    """
+    if not 1 <= safe_per_row < columns:
+        raise ValueError("Rows need at least one safe and one breaking pane")
+    layout = BridgeLayout(bridge_length, columns)
+    rng = random.Random(seed)
+    safe_bits = layout.safe.bits
+    all_columns = range(columns)
+    for row in range(bridge_length):
+        base = row * columns
+        safe_columns = (rng.randrange(columns),) if safe_per_row == 1 else rng.sample(all_columns, safe_per_row)
+        for col in safe_columns:
+            tile = base + col
+            safe_bits[tile >> 3] |= 1 << (tile & 7)
+    return layout
+
+
+_LAYOUT_GENERATORS = {
+    1: _generate_v1,
+    2: _generate_v2,
+}
+
+
+def generator_version_for(columns=LAYOUT_COLUMNS, safe_per_row=LAYOUT_SAFE_PER_ROW):
+    """Current generator version for bridges of this shape."""
+    if (columns, safe_per_row) == (LAYOUT_COLUMNS, LAYOUT_SAFE_PER_ROW):
+        return LAYOUT_GENERATOR_VERSION
+    return MULTI_PANE_GENERATOR_VERSION
+
+
+def new_layout_seed(rng=random):
+    """Draws a fresh 63-bit layout seed (fits a signed BIGINT)."""
+    return rng.getrandbits(63)
+
+
+def generate_layout(seed, bridge_length, version=LAYOUT_GENERATOR_VERSION,
+                    columns=LAYOUT_COLUMNS, safe_per_row=LAYOUT_SAFE_PER_ROW):
+    """
+    Builds the layout for seed with the given generator version.
+    The same (seed, bridge_length, version, columns, safe_per_row) always gives the same layout.
+    """
+    generator = _LAYOUT_GENERATORS.get(version)
+    if generator is None:
+        raise ValueError(f"Unknown bridge layout generator version: {version}")
+    return generator(seed, bridge_length, columns, safe_per_row)
+
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def rebuild_layout(seed, bridge_length, version=LAYOUT_GENERATOR_VERSION,
+                   columns=LAYOUT_COLUMNS, safe_per_row=LAYOUT_SAFE_PER_ROW):
+    """
+    Cached generate_layout() for reading stored sessions back.
+    The returned layout is shared between callers: treat it as read-only.
+    """
+    return generate_layout(seed, bridge_length, version, columns, safe_per_row)
+
+
+def layout_key(seed, bridge_length, version=LAYOUT_GENERATOR_VERSION,
+               columns=LAYOUT_COLUMNS, safe_per_row=LAYOUT_SAFE_PER_ROW):
+    """
+    Text stored in game_sessions.bridge_layout_seed: "version:rows:seed" for classic
+    bridges, "version:rows:seed:columns:safe_per_row" otherwise.
+    """
+    if (columns, safe_per_row) == (LAYOUT_COLUMNS, LAYOUT_SAFE_PER_ROW):
+        return f"{version}:{bridge_length}:{seed}"
+    return f"{version}:{bridge_length}:{seed}:{columns}:{safe_per_row}"
+
+
+def parse_layout_key(key):
+    """Returns (seed, bridge_length, version, columns, safe_per_row) from a layout_key() string."""
+    try:
+        parts = [int(part) for part in key.split(":")]
+    except (AttributeError, ValueError):
+        raise ValueError(f"Malformed bridge layout key: {key!r}") from None
+    if len(parts) == 3:
+        parts += [LAYOUT_COLUMNS, LAYOUT_SAFE_PER_ROW]
+    elif len(parts) != 5:
+        raise ValueError(f"Malformed bridge layout key: {key!r}")
+    version, bridge_length, seed, columns, safe_per_row = parts
+    return seed, bridge_length, version, columns, safe_per_row
+
+
+def layout_from_key(key):
+    """Rebuilds (through the cache) the layout a session stored as its layout key."""
+    return rebuild_layout(*parse_layout_key(key))
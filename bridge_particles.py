@@ -0,0 +1,191 @@
+"""
+Glass-shatter particles for the Glass Bridge scene.
+
+ShardPool preallocates a fixed number of shards (one triangle each) in a
+single vertex buffer drawn by one GeomNode: no NodePath per shard, and no
+allocation after startup. Live shards are kept packed at the front of the
+buffer, so only they are drawn, and the whole pool is simulated with a few
+numpy operations per frame and written back into the buffer in place.
+
+The cost is capped however many tiles break at once: shatter() only queues a
+burst (the queue is bounded too), at most spawn_budget shards are spawned per
+frame, and a burst that finds the queue or the pool full is dropped. The
+time-up collapse, which breaks every materialized tile in one frame,
+therefore becomes a few frames of bursts rather than hundreds of shards at
+once.
+"""
+from collections import deque
+
+import numpy as np
+from panda3d.core import (ClockObject, Geom, GeomNode, GeomTriangles, GeomVertexArrayFormat, GeomVertexData,
+                          GeomVertexFormat, InternalName, OmniBoundingVolume, TransparencyAttrib)
+
+DEFAULT_CAPACITY = 768 # Shards allocated up front
+DEFAULT_SPAWN_BUDGET = 96 # Shards spawned per frame at most
+SHARDS_PER_TILE = 12
+SHARD_LIFETIME = 1.2 # Seconds a shard lives, fading out as it goes
+SHARD_SIZE = 0.35 # Largest corner offset from a shard's centre
+SHARD_SPEED = 2.5 # Largest initial sideways speed
+SHARD_GRAVITY = 9.8
+SHARD_COLOR = (0.75, 0.8, 0.95, 0.8) # Pale glass
+MAX_STEP = 0.1 # Longest simulated step, so a hitch does not fling shards through the floor
+
+_FLOATS_PER_VERTEX = 7 # x, y, z, r, g, b, a
+
+
+def _shard_format():
+    array_format = GeomVertexArrayFormat()
+    array_format.addColumn(InternalName.getVertex(), 3, Geom.NT_float32, Geom.C_point)
+    array_format.addColumn(InternalName.getColor(), 4, Geom.NT_float32, Geom.C_color)
+    return GeomVertexFormat.registerFormat(GeomVertexFormat(array_format))
+
+
+class ShardPool:
+    """
+    A fixed pool of glass shards. shatter(x, y, z) breaks a pane at that point;
+    the shards fall, tumble and fade out over SHARD_LIFETIME seconds.
+    """
+    def __init__(self, parent, task_mgr, capacity=DEFAULT_CAPACITY, spawn_budget=DEFAULT_SPAWN_BUDGET,
+                 shards_per_tile=SHARDS_PER_TILE, clock=None, seed=None):
+        self.task_mgr = task_mgr
+        self.clock = clock if clock is not None else ClockObject.getGlobalClock()
+        self.capacity = capacity
+        self.spawn_budget = spawn_budget
+        self.shards_per_tile = shards_per_tile
+        self._rng = np.random.default_rng(seed)
+        self._pending = deque() # Queued bursts: (x, y, z, color)
+        self.max_pending = max(1, capacity // shards_per_tile) # More could not be alive at once anyway
+        self.live = 0 # Shards [0, live) are alive
+        self.spawned = 0
+        self.dropped = 0 # Bursts dropped because the pool or the queue was full
+        self.peak = 0
+
+        # Per-shard state; rows past self.live are garbage
+        self._centers = np.zeros((capacity, 3), np.float32)
+        self._velocities = np.zeros((capacity, 3), np.float32)
+        self._corners = np.zeros((capacity, 3, 3), np.float32) # Corner offsets from the centre
+        self._axes = np.zeros((capacity, 3), np.float32) # Unit tumble axes
+        self._spins = np.zeros(capacity, np.float32) # Radians per second
+        self._ages = np.zeros(capacity, np.float32)
+        self._colors = np.zeros((capacity, 4), np.float32)
+
+        self.vdata = GeomVertexData('shards', _shard_format(), Geom.UHDynamic)
+        self.vdata.uncleanSetNumRows(capacity * 3)
+        geom = Geom(self.vdata)
+        geom.addPrimitive(GeomTriangles(Geom.UHDynamic)) # Non-indexed; covers the live shards only
+        node = GeomNode('glass_shards')
+        node.addGeom(geom)
+        node.setBounds(OmniBoundingVolume()) # Shards fly everywhere; not worth tracking bounds
+        node.setFinal(True)
+        self.np = parent.attachNewNode(node)
+        self.np.setLightOff()
+        self.np.setTwoSided(True)
+        self.np.setDepthWrite(False)
+        self.np.setTransparency(TransparencyAttrib.M_alpha)
+        self.np.hide()
+        self._drawn = 0 # Shards covered by the triangle primitive
+        self._task_name = f"shards_{id(self)}"
+        self._running = False
+
+    def __len__(self):
+        return self.live
+
+    def shatter(self, x, y, z, color=SHARD_COLOR):
+        """Queues a burst of shards_per_tile shards at (x, y, z); spawned within the next frames."""
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return False
+        self._pending.append((x, y, z, color))
+        if not self._running:
+            self._running = True
+            self.task_mgr.add(self._step, self._task_name)
+        return True
+
+    def _spawn(self, x, y, z, color):
+        count = self.shards_per_tile
+        if self.live + count > self.capacity:
+            self.dropped += 1
+            return False
+        rng = self._rng
+        shards = slice(self.live, self.live + count)
+        self._centers[shards] = (x, y, z)
+        self._centers[shards, :2] += rng.uniform(-0.5, 0.5, (count, 2)) # Spread over the pane
+        self._velocities[shards, :2] = rng.uniform(-SHARD_SPEED, SHARD_SPEED, (count, 2))
+        self._velocities[shards, 2] = rng.uniform(0.0, SHARD_SPEED, count)
+        self._corners[shards] = rng.uniform(-SHARD_SIZE, SHARD_SIZE, (count, 3, 3))
+        axes = rng.normal(size=(count, 3))
+        self._axes[shards] = axes / np.maximum(np.linalg.norm(axes, axis=1, keepdims=True), 1e-6)
+        self._spins[shards] = rng.uniform(-8.0, 8.0, count)
+        self._ages[shards] = 0.0
+        self._colors[shards] = color
+        self.live += count
+        self.spawned += count
+        return True
+
+    def _step(self, task):
+        dt = min(self.clock.getDt(), MAX_STEP)
+        budget = self.spawn_budget
+        while self._pending and budget >= self.shards_per_tile:
+            self._spawn(*self._pending.popleft())
+            budget -= self.shards_per_tile
+        self.peak = max(self.peak, self.live)
+
+        n = self.live
+        if n:
+            self._ages[:n] += dt
+            self._velocities[:n, 2] -= SHARD_GRAVITY * dt
+            self._centers[:n] += self._velocities[:n] * dt
+            alive = self._ages[:n] < SHARD_LIFETIME
+            if not alive.all(): # Pack the survivors at the front
+                n = int(alive.sum())
+                for state in (self._centers, self._velocities, self._corners, self._axes, self._spins,
+                              self._ages, self._colors):
+                    state[:n] = state[:self.live][alive]
+                self.live = n
+        if n:
+            self._write_vertices(n)
+        self._set_drawn(n)
+
+        if self.live or self._pending:
+            return task.cont
+        self._running = False
+        return task.done
+
+    def _write_vertices(self, n):
+        # Rodrigues' rotation of each shard's corners about its axis by age * spin
+        angles = (self._ages[:n] * self._spins[:n])[:, None, None]
+        axes = self._axes[:n, None, :]
+        corners = self._corners[:n]
+        cos, sin = np.cos(angles), np.sin(angles)
+        rotated = (corners * cos + np.cross(axes, corners) * sin
+                   + axes * (corners * axes).sum(axis=2, keepdims=True) * (1.0 - cos))
+
+        # Getting the array for modification marks it changed; Panda3D uploads it at most once per frame
+        vertices = np.frombuffer(memoryview(self.vdata.modifyArray(0)), np.float32).reshape(-1, 3, _FLOATS_PER_VERTEX)
+        vertices[:n, :, 0:3] = self._centers[:n, None, :] + rotated
+        vertices[:n, :, 3:7] = self._colors[:n, None, :]
+        vertices[:n, :, 6] *= (1.0 - self._ages[:n] / SHARD_LIFETIME)[:, None] # Fade out
+
+    def _set_drawn(self, n):
+        if n == self._drawn:
+            return
+        triangles = self.np.node().modifyGeom(0).modifyPrimitive(0)
+        triangles.clearVertices()
+        if n:
+            triangles.addConsecutiveVertices(0, n * 3)
+            self.np.show()
+        else:
+            self.np.hide()
+        self._drawn = n
+
+    def clear(self):
+        """Removes every shard and queued burst at once."""
+        self._pending.clear()
+        self.live = 0
+        self._set_drawn(0)
+
+    def destroy(self):
+        self.clear()
+        self.task_mgr.remove(self._task_name)
+        self._running = False
+        self.np.removeNode()
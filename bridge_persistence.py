@@ -0,0 +1,200 @@
+"""
+Write-behind persistence for Glass Bridge game sessions.
+
+GlassBridgeScene never talks to MySQL from the Panda3D main thread: it hands
+each write to a SessionWriter as a job, a function that takes a cursor, and
+carries on rendering. One background thread drains the queue through a run
+function (bridge_db.Database.run, or run_on_connection for a single
+connection):
+
+- Jobs are submitted under a key. A newer job for a key that is still
+  waiting replaces the older one in place (the write is coalesced), so
+  repeated updates of one session cost one statement.
+- Up to batch_size waiting jobs run in one transaction with one commit. If
+  the batch fails it is rolled back and its jobs are retried one by one, so
+  a bad job only loses itself.
+- The queue is bounded. submit() never blocks: when max_pending jobs are
+  waiting it refuses the new one and counts an overflow, which stats()
+  reports together with the queue depth and the writer's busy time.
+
+A job can pass on_done to get its return value once its transaction has
+committed, and on_error to hear about a failure; both run on the writer
+thread. flush() waits until everything queued so far is written; close()
+drains the queue and stops the thread, and is what the game calls on exit.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_PENDING = 256 # Jobs waiting at most before submit() pushes back
+DEFAULT_BATCH_SIZE = 64 # Jobs per transaction at most
+DEFAULT_CLOSE_TIMEOUT = 5.0 # Seconds close() waits for the queue to drain
+
+
+def run_on_connection(connection):
+    """
+    A run function for SessionWriter on one DB-API connection; while the
+    writer runs, nothing else should use that connection.
+    """
+    def run(operation):
+        cursor = connection.cursor()
+        try:
+            result = operation(cursor)
+            connection.commit()
+            return result
+        except Exception:
+            try:
+                connection.rollback()
+            except Exception as e:
+                print(f"ERROR: Session writer could not roll back: {e}")
+            raise
+        finally:
+            cursor.close()
+    return run
+
+
+class SessionWriter:
+    """
+    Background writer thread fed by a bounded, coalescing queue.
+    run(operation) is called on the writer thread; it must call operation(cursor)
+    in one transaction and commit, or roll back and raise.
+    """
+    def __init__(self, run, max_pending=DEFAULT_MAX_PENDING, batch_size=DEFAULT_BATCH_SIZE, name="session-writer"):
+        self.run = run
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._pending = OrderedDict() # key -> (write, on_error, on_done), oldest first
+        self._condition = threading.Condition()
+        self._in_flight = 0 # Jobs taken off the queue but not finished
+        self._closing = False
+
+        # Counters, readable from any thread through stats()
+        self.submitted = 0
+        self.coalesced = 0
+        self.overflows = 0
+        self.written = 0 # Jobs committed
+        self.failed = 0
+        self.batches = 0
+        self.busy_seconds = 0.0 # Time spent in the database
+        self.max_depth = 0
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    # --- Main-thread side ---
+    def submit(self, key, write, on_error=None, on_done=None):
+        """
+        Queues write(cursor) under key. On the writer thread, on_done(result) runs
+        with write's return value after it has committed, or on_error(exception)
+        if it failed. Returns False (and writes nothing) if the queue is full or
+        the writer is closed.
+        """
+        with self._condition:
+            if self._closing:
+                return False
+            if key in self._pending:
+                self._pending[key] = (write, on_error, on_done) # Keeps its place in the queue
+                self.coalesced += 1
+                return True
+            if len(self._pending) >= self.max_pending:
+                self.overflows += 1
+                return False
+            self._pending[key] = (write, on_error, on_done)
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, len(self._pending))
+            self._condition.notify()
+            return True
+
+    def flush(self, timeout=None):
+        """Waits until every job queued so far has been written or has failed. Returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def close(self, timeout=DEFAULT_CLOSE_TIMEOUT):
+        """
+        Stops accepting jobs, writes what is queued and stops the thread.
+        Returns False if jobs were still waiting when timeout ran out. Safe to call twice.
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        with self._condition:
+            drained = not self._pending and not self._in_flight
+        if not drained:
+            print(f"WARNING: Session writer closed with {len(self._pending)} writes not done.")
+        return drained
+
+    def stats(self):
+        """Queue depth, back-pressure and throughput counters."""
+        with self._condition:
+            return {
+                'pending': len(self._pending), 'max_depth': self.max_depth, 'submitted': self.submitted,
+                'coalesced': self.coalesced, 'overflows': self.overflows, 'written': self.written,
+                'failed': self.failed, 'batches': self.batches, 'busy_seconds': round(self.busy_seconds, 6),
+                'last_error': self.last_error,
+            }
+
+    # --- Writer thread ---
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closing)
+                if not self._pending: # Closing and drained
+                    return
+                batch = []
+                while self._pending and len(batch) < self.batch_size:
+                    batch.append(self._pending.popitem(last=False)[1])
+                self._in_flight = len(batch)
+
+            started = time.perf_counter()
+            written, failed = self._write(batch)
+            elapsed = time.perf_counter() - started
+
+            with self._condition:
+                self._in_flight = 0
+                self.written += written
+                self.failed += failed
+                self.batches += 1
+                self.busy_seconds += elapsed
+                self._condition.notify_all()
+
+    def _write(self, batch):
+        """Runs batch in one transaction, falling back to one transaction per job. Returns (written, failed)."""
+        try:
+            self._commit(batch)
+            return len(batch), 0
+        except Exception as e:
+            if len(batch) == 1:
+                self._failed(batch[0][1], e)
+                return 0, 1
+        written = failed = 0
+        for job in batch:
+            try:
+                self._commit([job])
+                written += 1
+            except Exception as e:
+                self._failed(job[1], e)
+                failed += 1
+        return written, failed
+
+    def _commit(self, jobs):
+        def operation(cursor):
+            return [write(cursor) for write, _, _ in jobs]
+        results = self.run(operation)
+        for (_, _, on_done), result in zip(jobs, results): # Only once everything is committed
+            if on_done is not None:
+                try:
+                    on_done(result)
+                except Exception as e:
+                    print(f"ERROR: Session write completion handler failed: {e}")
+
+    def _failed(self, on_error, error):
+        self.last_error = str(error)
+        print(f"ERROR: Session write failed: {error}")
+        if on_error is not None:
+            try:
+                on_error(error)
+            except Exception as e:
+                print(f"ERROR: Session write error handler failed: {e}")
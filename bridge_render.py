@@ -0,0 +1,528 @@
+"""
+Shared geometry and instanced rendering for the Glass Bridge scene.
+
+Every bridge tile is the same cuboid, so the mesh is built once as a static
+Geom and drawn with hardware instancing: one GeomNode, one draw call, and a
+buffer texture holding each tile's offset and colour. Revealing or dropping a
+tile only rewrites that tile's eight floats.
+
+GPUs (or offscreen buffers) without buffer textures fall back to
+FallbackTileRenderer, which still shares the one mesh between every tile
+NodePath. Both renderers expose the same methods, so the scene does not care
+which one it got from make_tile_renderer().
+
+Neither renderer holds the whole bridge: TilePool keeps a window of rows
+around the camera target materialized in a fixed number of slots and
+recycles the slots of rows that fall out of it, restoring each row's
+revealed colours from the game state when it comes back. Dropped tiles fall
+through the scene's AnimationManager, keyed by slot, so recycling a slot
+simply cancels its fall.
+
+Characters come from CharacterModelFactory: the six-box body is built and
+flattened into a single Geom once per shape, and every player or staff
+member is an instance of it tinted with a flat colour. An LODNode swaps the
+body for a single box beyond CHARACTER_LOD_NEAR and stops drawing it beyond
+CHARACTER_LOD_FAR, so the crowd at the far end of the bridge costs next to
+nothing. Players waiting on the starting platform are drawn together by
+CrowdRenderer, one instanced draw call for the whole queue.
+"""
+from array import array
+
+from panda3d.core import (Geom, GeomEnums, GeomNode, GeomTriangles, GeomVertexData, GeomVertexFormat,
+                          GeomVertexWriter, LODNode, LPoint3, Material, NodePath, OmniBoundingVolume, Shader, Texture,
+                          TransparencyAttrib, VBase4)
+
+# --- Tile colours (RGBA) ---
+TILE_GLASS_COLOR = (0.7, 0.7, 0.9, 0.6) # Untouched glass
+TILE_SAFE_COLOR = (0.35, 0.7, 0.45, 0.36) # Glass tinted light green (the old setColorScale(0.5, 1.0, 0.5, 0.6))
+TILE_BROKEN_COLOR = (0.2, 0.2, 0.2, 0.3) # Broken, dark glass
+TILE_FALL_DEPTH = -5.0 # Z a dropped tile falls to
+TILE_FALL_DURATION = 0.5
+
+# --- Character level of detail (distances from the camera, in the character's own units) ---
+CHARACTER_LOD_NEAR = 30.0 # Full head/torso/limb model up to here, a single box beyond
+CHARACTER_LOD_FAR = 120.0 # Not drawn at all beyond here
+
+_FLOATS_PER_INSTANCE = 8 # Offset (x, y, z, scale) then colour (r, g, b, a): two RGBA32 texels
+
+# Cuboid faces: (normal, four corners as (+-x, +-y, +-z) signs), counter-clockwise seen from outside
+_CUBOID_FACES = (
+    ((0, -1, 0), ((-1, -1, -1), (1, -1, -1), (1, -1, 1), (-1, -1, 1))), # Front
+    ((0, 1, 0), ((1, 1, -1), (-1, 1, -1), (-1, 1, 1), (1, 1, 1))),      # Back
+    ((1, 0, 0), ((1, -1, -1), (1, 1, -1), (1, 1, 1), (1, -1, 1))),      # Right
+    ((-1, 0, 0), ((-1, 1, -1), (-1, -1, -1), (-1, -1, 1), (-1, 1, 1))), # Left
+    ((0, 0, 1), ((-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1))),      # Top
+    ((0, 0, -1), ((-1, 1, -1), (1, 1, -1), (1, -1, -1), (-1, -1, -1))), # Bottom
+)
+_FACE_TEXCOORDS = ((0, 0), (1, 0), (1, 1), (0, 1))
+
+_INSTANCE_VERTEX_SHADER = """
+#version 150
+uniform mat4 p3d_ModelViewProjectionMatrix;
+uniform mat4 p3d_ModelViewMatrix;
+uniform mat3 p3d_NormalMatrix;
+uniform samplerBuffer instances; // Per instance: (x, y, z, scale), then (r, g, b, a)
+in vec4 p3d_Vertex;
+in vec3 p3d_Normal;
+out vec3 v_position;
+out vec3 v_normal;
+out vec4 v_color;
+
+void main() {
+    vec4 offset = texelFetch(instances, gl_InstanceID * 2);
+    vec4 vertex = vec4(p3d_Vertex.xyz * offset.w + offset.xyz, 1.0);
+    gl_Position = p3d_ModelViewProjectionMatrix * vertex;
+    v_position = vec3(p3d_ModelViewMatrix * vertex);
+    v_normal = normalize(p3d_NormalMatrix * p3d_Normal);
+    v_color = texelFetch(instances, gl_InstanceID * 2 + 1);
+}
+"""
+
+# Per-pixel version of the fixed-function Material look (the instance colour is the diffuse colour)
+_INSTANCE_FRAGMENT_SHADER = """
+#version 150
+uniform struct { vec4 ambient; } p3d_LightModel;
+uniform struct { vec4 color; vec4 position; } p3d_LightSource[2];
+uniform vec4 material; // (ambient, specular, shininess, unused)
+in vec3 v_position;
+in vec3 v_normal;
+in vec4 v_color;
+out vec4 p3d_FragColor;
+
+void main() {
+    vec3 normal = normalize(v_normal);
+    vec3 eye = normalize(-v_position);
+    vec3 diffuse = p3d_LightModel.ambient.rgb * material.x;
+    vec3 specular = vec3(0.0);
+    for (int i = 0; i < 2; ++i) {
+        vec3 to_light = normalize(p3d_LightSource[i].position.xyz - v_position * p3d_LightSource[i].position.w);
+        diffuse += p3d_LightSource[i].color.rgb * max(dot(normal, to_light), 0.0);
+        specular += p3d_LightSource[i].color.rgb * material.y * pow(max(dot(normal, normalize(to_light + eye)), 0.0), material.z);
+    }
+    p3d_FragColor = vec4(v_color.rgb * diffuse + specular, v_color.a);
+}
+"""
+
+_instance_shader = None
+
+
+def _get_instance_shader():
+    """The shader shared by every instanced renderer (compiled once per GPU)."""
+    global _instance_shader
+    if _instance_shader is None:
+        _instance_shader = Shader.make(Shader.SL_GLSL, _INSTANCE_VERTEX_SHADER, _INSTANCE_FRAGMENT_SHADER)
+    return _instance_shader
+
+
+def make_cuboid_geom(width, length, height, color=None, centered=False, name='cuboid'):
+    """
+    Builds a static cuboid Geom with normals and texcoords (and vertex colours if color is given).
+    The bottom face is at z=0 unless centered, in which case the box is centred on the origin.
+    """
+    vformat = GeomVertexFormat.getV3n3cpt2() if color is not None else GeomVertexFormat.getV3n3t2()
+    vdata = GeomVertexData(name, vformat, Geom.UHStatic)
+    vdata.uncleanSetNumRows(24)
+    vertex = GeomVertexWriter(vdata, 'vertex')
+    normal = GeomVertexWriter(vdata, 'normal')
+    texcoord = GeomVertexWriter(vdata, 'texcoord')
+    color_writer = GeomVertexWriter(vdata, 'color') if color is not None else None
+
+    half_x, half_y, half_z = width / 2, length / 2, height / 2
+    base_z = 0.0 if centered else half_z
+    tris = GeomTriangles(Geom.UHStatic)
+    for face_index, (face_normal, corners) in enumerate(_CUBOID_FACES):
+        for (sx, sy, sz), uv in zip(corners, _FACE_TEXCOORDS):
+            vertex.addData3(sx * half_x, sy * half_y, base_z + sz * half_z)
+            normal.addData3(*face_normal)
+            texcoord.addData2(*uv)
+            if color_writer is not None:
+                color_writer.addData4(color)
+        first = face_index * 4
+        tris.addVertices(first, first + 1, first + 2)
+        tris.addVertices(first, first + 2, first + 3)
+
+    geom = Geom(vdata)
+    geom.addPrimitive(tris)
+    return geom
+
+
+def _tile_material():
+    material = Material() # No diffuse: each tile's flat colour is its diffuse colour
+    material.setAmbient(VBase4(0.5, 0.5, 0.5, 1))
+    material.setSpecular(VBase4(1, 1, 1, 1))
+    material.setShininess(96.0)
+    return material
+
+
+class InstancedTileRenderer:
+    """
+    Draws capacity copies of one tile mesh in a single instanced draw call.
+    Each slot holds one tile: place() sets where it sits (x, y, z of its bottom centre) and its colour.
+    """
+    def __init__(self, parent, animations, capacity, width, length, depth):
+        self.count = capacity
+        self.animations = animations
+        self._data = array('f', [0.0]) * (capacity * _FLOATS_PER_INSTANCE) # CPU copy of the instance buffer
+
+        self.texture = Texture('tile_instances')
+        self.texture.setupBufferTexture(max(capacity, 1) * 2, Texture.T_float, Texture.F_rgba32, GeomEnums.UH_dynamic)
+        self.texture.setRamImage(bytes(max(capacity, 1) * _FLOATS_PER_INSTANCE * 4))
+
+        node = GeomNode('bridge_tiles')
+        node.addGeom(make_cuboid_geom(width, length, depth, name='tile'))
+        # The mesh itself sits at the origin and the slots move as rows stream in; never cull it
+        node.setBounds(OmniBoundingVolume())
+        node.setFinal(True)
+        self.np = parent.attachNewNode(node)
+        self.np.setInstanceCount(capacity)
+        self.np.setShader(_get_instance_shader())
+        self.np.setShaderInput('instances', self.texture)
+        self.np.setShaderInput('material', (0.5, 1.0, 96.0, 0.0)) # Same look as the old per-tile Material
+        self.np.setTransparency(TransparencyAttrib.M_alpha)
+
+    def _write(self, slot, first, values):
+        """
+        Rewrites floats first.. of slot. Getting the RAM image marks the
+        buffer modified; Panda3D uploads it at most once per frame.
+        """
+        texels = memoryview(self.texture.modifyRamImage()).cast('B').cast('f')
+        base = slot * _FLOATS_PER_INSTANCE + first
+        for offset, value in enumerate(values):
+            self._data[base + offset] = value
+            texels[base + offset] = value
+
+    def _stop_falling(self, slot):
+        self.animations.cancel(('tile', slot))
+
+    def place(self, slot, position, color):
+        """Shows a tile at position with color in slot, replacing whatever was there."""
+        self._stop_falling(slot)
+        self._write(slot, 0, (position[0], position[1], position[2], 1.0) + tuple(color))
+
+    def position(self, slot):
+        base = slot * _FLOATS_PER_INSTANCE
+        return LPoint3(self._data[base], self._data[base + 1], self._data[base + 2])
+
+    def set_color(self, slot, color):
+        self._write(slot, 4, color)
+
+    def _set_z(self, z, slot):
+        self._write(slot, 2, (z,))
+
+    def drop(self, slot, color=TILE_BROKEN_COLOR):
+        """Darkens the tile in slot and animates it falling."""
+        self._stop_falling(slot)
+        self.set_color(slot, color)
+        start_z = self._data[slot * _FLOATS_PER_INSTANCE + 2]
+        self.animations.lerp(self._set_z, start_z, TILE_FALL_DEPTH, TILE_FALL_DURATION, key=('tile', slot), arg=slot)
+
+    def destroy(self):
+        for slot in range(self.count):
+            self._stop_falling(slot)
+        self.np.removeNode()
+
+
+class FallbackTileRenderer:
+    """
+    One NodePath per slot, all sharing the same static mesh. Used when the GPU has no buffer textures.
+    """
+    def __init__(self, parent, animations, capacity, width, length, depth):
+        self.count = capacity
+        self.animations = animations
+        shared = NodePath(GeomNode('tile_model'))
+        shared.node().addGeom(make_cuboid_geom(width, length, depth, name='tile'))
+        self.np = parent.attachNewNode('bridge_tiles')
+        self.np.setMaterial(_tile_material())
+        self.np.setTransparency(TransparencyAttrib.M_alpha)
+        self.tile_nodes = []
+        for _ in range(capacity):
+            tile_np = self.np.attachNewNode('tile')
+            shared.instanceTo(tile_np)
+            tile_np.setColor(VBase4(*TILE_GLASS_COLOR))
+            self.tile_nodes.append(tile_np)
+
+    def _stop_falling(self, slot):
+        self.animations.cancel(('tile', slot))
+
+    def place(self, slot, position, color):
+        self._stop_falling(slot)
+        tile_np = self.tile_nodes[slot]
+        tile_np.setPos(*position)
+        tile_np.setColor(VBase4(*color))
+
+    def position(self, slot):
+        return self.tile_nodes[slot].getPos()
+
+    def set_color(self, slot, color):
+        self.tile_nodes[slot].setColor(VBase4(*color))
+
+    def drop(self, slot, color=TILE_BROKEN_COLOR):
+        self._stop_falling(slot)
+        tile_np = self.tile_nodes[slot]
+        tile_np.setColor(VBase4(*color))
+        position = tile_np.getPos()
+        self.animations.move(tile_np, LPoint3(position.getX(), position.getY(), TILE_FALL_DEPTH), TILE_FALL_DURATION,
+                             key=('tile', slot))
+
+    def destroy(self):
+        for slot in range(self.count):
+            self._stop_falling(slot)
+        self.np.removeNode()
+
+
+class TilePool:
+    """
+    Keeps only window_rows rows of the bridge materialized in a fixed-size tile
+    renderer, so startup time and scene-graph size do not grow with the bridge.
+    focus(row) slides the window to start rows_behind rows before row; rows that
+    leave it hand their slots to the rows that enter (slot = row % window_rows).
+
+    tile_position(row, col) returns a tile's (x, y); tile_look(row, col) returns
+    its (color, dropped) from the game state, so a re-materialized row shows
+    what has been revealed on it.
+    """
+    def __init__(self, renderer, bridge_length, columns, window_rows, rows_behind, tile_position, tile_look):
+        self.renderer = renderer
+        self.bridge_length = bridge_length
+        self.columns = columns
+        self.window_rows = window_rows
+        self.rows_behind = rows_behind
+        self.tile_position = tile_position
+        self.tile_look = tile_look
+        self.first_row = None # First materialized row; None until the first focus()
+
+    def focus(self, row):
+        """Materializes the window around row. Cheap when the window does not move."""
+        first = max(0, min(row - self.rows_behind, self.bridge_length - self.window_rows))
+        if first == self.first_row:
+            return
+        if self.first_row is None:
+            old_rows = range(0)
+        else:
+            old_rows = range(self.first_row, self.first_row + self.window_rows)
+        self.first_row = first
+        for new_row in range(first, first + self.window_rows):
+            if new_row not in old_rows:
+                self._materialize(new_row)
+
+    def _materialize(self, row):
+        base = (row % self.window_rows) * self.columns
+        for col in range(self.columns):
+            x, y = self.tile_position(row, col)
+            color, dropped = self.tile_look(row, col)
+            self.renderer.place(base + col, (x, y, TILE_FALL_DEPTH if dropped else 0.0), color)
+
+    def is_materialized(self, row):
+        return self.first_row is not None and self.first_row <= row < self.first_row + self.window_rows
+
+    def set_color(self, row, col, color):
+        """Recolours the tile if its row is materialized; other rows pick the colour up from tile_look."""
+        if self.is_materialized(row):
+            self.renderer.set_color((row % self.window_rows) * self.columns + col, color)
+
+    def drop(self, row, col, color=TILE_BROKEN_COLOR):
+        """Animates the tile falling if its row is materialized."""
+        if self.is_materialized(row):
+            self.renderer.drop((row % self.window_rows) * self.columns + col, color)
+
+    def destroy(self):
+        self.renderer.destroy()
+
+
+class CharacterModelFactory:
+    """
+    Caches one flattened character mesh (legs, torso, arms, head) per body shape,
+    plus a one-box stand-in, under an LODNode that picks between them by distance.
+    make() returns a NodePath that shares the cached meshes; a single colour is
+    applied as a flat colour override, so differently coloured characters share them too.
+    """
+    def __init__(self):
+        self._prototypes = {} # (shape, baked colours or None) -> NodePath holding the flattened GeomNode
+        self._material = Material()
+        self._material.setDiffuse(VBase4(0.8, 0.8, 0.8, 1))
+        self._material.setSpecular(VBase4(0.5, 0.5, 0.5, 1))
+        self._material.setShininess(50.0)
+
+    def _build(self, shape, head_color, body_color):
+        """Builds the segmented model and flattens it into one GeomNode holding one Geom."""
+        (head_size, torso_width, torso_depth, torso_height, limb_width, limb_depth, arm_length, leg_length) = shape
+        parts = (
+            # (width, depth, height, x, z of the centre, color) relative to the feet at Z=0
+            (limb_width, limb_depth, leg_length, -(torso_width / 4), leg_length / 2, body_color), # Left leg
+            (limb_width, limb_depth, leg_length, torso_width / 4, leg_length / 2, body_color), # Right leg
+            (torso_width, torso_depth, torso_height, 0, leg_length + torso_height / 2, body_color), # Torso
+            (limb_width, limb_depth, arm_length, -(torso_width / 2 + limb_width / 2), leg_length + torso_height * 0.7, body_color), # Left arm
+            (limb_width, limb_depth, arm_length, torso_width / 2 + limb_width / 2, leg_length + torso_height * 0.7, body_color), # Right arm
+            (head_size, head_size, head_size, 0, leg_length + torso_height + head_size / 2, head_color), # Head
+        )
+        prototype = NodePath('character_model')
+        for width, depth, height, x, z, color in parts:
+            part = prototype.attachNewNode(GeomNode('part'))
+            part.node().addGeom(make_cuboid_geom(width, depth, height, color=color, centered=True, name='character_part'))
+            part.setPos(x, 0, z)
+        prototype.flattenStrong() # Six boxes -> one GeomNode with one Geom
+
+        # Mid-range stand-in: one box around the body, in the body colour
+        total_height = leg_length + torso_height + head_size
+        box = GeomNode('character_box')
+        box.addGeom(make_cuboid_geom(torso_width + 2 * limb_width, torso_depth, total_height, color=body_color,
+                                     centered=True, name='character_box'))
+
+        lod = LODNode('character_lod')
+        lod_np = NodePath(lod)
+        prototype.find('**/+GeomNode').reparentTo(lod_np)
+        lod.addSwitch(CHARACTER_LOD_NEAR, 0.0)
+        lod_np.attachNewNode(box).setZ(total_height / 2)
+        lod.addSwitch(CHARACTER_LOD_FAR, CHARACTER_LOD_NEAR)
+        lod_np.setMaterial(self._material)
+        return lod_np
+
+    def _white_prototype(self, shape):
+        key = (shape, None)
+        prototype = self._prototypes.get(key)
+        if prototype is None:
+            white = VBase4(1, 1, 1, 1)
+            prototype = self._prototypes[key] = self._build(shape, white, white)
+        return prototype
+
+    def prototype_geom(self, shape, level=0):
+        """
+        The white Geom of shape at LOD level 0 (full body) or 1 (single box), e.g. for
+        CrowdRenderer; the copy shares its vertex data.
+        """
+        lod_np = self._white_prototype(shape)
+        geom_np = lod_np.getChild(level)
+        geom = geom_np.node().getGeom(0).makeCopy()
+        if not geom_np.getTransform().isIdentity():
+            geom.transformVertices(geom_np.getMat())
+        return geom
+
+    def make(self, pos, head_color, body_color, shape):
+        """
+        Returns a new character NodePath at pos. shape is the tuple
+        (head_size, torso_width, torso_depth, torso_height, limb_width, limb_depth, arm_length, leg_length).
+        """
+        single_color = tuple(head_color) == tuple(body_color)
+        # Single-colour characters share a white prototype; two-colour ones bake their colours in
+        if single_color:
+            prototype = self._white_prototype(shape)
+        else:
+            key = (shape, (tuple(head_color), tuple(body_color)))
+            prototype = self._prototypes.get(key)
+            if prototype is None:
+                prototype = self._prototypes[key] = self._build(shape, head_color, body_color)
+
+        character_root = NodePath('character_root')
+        prototype.instanceTo(character_root)
+        if single_color:
+            character_root.setColor(body_color)
+        character_root.setPos(pos)
+        return character_root
+
+
+class CrowdRenderer:
+    """
+    Draws up to capacity copies of one character Geom in a single instanced draw call.
+    Members are added and removed by key (e.g. a player index) in O(1); removal
+    moves the last member into the freed slot so the instances stay packed.
+    With far_geom the whole crowd switches to it beyond CHARACTER_LOD_NEAR and is
+    not drawn beyond CHARACTER_LOD_FAR, measured from center.
+    """
+    def __init__(self, parent, geom, capacity, scale=1.0, far_geom=None, center=(0, 0, 0)):
+        self.capacity = capacity
+        self.scale = scale
+        self._keys = [] # Slot -> key
+        self._slots = {} # Key -> slot
+
+        self.texture = Texture('crowd_instances')
+        self.texture.setupBufferTexture(max(capacity, 1) * 2, Texture.T_float, Texture.F_rgba32, GeomEnums.UH_dynamic)
+        self.texture.setRamImage(bytes(max(capacity, 1) * _FLOATS_PER_INSTANCE * 4))
+
+        self.np = parent.attachNewNode('crowd') # Holds the instancing state shared by every level of detail
+        if far_geom is not None:
+            switches = ((geom, CHARACTER_LOD_NEAR, 0.0), (far_geom, CHARACTER_LOD_FAR, CHARACTER_LOD_NEAR))
+        else:
+            switches = ((geom, CHARACTER_LOD_FAR, 0.0),)
+        lod = LODNode('crowd_lod')
+        lod.setCenter(LPoint3(*center))
+        lod_np = self.np.attachNewNode(lod)
+        for level_geom, far, near in switches:
+            node = GeomNode('crowd')
+            node.addGeom(level_geom)
+            node.setBounds(OmniBoundingVolume()) # Members move around; one draw call is cheaper than tracking bounds
+            node.setFinal(True)
+            lod_np.attachNewNode(node)
+            lod.addSwitch(far, near)
+        self.np.setInstanceCount(0)
+        self.np.setShader(_get_instance_shader())
+        self.np.setShaderInput('instances', self.texture)
+        self.np.setShaderInput('material', (0.5, 0.5, 50.0, 0.0)) # Same look as the character Material
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._slots
+
+    def add(self, key, pos, color):
+        """Shows key at pos with color. Does nothing if it is already a member."""
+        if key in self._slots:
+            return
+        if len(self._keys) >= self.capacity:
+            raise ValueError(f"Crowd is full ({self.capacity} members)")
+        slot = len(self._keys)
+        texels = memoryview(self.texture.modifyRamImage()).cast('B').cast('f')
+        base = slot * _FLOATS_PER_INSTANCE
+        texels[base:base + _FLOATS_PER_INSTANCE] = array('f', (pos[0], pos[1], pos[2], self.scale,
+                                                               color[0], color[1], color[2], color[3]))
+        self._keys.append(key)
+        self._slots[key] = slot
+        self.np.setInstanceCount(len(self._keys))
+
+    def remove(self, key):
+        """Stops drawing key. Returns False if it was not a member."""
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return False
+        last = len(self._keys) - 1
+        if slot != last: # Move the last member into the hole
+            texels = memoryview(self.texture.modifyRamImage()).cast('B').cast('f')
+            base, last_base = slot * _FLOATS_PER_INSTANCE, last * _FLOATS_PER_INSTANCE
+            texels[base:base + _FLOATS_PER_INSTANCE] = texels[last_base:last_base + _FLOATS_PER_INSTANCE]
+            moved = self._keys[last]
+            self._keys[slot] = moved
+            self._slots[moved] = slot
+        self._keys.pop()
+        self.np.setInstanceCount(len(self._keys))
+        return True
+
+    def destroy(self):
+        self.np.removeNode()
+
+
+def supports_instancing(window):
+    """
+    True if window can draw instanced tiles and crowds. Without a window (window-type none)
+    nothing is drawn, so the instanced path is kept for its lower memory use.
+    """
+    gsg = window.getGsg() if window is not None else None
+    if gsg is None:
+        return True
+    return gsg.getSupportsGeometryInstancing() and gsg.getSupportsBufferTexture() and gsg.getSupportsGlsl()
+
+
+def make_crowd_renderer(parent, window, geom, capacity, scale=1.0, far_geom=None, center=(0, 0, 0)):
+    """A CrowdRenderer for capacity members, or None when the GPU cannot instance (draw characters one by one)."""
+    if not supports_instancing(window):
+        return None
+    return CrowdRenderer(parent, geom, capacity, scale, far_geom, center)
+
+
+def make_tile_renderer(parent, window, animations, capacity, width, length, depth):
+    """
+    Picks the instanced renderer when the window's GPU supports it, otherwise the fallback.
+    Falling tiles are animated by animations (an AnimationManager).
+    """
+    renderer_class = InstancedTileRenderer if supports_instancing(window) else FallbackTileRenderer
+    print(f"DEBUG: Drawing up to {capacity} bridge tiles with {renderer_class.__name__}.")
+    return renderer_class(parent, animations, capacity, width, length, depth)
@@ -0,0 +1,232 @@
+"""
+Event-sourced turn log and fast-forward replay for Glass Bridge games.
+
+TurnLog subscribes to a BridgeEngine and appends every state transition
+(move chosen, tile revealed safe or broken, fall, cross, turn change,
+timeout) to compact parallel arrays. Every keyframe_interval events it also
+keeps a snapshot of the replayed state, so TurnLog.state_at(i) finds the
+nearest keyframe with a binary search and applies at most keyframe_interval
+events instead of re-simulating the game from the start.
+
+Logs can be saved with to_bytes() and loaded with TurnLog.from_bytes() for
+post-mortems of finished games.
+"""
+import struct
+from array import array
+from bisect import bisect_right
+
+from bridge_engine import (EVENT_MOVE_STARTED, EVENT_TILE_SAFE, EVENT_TILE_BROKEN, EVENT_PLAYER_FELL,
+                           EVENT_PLAYER_CROSSED, EVENT_TURN_STARTED, EVENT_PLAYER_TIMED_OUT, EVENT_TIME_UP,
+                           EVENT_GAME_OVER)
+
+# --- Log event kinds (one byte each) ---
+LOG_MOVE_CHOSEN = 1
+LOG_TILE_SAFE = 2
+LOG_TILE_BROKEN = 3 # col carries ROW_KNOWN_FLAG when the break proved the row's safe pane
+LOG_FALL = 4
+LOG_CROSS = 5
+LOG_TURN_CHANGE = 6
+LOG_PLAYER_TIMEOUT = 7
+LOG_TIME_UP = 8
+LOG_GAME_OVER = 9 # col is 1 when the time limit ended the game
+
+LOG_EVENT_NAMES = {
+    LOG_MOVE_CHOSEN: "move_chosen", LOG_TILE_SAFE: "tile_safe", LOG_TILE_BROKEN: "tile_broken",
+    LOG_FALL: "fall", LOG_CROSS: "cross", LOG_TURN_CHANGE: "turn_change",
+    LOG_PLAYER_TIMEOUT: "player_timeout", LOG_TIME_UP: "time_up", LOG_GAME_OVER: "game_over",
+}
+
+ROW_KNOWN_FLAG = 0x8000 # Above any column index (the engine counts panes in 16 bits)
+DEFAULT_KEYFRAME_INTERVAL = 256
+_HEADER = struct.Struct("<4sIIII") # magic, bridge_length, columns, num_players, event count
+_MAGIC = b"GBL1"
+
+
+class ReplayState:
+    """
+    Game state rebuilt from the log: per-player progress, revealed tiles/rows,
+    whose turn it is, the timer and whether the game is over.
+    """
+    __slots__ = ("bridge_length", "columns", "player_rows", "player_cols", "fallen", "crossed",
+                 "revealed_tiles", "revealed_rows", "current_player", "time_left",
+                 "game_over", "time_limit_reached")
+
+    def __init__(self, bridge_length, columns, num_players, time_left=0.0):
+        self.bridge_length = bridge_length
+        self.columns = columns
+        self.player_rows = array('i', [-1]) * num_players
+        self.player_cols = array('i', [-1]) * num_players
+        self.fallen = bytearray(num_players)
+        self.crossed = bytearray(num_players)
+        self.revealed_tiles = bytearray((bridge_length * columns + 7) >> 3)
+        self.revealed_rows = bytearray((bridge_length + 7) >> 3)
+        self.current_player = -1
+        self.time_left = time_left
+        self.game_over = False
+        self.time_limit_reached = False
+
+    def copy(self):
+        other = ReplayState.__new__(ReplayState)
+        other.bridge_length = self.bridge_length
+        other.columns = self.columns
+        other.player_rows = array('i', self.player_rows)
+        other.player_cols = array('i', self.player_cols)
+        other.fallen = bytearray(self.fallen)
+        other.crossed = bytearray(self.crossed)
+        other.revealed_tiles = bytearray(self.revealed_tiles)
+        other.revealed_rows = bytearray(self.revealed_rows)
+        other.current_player = self.current_player
+        other.time_left = self.time_left
+        other.game_over = self.game_over
+        other.time_limit_reached = self.time_limit_reached
+        return other
+
+    def apply(self, kind, player, row, col, time_left):
+        """Applies one logged event."""
+        self.time_left = time_left
+        if kind == LOG_MOVE_CHOSEN:
+            self.player_rows[player] = row
+            self.player_cols[player] = col
+        elif kind == LOG_TILE_SAFE or kind == LOG_TILE_BROKEN:
+            tile = row * self.columns + (col & ~ROW_KNOWN_FLAG)
+            self.revealed_tiles[tile >> 3] |= 1 << (tile & 7)
+            if kind == LOG_TILE_SAFE or col & ROW_KNOWN_FLAG:
+                self.revealed_rows[row >> 3] |= 1 << (row & 7)
+        elif kind == LOG_FALL or kind == LOG_PLAYER_TIMEOUT:
+            self.fallen[player] = 1
+        elif kind == LOG_CROSS:
+            self.crossed[player] = 1
+        elif kind == LOG_TURN_CHANGE:
+            self.current_player = player
+        elif kind == LOG_TIME_UP:
+            self.time_left = 0.0
+        elif kind == LOG_GAME_OVER:
+            self.game_over = True
+            self.time_limit_reached = bool(col)
+            self.current_player = -1
+
+    def active_players(self):
+        """Queue indices of players still in the game, in turn order."""
+        return [i for i in range(len(self.fallen)) if not self.fallen[i] and not self.crossed[i]]
+
+    def is_revealed(self, row, col):
+        tile = row * self.columns + col
+        return (self.revealed_tiles[tile >> 3] >> (tile & 7)) & 1 == 1
+
+    def is_row_known(self, row):
+        return (self.revealed_rows[row >> 3] >> (row & 7)) & 1 == 1
+
+
+class TurnLog:
+    """
+    Append-only record of a game's transitions with periodic keyframes.
+    Create it before BridgeEngine.start() so the first turn is recorded.
+    """
+    def __init__(self, engine=None, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL,
+                 bridge_length=0, columns=2, num_players=0, time_limit=0.0):
+        if engine is not None:
+            bridge_length, columns = engine.bridge_length, engine.columns
+            num_players, time_limit = len(engine.players), engine.time_limit
+        self.bridge_length = bridge_length
+        self.columns = columns
+        self.num_players = num_players
+        self.time_limit = time_limit
+        self.keyframe_interval = keyframe_interval
+
+        # One entry per event, in parallel arrays (about 15 bytes per event)
+        self.kinds = array('B')
+        self.players = array('i')
+        self.rows = array('i')
+        self.cols = array('H')
+        self.times = array('f')
+
+        self._state = ReplayState(bridge_length, columns, num_players, time_limit) # Running state at the log's end
+        self._keyframe_indices = [0]
+        self._keyframes = [self._state.copy()]
+
+        self.engine = engine
+        if engine is not None:
+            self._subscribe(engine)
+
+    def _subscribe(self, engine):
+        engine.subscribe(EVENT_MOVE_STARTED, lambda player, row, col: self.append(LOG_MOVE_CHOSEN, player.index, row, col))
+        engine.subscribe(EVENT_TILE_SAFE, lambda player, row, col: self.append(LOG_TILE_SAFE, player.index, row, col))
+        engine.subscribe(EVENT_TILE_BROKEN, self._on_tile_broken)
+        engine.subscribe(EVENT_PLAYER_FELL, lambda player, row, col: self.append(LOG_FALL, player.index, row, col))
+        engine.subscribe(EVENT_PLAYER_CROSSED, lambda player: self.append(LOG_CROSS, player.index))
+        engine.subscribe(EVENT_TURN_STARTED, lambda player: self.append(LOG_TURN_CHANGE, player.index))
+        engine.subscribe(EVENT_PLAYER_TIMED_OUT, lambda player: self.append(LOG_PLAYER_TIMEOUT, player.index))
+        engine.subscribe(EVENT_TIME_UP, lambda falling_tiles: self.append(LOG_TIME_UP))
+        engine.subscribe(EVENT_GAME_OVER, lambda winners, time_limit_reached: self.append(LOG_GAME_OVER, col=int(time_limit_reached)))
+
+    def _on_tile_broken(self, player, row, col):
+        # Whether the break proved the row is a rule of the engine; record its verdict
+        if (self.engine.revealed_rows.bits[row >> 3] >> (row & 7)) & 1:
+            col |= ROW_KNOWN_FLAG
+        self.append(LOG_TILE_BROKEN, player.index, row, col)
+
+    def append(self, kind, player=-1, row=-1, col=0):
+        """Records one event and takes a keyframe every keyframe_interval events."""
+        time_left = self.engine.time_left if self.engine is not None else self._state.time_left
+        self.kinds.append(kind)
+        self.players.append(player)
+        self.rows.append(row)
+        self.cols.append(col)
+        self.times.append(time_left)
+        self._state.apply(kind, player, row, col, time_left)
+        if len(self.kinds) % self.keyframe_interval == 0:
+            self._keyframe_indices.append(len(self.kinds))
+            self._keyframes.append(self._state.copy())
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def event(self, index):
+        """Returns event index as (name, player, row, col, time_left)."""
+        return (LOG_EVENT_NAMES[self.kinds[index]], self.players[index], self.rows[index],
+                self.cols[index] & ~ROW_KNOWN_FLAG, self.times[index])
+
+    def state_at(self, event_index):
+        """
+        State after the first event_index events (0 = before anything happened).
+        Binary search to the nearest keyframe, then at most keyframe_interval events are applied.
+        """
+        if not 0 <= event_index <= len(self.kinds):
+            raise IndexError(f"event_index {event_index} outside 0..{len(self.kinds)}")
+        if event_index == len(self.kinds):
+            return self._state.copy()
+        slot = bisect_right(self._keyframe_indices, event_index) - 1
+        state = self._keyframes[slot].copy()
+        for i in range(self._keyframe_indices[slot], event_index):
+            state.apply(self.kinds[i], self.players[i], self.rows[i], self.cols[i], self.times[i])
+        return state
+
+    # --- Serialization ---
+    def to_bytes(self):
+        """Packs the events (keyframes are rebuilt on load)."""
+        header = _HEADER.pack(_MAGIC, self.bridge_length, self.columns, self.num_players, len(self.kinds))
+        return b"".join((header, struct.pack("<f", self.time_limit), self.kinds.tobytes(), self.players.tobytes(),
+                         self.rows.tobytes(), self.cols.tobytes(), self.times.tobytes()))
+
+    @classmethod
+    def from_bytes(cls, data, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+        magic, bridge_length, columns, num_players, count = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC:
+            raise ValueError("Not a Glass Bridge turn log")
+        offset = _HEADER.size
+        (time_limit,) = struct.unpack_from("<f", data, offset)
+        offset += 4
+        columns_data = {}
+        for name, typecode in (("kinds", 'B'), ("players", 'i'), ("rows", 'i'), ("cols", 'H'), ("times", 'f')):
+            values = array(typecode)
+            size = values.itemsize * count
+            values.frombytes(data[offset:offset + size])
+            columns_data[name] = values
+            offset += size
+
+        log = cls(keyframe_interval=keyframe_interval, bridge_length=bridge_length, columns=columns,
+                  num_players=num_players, time_limit=time_limit)
+        for i in range(count):
+            log._state.time_left = columns_data["times"][i]
+            log.append(columns_data["kinds"][i], columns_data["players"][i], columns_data["rows"][i], columns_data["cols"][i])
+        return log
@@ -0,0 +1,532 @@
+"""
+Asyncio lobby server that hosts many Glass Bridge games in one process.
+
+Each room runs its own BridgeEngine, driven by one coroutine that sleeps
+until the room's next deadline (a step landing or the timer running out) or
+a move arrives, so idle rooms cost nothing between events. A Panda3D window
+per group is no longer needed.
+Clients talk newline-delimited JSON over TCP:
+
+    -> {"op": "join", "room": "r1", "name": "Alice"}
+    <- {"event": "joined", "room": "r1", "player": 0, "columns": 2, ...}
+    <- {"event": "seated", "player": 0}     (new seat after someone left before the start)
+    -> {"op": "start"}                      (or wait until the room is full)
+    <- {"event": "turn_started", "player": 0}
+    -> {"op": "move", "col": 1}
+    <- {"event": "move_started", "player": 0, "row": 0, "col": 1}
+    <- {"event": "tile_safe", "player": 0, "row": 0, "col": 1}
+    -> {"op": "stats"}                      (server-wide wake-up latency)
+
+Per-room memory is bounded: rooms seat at most max_players, and a client
+whose unsent output grows past MAX_CLIENT_BUFFER is disconnected instead of
+buffering forever. A player who disconnects mid-game is timed out when their
+turn comes, and a room is closed as soon as its last client leaves. How late
+each room tick wakes up after its deadline is recorded in a fixed-size
+histogram.
+
+    python bridge_server.py --port 8765
+    python bridge_server.py --loopback 1000   (server + bot clients, prints a latency report)
+"""
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bridge_engine import (BridgeEngine, DEFAULT_BRIDGE_LENGTH, DEFAULT_TIME_LIMIT, MOVE_DURATION, EVENT_TIMER_STARTED,
+                           EVENT_TURN_STARTED, EVENT_MOVE_STARTED, EVENT_INVALID_MOVE, EVENT_TILE_SAFE, EVENT_TILE_BROKEN,
+                           EVENT_PLAYER_CROSSED, EVENT_PLAYER_FELL, EVENT_PLAYER_TIMED_OUT, EVENT_TIME_UP, EVENT_GAME_OVER)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_ROOM_SIZE = 7 # A room starts on its own once this many players have joined
+MAX_LINE_BYTES = 4096 # Longest accepted client message
+MAX_CLIENT_BUFFER = 256 * 1024 # Unsent bytes allowed per client before it is dropped
+REPORT_INTERVAL = 5.0 # Seconds between DEBUG status lines
+LISTEN_BACKLOG = 4096 # Pending connections; thousands of clients may connect at once
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory histogram of tick lateness with 0.1 ms buckets up to max_ms.
+    Later samples land in the last bucket; max_seconds keeps the true worst case.
+    """
+    __slots__ = ("resolution", "buckets", "count", "total", "max_seconds")
+
+    def __init__(self, max_ms=1000, resolution_ms=0.1):
+        self.resolution = resolution_ms / 1000.0
+        self.buckets = [0] * (int(max_ms / resolution_ms) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds):
+        seconds = max(seconds, 0.0)
+        self.buckets[min(int(seconds / self.resolution), len(self.buckets) - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    def percentile(self, fraction):
+        """Upper edge of the bucket holding the given fraction of samples, in seconds."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= target:
+                return (index + 1) * self.resolution
+        return self.max_seconds
+
+    def summary(self):
+        return {
+            'ticks': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.50) * 1000, 3),
+            'p99_ms': round(self.percentile(0.99) * 1000, 3),
+            'max_ms': round(self.max_seconds * 1000, 3),
+        }
+
+
+class ClientConnection:
+    """One TCP client. Seated in at most one room at a time."""
+    __slots__ = ("writer", "room", "player_index", "closed")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.room = None
+        self.player_index = None
+        self.closed = False
+
+    def send_line(self, line):
+        """Queues an encoded message; drops the client if it stopped reading."""
+        if self.closed:
+            return
+        transport = self.writer.transport
+        if transport.is_closing():
+            self.closed = True
+            return
+        if transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+            print("WARNING: Dropping a client that is not reading its messages.")
+            self.close()
+            return
+        self.writer.write(line)
+
+    def send(self, message):
+        self.send_line(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.writer.close()
+
+
+class Room:
+    """
+    A single game: the seated clients, their BridgeEngine and the coroutine that runs it.
+    """
+    def __init__(self, server, room_id):
+        self.server = server
+        self.room_id = room_id
+        self.names = []
+        self.clients = [] # Parallel to names; None once a client leaves
+        self.engine = None
+        self.task = None
+        self.resolve_at = None # Loop time when the step in progress lands
+        self.clock = 0.0 # Loop time the engine's timer has been advanced to
+        self._wakeup = None # Future the room coroutine sleeps on
+
+    @property
+    def started(self):
+        return self.engine is not None
+
+    def seat(self, client, name):
+        """Adds client as the next player. Returns its player index, or None if the room is closed to joins."""
+        if self.started or len(self.names) >= self.server.max_players:
+            return None
+        self.names.append(str(name)[:32])
+        self.clients.append(client)
+        return len(self.names) - 1
+
+    def leave(self, client):
+        if not self.started:
+            self._unseat(client)
+            if not self.clients:
+                self.server.close_room(self)
+            return
+        for index, seated in enumerate(self.clients):
+            if seated is client:
+                self.clients[index] = None
+        if any(self.clients):
+            self._wake() # The room coroutine times out the player if it was their turn
+        elif self.task is not None:
+            self.task.cancel() # Nobody is left to play or watch; finish_room drops the room
+
+    def _unseat(self, client):
+        """Gives up client's seat before the game starts; the players after it move up one seat each."""
+        for index in range(len(self.clients) - 1, -1, -1):
+            if self.clients[index] is client:
+                del self.clients[index]
+                del self.names[index]
+        for index, seated in enumerate(self.clients):
+            if seated.player_index != index:
+                seated.player_index = index
+                seated.send({'event': 'seated', 'player': index})
+
+    def broadcast(self, message):
+        line = json.dumps(message, separators=(",", ":")).encode() + b"\n" # Encoded once for every client
+        for client in self.clients:
+            if client is not None:
+                client.send_line(line)
+
+    def start(self):
+        """Creates the engine and starts the room coroutine."""
+        if self.started or not self.names:
+            return
+        server = self.server
+        self.engine = BridgeEngine(self.names, bridge_length=server.bridge_length, time_limit=server.time_limit,
+                                   columns=server.columns, safe_per_row=server.safe_per_row,
+                                   rng=random.Random(server.rng.getrandbits(64)))
+        self._subscribe()
+        self.clock = asyncio.get_running_loop().time()
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def _subscribe(self):
+        engine = self.engine
+        send = self.broadcast
+        engine.subscribe(EVENT_TIMER_STARTED, lambda: send({'event': EVENT_TIMER_STARTED}))
+        engine.subscribe(EVENT_TURN_STARTED, lambda player: send({'event': EVENT_TURN_STARTED, 'player': player.index}))
+        engine.subscribe(EVENT_MOVE_STARTED, self._on_move_started)
+        engine.subscribe(EVENT_INVALID_MOVE, lambda player, reason: send({'event': EVENT_INVALID_MOVE, 'reason': reason}))
+        for event in (EVENT_TILE_SAFE, EVENT_TILE_BROKEN, EVENT_PLAYER_FELL):
+            engine.subscribe(event, lambda player, row, col, event=event: send({'event': event, 'player': player.index, 'row': row, 'col': col}))
+        engine.subscribe(EVENT_PLAYER_CROSSED, lambda player: send({'event': EVENT_PLAYER_CROSSED, 'player': player.index}))
+        engine.subscribe(EVENT_PLAYER_TIMED_OUT, lambda player: send({'event': EVENT_PLAYER_TIMED_OUT, 'player': player.index}))
+        # Only the count: the tile list grows with the bridge and every client can derive it
+        engine.subscribe(EVENT_TIME_UP, lambda falling_tiles: send({'event': EVENT_TIME_UP, 'falling_tiles': len(falling_tiles)}))
+        engine.subscribe(EVENT_GAME_OVER, lambda winners, time_limit_reached: send(
+            {'event': EVENT_GAME_OVER, 'winners': winners, 'time_limit_reached': time_limit_reached}))
+
+    def _on_move_started(self, player, row, col):
+        self.resolve_at = self.clock + MOVE_DURATION
+        self.broadcast({'event': EVENT_MOVE_STARTED, 'player': player.index, 'row': row, 'col': col})
+        self._wake() # The room coroutine has a new deadline
+
+    def _wake(self):
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    def _advance(self, now):
+        """Runs the engine's timer up to loop time now."""
+        if now > self.clock:
+            self.engine.tick(now - self.clock)
+            self.clock = now
+
+    def _skip_absent_players(self):
+        """Times out current players whose client has left, so their turn cannot stall the room."""
+        engine = self.engine
+        while not engine.game_over_flag and engine.pending_move is None:
+            player = engine.current_player
+            if player is None or self.clients[player.index] is not None:
+                return
+            engine.forfeit(player) # Broadcast through the engine's player_timed_out subscription
+
+    def _next_deadline(self):
+        """Loop time of the next thing that happens without player input, or None."""
+        engine = self.engine
+        deadline = self.resolve_at if engine.pending_move is not None else None
+        if engine.timer_active:
+            time_up = self.clock + engine.time_left
+            deadline = time_up if deadline is None else min(deadline, time_up)
+        return deadline
+
+    def move(self, client, col):
+        """A seated client's pane choice; only the current player may move."""
+        engine = self.engine
+        if engine is None or engine.game_over_flag:
+            client.send({'event': 'error', 'reason': 'not_started'})
+            return
+        current = engine.current_player
+        if current is None or self.clients[current.index] is not client:
+            client.send({'event': EVENT_INVALID_MOVE, 'reason': 'not_your_turn'})
+            return
+        self._advance(asyncio.get_running_loop().time()) # Bring the timer up to date so the step starts from now
+        engine.attempt_move(col)
+
+    async def run(self):
+        """
+        The room coroutine: sleeps until the next deadline or move, lands steps
+        MOVE_DURATION after they start and records how late each deadline wake-up was.
+        """
+        loop = asyncio.get_running_loop()
+        engine = self.engine
+        latency = self.server.latency
+        engine.start()
+        try:
+            while not engine.game_over_flag:
+                self._skip_absent_players()
+                if engine.game_over_flag:
+                    break
+                deadline = self._next_deadline()
+                self._wakeup = loop.create_future()
+                timer = loop.call_at(deadline, self._wake) if deadline is not None else None
+                await self._wakeup
+                if timer is not None:
+                    timer.cancel()
+                now = loop.time()
+                if deadline is not None and now >= deadline:
+                    latency.record(now - deadline)
+                if engine.pending_move is not None and now >= self.resolve_at:
+                    self._advance(self.resolve_at) # The step lands before any time after it is counted
+                    engine.resolve_move()
+                self._advance(now)
+        finally:
+            self._wakeup = None
+            self.server.finish_room(self)
+
+
+class BridgeServer:
+    """
+    Accepts TCP clients and keeps the rooms they join.
+    """
+    def __init__(self, room_size=DEFAULT_ROOM_SIZE, max_players=None, bridge_length=DEFAULT_BRIDGE_LENGTH,
+                 time_limit=DEFAULT_TIME_LIMIT, columns=2, safe_per_row=1, seed=None):
+        self.room_size = room_size
+        self.max_players = max_players or room_size
+        self.bridge_length = bridge_length
+        self.time_limit = time_limit
+        self.columns = columns
+        self.safe_per_row = safe_per_row
+        self.rng = random.Random(seed)
+        self.rooms = {} # room id -> Room
+        self.clients = {} # Open ClientConnection -> its handler task
+        self.latency = LatencyHistogram()
+        self.games_finished = 0
+        self.games_abandoned = 0 # Rooms closed mid-game because every client left
+        self.server = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE_BYTES, backlog=LISTEN_BACKLOG)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+        for client in list(self.clients):
+            client.close()
+        # Let the handlers see their connections close before the loop goes away
+        await asyncio.gather(*self.clients.values(), return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+        for room in list(self.rooms.values()):
+            if room.task is not None:
+                room.task.cancel()
+
+    def close_room(self, room):
+        if self.rooms.get(room.room_id) is room:
+            del self.rooms[room.room_id]
+
+    def finish_room(self, room):
+        if room.engine.game_over_flag:
+            self.games_finished += 1
+        else:
+            self.games_abandoned += 1
+        self.close_room(room)
+        for client in room.clients:
+            if client is not None and client.room is room:
+                client.room = None
+                client.player_index = None
+
+    def stats(self):
+        return {'rooms': len(self.rooms), 'games_finished': self.games_finished, 'games_abandoned': self.games_abandoned,
+                'tick_latency': self.latency.summary()}
+
+    async def handle_client(self, reader, writer):
+        client = ClientConnection(writer)
+        self.clients[client] = asyncio.current_task()
+        try:
+            while not client.closed:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    client.send({'event': 'error', 'reason': 'line_too_long'})
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    op = message['op']
+                except (ValueError, KeyError, TypeError):
+                    client.send({'event': 'error', 'reason': 'bad_message'})
+                    continue
+                self.handle_message(client, op, message)
+        except ConnectionError:
+            pass
+        finally:
+            if client.room is not None:
+                client.room.leave(client)
+            client.close()
+            self.clients.pop(client, None)
+
+    def handle_message(self, client, op, message):
+        room = client.room
+        if op == "join":
+            if room is not None:
+                client.send({'event': 'error', 'reason': 'already_in_room'})
+                return
+            room_id = str(message.get('room', ''))[:64]
+            room = self.rooms.get(room_id)
+            if room is None:
+                room = self.rooms[room_id] = Room(self, room_id)
+            index = room.seat(client, message.get('name', 'Player'))
+            if index is None:
+                client.send({'event': 'error', 'reason': 'room_closed'})
+                return
+            client.room, client.player_index = room, index
+            client.send({'event': 'joined', 'room': room_id, 'player': index, 'columns': self.columns,
+                         'bridge_length': self.bridge_length, 'time_limit': self.time_limit})
+            if len(room.names) >= self.room_size:
+                room.start()
+        elif op == "start":
+            if room is None:
+                client.send({'event': 'error', 'reason': 'not_in_room'})
+            else:
+                room.start()
+        elif op == "move":
+            if room is None:
+                client.send({'event': 'error', 'reason': 'not_in_room'})
+                return
+            col = message.get('col')
+            if not isinstance(col, int) or isinstance(col, bool):
+                client.send({'event': EVENT_INVALID_MOVE, 'reason': 'invalid_column'})
+                return
+            room.move(client, col)
+        elif op == "leave":
+            if room is not None:
+                room.leave(client)
+                client.room = client.player_index = None
+        elif op == "stats":
+            client.send(dict(self.stats(), event='stats'))
+        else:
+            client.send({'event': 'error', 'reason': 'unknown_op'})
+
+
+# --- Loopback bot clients (load testing) ---
+async def bot_client(host, port, room_id, name, rng):
+    """
+    Joins room_id and plays like choose_remembered_or_random until the game ends.
+    Returns True if this player crossed.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(json.dumps({'op': 'join', 'room': room_id, 'name': name}).encode() + b"\n")
+    me = None
+    columns = 2
+    bridge_length = 0
+    safe_columns = {} # row -> column seen holding
+    broken = {} # row -> columns seen breaking
+    row = -1
+    crossed = False
+
+    def choose():
+        next_row = row + 1
+        if next_row in safe_columns:
+            return safe_columns[next_row]
+        untried = [col for col in range(columns) if col not in broken.get(next_row, ())]
+        return rng.choice(untried)
+
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            event = message['event']
+            if event == 'joined':
+                me, columns, bridge_length = message['player'], message['columns'], message['bridge_length']
+            elif event == 'seated':
+                me = message['player']
+            elif event == EVENT_TILE_SAFE:
+                safe_columns[message['row']] = message['col']
+                if message['player'] == me and message['row'] < bridge_length - 1:
+                    row = message['row']
+                    writer.write(json.dumps({'op': 'move', 'col': choose()}).encode() + b"\n")
+            elif event == EVENT_TILE_BROKEN:
+                broken.setdefault(message['row'], set()).add(message['col'])
+            elif event == EVENT_TURN_STARTED and message['player'] == me:
+                writer.write(json.dumps({'op': 'move', 'col': choose()}).encode() + b"\n")
+            elif event == EVENT_PLAYER_CROSSED and message['player'] == me:
+                crossed = True
+            elif event == EVENT_GAME_OVER:
+                break
+            elif event == 'error':
+                print(f"WARNING: {name} got error {message['reason']}")
+    finally:
+        writer.close()
+    return crossed
+
+
+async def _client_swarm(port, num_rooms, room_size, seed):
+    rng = random.Random(seed)
+    clients = [bot_client(DEFAULT_HOST, port, f"room-{room}", f"Player {seat + 1}", random.Random(rng.getrandbits(64)))
+               for room in range(num_rooms) for seat in range(room_size)]
+    return sum(await asyncio.gather(*clients))
+
+
+def _run_client_swarm(port, num_rooms, room_size, seed):
+    """Client process entry point: plays every bot and returns how many crossed."""
+    return asyncio.run(_client_swarm(port, num_rooms, room_size, seed))
+
+
+async def run_loopback(num_rooms, room_size=DEFAULT_ROOM_SIZE, seed=0, **game_options):
+    """
+    Starts a server on an ephemeral loopback port, fills num_rooms rooms with bot
+    clients, waits for every game to finish and returns the server stats.
+    The bots run in a separate process so they do not add to the server's latency.
+    """
+    server = BridgeServer(room_size=room_size, seed=seed, **game_options)
+    port = await server.start(DEFAULT_HOST, 0)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        crossed = await asyncio.get_running_loop().run_in_executor(
+            executor, _run_client_swarm, port, num_rooms, room_size, seed)
+    report = server.stats()
+    report['clients'] = num_rooms * room_size
+    report['players_crossed'] = crossed
+    report['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    await server.close()
+    return report
+
+
+async def serve(host, port, **options):
+    server = BridgeServer(**options)
+    port = await server.start(host, port)
+    print(f"DEBUG: Glass Bridge server listening on {host}:{port}")
+    while True:
+        await asyncio.sleep(REPORT_INTERVAL)
+        print(f"DEBUG: {json.dumps(server.stats())}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Host many Glass Bridge games over TCP (newline-delimited JSON).")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--room-size", type=int, default=DEFAULT_ROOM_SIZE)
+    parser.add_argument("--bridge-length", type=int, default=DEFAULT_BRIDGE_LENGTH)
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT)
+    parser.add_argument("--columns", type=int, default=2)
+    parser.add_argument("--safe-per-row", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--loopback", type=int, default=None, metavar="ROOMS",
+                        help="Run ROOMS full rooms of local bot clients, print the latency report and exit")
+    args = parser.parse_args()
+    options = dict(bridge_length=args.bridge_length, time_limit=args.time_limit,
+                   columns=args.columns, safe_per_row=args.safe_per_row)
+
+    if args.loopback is not None:
+        print(json.dumps(asyncio.run(run_loopback(args.loopback, args.room_size, args.seed or 0, **options)), indent=2))
+    else:
+        asyncio.run(serve(args.host, args.port, room_size=args.room_size, seed=args.seed, **options))
@@ -0,0 +1,180 @@
+"""
+Vectorized Monte Carlo simulator for Glass Bridge outcomes.
+
+Plays whole batches of games as NumPy array operations instead of one
+BridgeEngine game at a time. Players follow the same rules and the same
+strategy as bridge_engine.choose_remembered_or_random: proven rows are walked
+safely and every unrevealed row is a coin flip for whoever reaches it first.
+Every step costs MOVE_DURATION seconds of the shared time limit.
+
+Used to tune difficulty (bridge_length, player count, time_limit) from
+millions of samples.
+"""
+import math
+
+import numpy as np
+
+from bridge_engine import DEFAULT_BRIDGE_LENGTH, DEFAULT_TIME_LIMIT, MOVE_DURATION
+
+DEFAULT_CHUNK_SIZE = 1 << 18 # Games simulated per array batch (bounds peak memory)
+
+
+def step_budget_for(time_limit, move_duration=MOVE_DURATION):
+    """
+    Number of steps that fit in time_limit. The engine resolves the step that
+    empties the timer before time runs out, hence the ceiling.
+    Returns None for an unlimited game.
+    """
+    if time_limit is None:
+        return None
+    return max(0, math.ceil(time_limit / move_duration - 1e-9))
+
+
+class SimulationResult:
+    """
+    Aggregated outcome counts of many simulated games.
+    Results from separate batches can be combined with merge().
+    """
+    def __init__(self, num_players, bridge_length, step_budget):
+        self.num_players = num_players
+        self.bridge_length = bridge_length
+        self.step_budget = step_budget
+        self.games = 0
+        self.survivor_counts = np.zeros(num_players + 1, dtype=np.int64) # games by number of survivors
+        self.crossed_by_position = np.zeros(num_players, dtype=np.int64) # crossings by queue position
+        self.steps_counts = np.zeros(num_players * bridge_length + 1, dtype=np.int64) # games by total steps taken
+        self.time_limit_hits = 0
+
+    def merge(self, other):
+        """Adds the counts of another result with the same parameters."""
+        if (other.num_players, other.bridge_length, other.step_budget) != (self.num_players, self.bridge_length, self.step_budget):
+            raise ValueError("Cannot merge simulation results for different game parameters")
+        self.games += other.games
+        self.survivor_counts += other.survivor_counts
+        self.crossed_by_position += other.crossed_by_position
+        self.steps_counts += other.steps_counts
+        self.time_limit_hits += other.time_limit_hits
+        return self
+
+    def survivor_distribution(self):
+        """Probability of each survivor count, indexed 0..num_players."""
+        return self.survivor_counts / max(self.games, 1)
+
+    def position_survival_rate(self):
+        """Probability that the player at each queue position crosses."""
+        return self.crossed_by_position / max(self.games, 1)
+
+    def steps_distribution(self):
+        """Probability of each total step count, indexed 0..num_players * bridge_length."""
+        return self.steps_counts / max(self.games, 1)
+
+    def mean_survivors(self):
+        return float(np.dot(np.arange(self.num_players + 1), self.survivor_counts)) / max(self.games, 1)
+
+    def mean_steps(self):
+        return float(np.dot(np.arange(self.steps_counts.size), self.steps_counts)) / max(self.games, 1)
+
+    def time_limit_hit_rate(self):
+        return self.time_limit_hits / max(self.games, 1)
+
+    def summary(self):
+        """Plain-dict report, suitable for printing or json.dumps."""
+        return {
+            'games': self.games,
+            'num_players': self.num_players,
+            'bridge_length': self.bridge_length,
+            'step_budget': self.step_budget,
+            'mean_survivors': self.mean_survivors(),
+            'survivor_distribution': self.survivor_distribution().tolist(),
+            'position_survival_rate': self.position_survival_rate().tolist(),
+            'mean_steps': self.mean_steps(),
+            'time_limit_hit_rate': self.time_limit_hit_rate(),
+        }
+
+
+def simulate_chunk(rng, num_games, num_players, bridge_length, step_budget):
+    """
+    Simulates num_games games at once and returns their SimulationResult.
+    rng is a numpy.random.Generator.
+    """
+    result = SimulationResult(num_players, bridge_length, step_budget)
+    if num_games <= 0:
+        return result
+
+    # Bridge layouts and the frontier player's guesses, bit-packed: bit r is row r's column (0 left, 1 right)
+    packed_bytes = (bridge_length + 7) >> 3
+    safe_column_bits = rng.integers(0, 256, size=(num_games, packed_bytes), dtype=np.uint8)
+    guessed_column_bits = rng.integers(0, 256, size=(num_games, packed_bytes), dtype=np.uint8)
+    # With two panes every unrevealed row is revealed by exactly one guess,
+    # so a row eliminates a player exactly when that guess is wrong.
+    breaks = np.unpackbits(safe_column_bits ^ guessed_column_bits, axis=1, count=bridge_length, bitorder='little').view(bool)
+
+    # The k-th break (0-based) eliminates the player at queue position k on that row
+    breaks_so_far = np.cumsum(breaks, axis=1, dtype=np.int32)
+    game_idx, row_idx = np.nonzero(breaks)
+    position = breaks_so_far[game_idx, row_idx] - 1
+    in_queue = position < num_players
+    death_row = np.full((num_games, num_players), bridge_length, dtype=np.int32) # bridge_length means crossed
+    death_row[game_idx[in_queue], position[in_queue]] = row_idx[in_queue]
+
+    # Each player walks from the platform to the row they fall on, or across all rows
+    steps = np.where(death_row < bridge_length, death_row + 1, bridge_length)
+    steps_end = np.cumsum(steps, axis=1, dtype=np.int64) # Turns are sequential, so the timer is shared
+    total_steps = steps_end[:, -1]
+
+    if step_budget is None:
+        finished = np.ones_like(death_row, dtype=bool)
+        time_limit_hit = np.zeros(num_games, dtype=bool)
+        steps_taken = total_steps
+    else:
+        finished = steps_end <= step_budget # Anyone still on the bridge when the timer expires is out
+        time_limit_hit = total_steps > step_budget
+        steps_taken = np.minimum(total_steps, step_budget)
+
+    crossed = (death_row == bridge_length) & finished
+    result.games = num_games
+    result.survivor_counts += np.bincount(crossed.sum(axis=1), minlength=num_players + 1)
+    result.crossed_by_position += crossed.sum(axis=0)
+    result.steps_counts += np.bincount(steps_taken, minlength=result.steps_counts.size)
+    result.time_limit_hits = int(time_limit_hit.sum())
+    return result
+
+
+def simulate_games(num_games, num_players=7, bridge_length=DEFAULT_BRIDGE_LENGTH, time_limit=DEFAULT_TIME_LIMIT,
+                   move_duration=MOVE_DURATION, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Monte Carlo estimate of game outcomes for the given difficulty settings.
+    time_limit=None plays without a timer. Returns a SimulationResult.
+    """
+    if num_players < 1 or bridge_length < 1:
+        raise ValueError("num_players and bridge_length must be at least 1")
+    rng = np.random.default_rng(seed)
+    step_budget = step_budget_for(time_limit, move_duration)
+    result = SimulationResult(num_players, bridge_length, step_budget)
+
+    remaining = num_games
+    while remaining > 0:
+        batch = min(chunk_size, remaining)
+        result.merge(simulate_chunk(rng, batch, num_players, bridge_length, step_budget))
+        remaining -= batch
+    return result
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of Glass Bridge outcomes.")
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--players", type=int, default=7)
+    parser.add_argument("--bridge-length", type=int, default=DEFAULT_BRIDGE_LENGTH)
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT, help="Seconds; 0 for no time limit")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    sim = simulate_games(args.games, args.players, args.bridge_length, args.time_limit or None, seed=args.seed)
+    report = sim.summary()
+    report['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,487 @@
+"""
+Storage backends for Glass Bridge game data.
+
+The game only talks to a Storage: it creates the tables, logs users in,
+saves sessions and loads layouts through the methods below and never sees
+SQL. Two backends implement it:
+
+    MySQLStorage   the MySQL server in DB_CONFIG, through bridge_db's pool
+    SQLiteStorage  an embedded SQLite file in WAL mode; no server to run
+
+Writes take a cursor so that several of them can share one transaction:
+run(operation) calls operation(cursor) in a transaction and commits, which
+is what SessionWriter batches its jobs with.
+
+Schema changes made after the original tables are versioned: create_tables()
+applies each entry of MIGRATIONS the database has not seen yet and records
+it in schema_migrations. query_plan() asks the backend how it would run one
+of the queries below, which bridge_storage_benchmark.py uses to check that
+they stay index-backed as the tables grow.
+
+The SQLite backend keeps its own file (glass_bridge.sqlite3 by default). The
+older game_sessions.db next to the game has an unrelated schema and is not
+touched.
+"""
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+from mysql.connector import Error as MySQLError
+
+from bridge_db import Database
+
+STORAGE_BACKENDS = ('mysql', 'sqlite')
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "glass_bridge.sqlite3")
+INSERT_BATCH_ROWS = 1000 # Rows per multi-row INSERT; keeps each statement well under MySQL's max_allowed_packet
+
+# Errors either backend raises for database problems
+STORAGE_ERRORS = (MySQLError, sqlite3.Error)
+
+# The lookups the game and its tools run most, with %s placeholders
+FIND_USER_SQL = "SELECT id FROM users WHERE email = %s OR username = %s"
+SESSION_LAYOUT_SQL = "SELECT bridge_layout_seed, bridge_layout_json FROM game_sessions WHERE id = %s"
+SESSIONS_BETWEEN_SQL = '''
+    SELECT id, start_time, duration_seconds, time_limit_reached FROM game_sessions
+    WHERE start_time >= %s AND start_time < %s ORDER BY start_time
+'''
+BRIDGE_TILES_SQL = '''
+    SELECT row_index, column_index, is_safe FROM bridge_info
+    WHERE game_session_id = %s ORDER BY row_index, column_index
+'''
+
+
+def _index_session_lookups(storage, cursor):
+    # Reports pick sessions by time range, and a session's tiles are read back in bridge order.
+    # users needs nothing new: its UNIQUE email and username keys already serve FIND_USER_SQL.
+    storage.create_index(cursor, 'game_sessions', 'idx_game_sessions_start_time', ('start_time',))
+    storage.create_index(cursor, 'bridge_info', 'idx_bridge_info_session_tile',
+                         ('game_session_id', 'row_index', 'column_index'))
+
+
+# Versioned schema changes, oldest first: (version, description, apply(storage, cursor)).
+# Never edit an entry once released; add a new version instead.
+MIGRATIONS = [
+    (1, "Index game_sessions by start_time and bridge_info by session", _index_session_lookups),
+]
+
+# Applied to every SQLite connection. WAL lets readers run while the session writer
+# commits; synchronous=NORMAL only fsyncs at checkpoints, which is still crash-safe in WAL mode.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'busy_timeout': 5000, # Milliseconds to wait for another connection's write lock
+    'cache_size': -16384, # 16 MiB of page cache
+    'temp_store': 'MEMORY',
+    'mmap_size': 64 * 1024 * 1024,
+}
+
+
+class Storage:
+    """
+    Interface shared by the backends. SQL here is written with %s placeholders
+    and MySQL's dialect; backends override what their database does differently.
+    """
+    name = None
+    insert_ignore = "INSERT IGNORE"
+
+    # --- Transactions ---
+    def run(self, operation):
+        """Calls operation(cursor) in one transaction, commits and returns its result; rolls back and raises on error."""
+        raise NotImplementedError
+
+    def sql(self, statement):
+        """statement with the backend's placeholder style."""
+        return statement
+
+    def fetchone(self, statement, params=()):
+        def operation(cursor):
+            cursor.execute(self.sql(statement), params)
+            return cursor.fetchone()
+        return self.run(operation)
+
+    def fetchall(self, statement, params=()):
+        def operation(cursor):
+            cursor.execute(self.sql(statement), params)
+            return cursor.fetchall()
+        return self.run(operation)
+
+    def ping(self):
+        """True if the database can be reached."""
+        try:
+            return self.fetchone("SELECT 1") is not None
+        except STORAGE_ERRORS:
+            return False
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+    # --- Schema ---
+    def create_tables(self, migrate=True):
+        """
+        Creates the game_sessions, staff, bridge_info and users tables if they don't exist,
+        then (unless migrate=False) applies the pending MIGRATIONS.
+        """
+        self.run(self._create_tables)
+        if migrate:
+            self.migrate()
+
+    def _create_tables(self, cursor):
+        raise NotImplementedError
+
+    def schema_version(self):
+        """The newest migration applied, or 0."""
+        self.run(self._create_migrations_table)
+        return self.fetchone("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")[0]
+
+    def migrate(self):
+        """Applies the MIGRATIONS this database has not seen, each in its own transaction. Returns their versions."""
+        current = self.schema_version()
+        applied = []
+        for version, description, apply in MIGRATIONS:
+            if version <= current:
+                continue
+            def operation(cursor, version=version, description=description, apply=apply):
+                apply(self, cursor)
+                cursor.execute(self.sql("INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, %s)"),
+                               (version, description, datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            self.run(operation)
+            print(f"DEBUG: Applied schema migration {version}: {description}")
+            applied.append(version)
+        return applied
+
+    @staticmethod
+    def _create_migrations_table(cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at DATETIME NOT NULL
+            )
+        ''')
+
+    def create_index(self, cursor, table, name, columns):
+        """Creates index name on table (columns) unless it exists."""
+        raise NotImplementedError
+
+    def query_plan(self, statement, params=()):
+        """
+        How the backend would run statement, as (index_backed, plan lines).
+        index_backed is False if any table would be read with a full scan.
+        """
+        raise NotImplementedError
+
+    # --- Users ---
+    def find_or_register_user(self, username, email, password):
+        """
+        Returns True if a user with this email or username exists, otherwise
+        registers them and returns False. Both happen in one transaction.
+        """
+        def operation(cursor):
+            cursor.execute(self.sql(FIND_USER_SQL), (email, username))
+            if cursor.fetchone():
+                return True
+            cursor.execute(self.sql("INSERT INTO users (username, email, password) VALUES (%s, %s, %s)"),
+                           (username, email, password))
+            return False
+        return self.run(operation)
+
+    # --- Game sessions ---
+    def session_layout_record(self, game_session_id):
+        """(bridge_layout_seed, bridge_layout_json) of a stored session, or None."""
+        return self.fetchone(SESSION_LAYOUT_SQL, (game_session_id,))
+
+    def sessions_between(self, start_time, end_time):
+        """(id, start_time, duration_seconds, time_limit_reached) of the sessions started in [start_time, end_time), oldest first."""
+        return self.fetchall(SESSIONS_BETWEEN_SQL, (start_time, end_time))
+
+    def bridge_tiles(self, game_session_id):
+        """(row_index, column_index, is_safe) of a session's stored bridge_info rows, in bridge order."""
+        return self.fetchall(BRIDGE_TILES_SQL, (game_session_id,))
+
+    def insert_session(self, cursor, start_time, players_json, layout_key, layout_json):
+        """Inserts a game_sessions row and returns its id."""
+        cursor.execute(self.sql('''
+            INSERT INTO game_sessions (start_time, players_selected_json, bridge_layout_seed, bridge_layout_json)
+            VALUES (%s, %s, %s, %s)
+        '''), (start_time, players_json, layout_key, layout_json))
+        return cursor.lastrowid
+
+    def update_session_results(self, cursor, session_id, end_time, duration, crossed_json, fallen_json, time_limit_reached):
+        cursor.execute(self.sql('''
+            UPDATE game_sessions
+            SET end_time = %s,
+                duration_seconds = %s,
+                players_crossed_json = %s,
+                players_fallen_json = %s,
+                time_limit_reached = %s
+            WHERE id = %s
+        '''), (end_time, duration, crossed_json, fallen_json, 1 if time_limit_reached else 0, session_id))
+
+    def insert_rows(self, cursor, table, columns, rows, ignore=False, batch_rows=INSERT_BATCH_ROWS):
+        """
+        Inserts rows (tuples in the order of columns) with one multi-row INSERT per
+        batch_rows rows instead of one statement per row. Does not commit.
+        Returns (rows written, statements sent); ignore=True skips rows that break a
+        unique key and does not count them as written.
+        """
+        rows = list(rows)
+        column_list = ", ".join(columns)
+        row_placeholders = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        verb = self.insert_ignore if ignore else "INSERT"
+        written = statements = 0
+        for start in range(0, len(rows), batch_rows):
+            batch = rows[start:start + batch_rows]
+            cursor.execute(self.sql(f"{verb} INTO {table} ({column_list}) VALUES {', '.join([row_placeholders] * len(batch))}"),
+                           [value for row in batch for value in row])
+            written += max(cursor.rowcount, 0)
+            statements += 1
+        return written, statements
+
+
+class MySQLStorage(Storage):
+    """The MySQL server described by config (mysql.connector.connect arguments), through a bridge_db.Database pool."""
+    name = 'mysql'
+
+    def __init__(self, config, **pool_options):
+        self.database = Database(config, **pool_options)
+
+    def run(self, operation):
+        return self.database.run(operation)
+
+    def stats(self):
+        return self.database.stats()
+
+    def close(self):
+        self.database.close()
+
+    def _create_tables(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS game_sessions (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                start_time DATETIME NOT NULL,
+                end_time DATETIME,
+                duration_seconds DECIMAL(10, 2),
+                players_selected_json TEXT,
+                players_crossed_json TEXT,
+                players_fallen_json TEXT,
+                time_limit_reached BOOLEAN,
+                bridge_layout_json TEXT,
+                bridge_layout_seed VARCHAR(64)
+            )
+        ''')
+        # Tables created before seeded layouts existed lack the seed column
+        self._add_column_if_missing(cursor, 'game_sessions', 'bridge_layout_seed', 'VARCHAR(64)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS staff (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                role VARCHAR(255),
+                staff_id VARCHAR(50) UNIQUE
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS bridge_info (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                game_session_id INT NOT NULL,
+                row_index INT NOT NULL,
+                column_index INT NOT NULL,
+                is_safe BOOLEAN NOT NULL,
+                FOREIGN KEY (game_session_id) REFERENCES game_sessions(id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                username VARCHAR(255) UNIQUE NOT NULL,
+                email VARCHAR(255) UNIQUE NOT NULL,
+                password VARCHAR(255) NOT NULL
+            )
+        ''')
+
+    @staticmethod
+    def _add_column_if_missing(cursor, table, column, definition):
+        cursor.execute('''
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        ''', (table, column))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            print(f"DEBUG: Added column '{column}' to table '{table}'.")
+
+    def create_index(self, cursor, table, name, columns):
+        # MySQL has no CREATE INDEX IF NOT EXISTS, and DDL commits on its own, so a
+        # migration that stopped halfway must be safe to run again
+        cursor.execute('''
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        ''', (table, name))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+
+    def query_plan(self, statement, params=()):
+        def operation(cursor):
+            cursor.execute("EXPLAIN " + statement, params)
+            names = [column[0] for column in cursor.description]
+            return [dict(zip(names, row)) for row in cursor.fetchall()]
+        rows = self.run(operation)
+        # type ALL is a full table scan; an OR over two unique keys shows up as index_merge
+        index_backed = all(row.get('type') != 'ALL' and row.get('key') for row in rows if row.get('table'))
+        lines = [f"{row.get('table')}: type={row.get('type')} key={row.get('key')} rows={row.get('rows')} "
+                 f"{row.get('Extra') or ''}".strip() for row in rows]
+        return index_backed, lines
+
+
+class SQLiteStorage(Storage):
+    """
+    An embedded SQLite database at path, in WAL mode with SQLITE_PRAGMAS.
+    Each thread gets its own connection; write transactions start with
+    BEGIN IMMEDIATE so they queue on the write lock (up to busy_timeout)
+    instead of failing halfway through.
+    """
+    name = 'sqlite'
+    insert_ignore = "INSERT OR IGNORE"
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, pragmas=None):
+        self.path = path
+        self.pragmas = dict(SQLITE_PRAGMAS, **(pragmas or {}))
+        self._local = threading.local()
+        self._connections = [] # Every thread's connection, so close() can reach them
+        self._lock = threading.Lock()
+        self.transactions = 0
+        self.busy_seconds = 0.0
+        self._connection() # Fail now, not at the first write, if the file cannot be opened
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Autocommit mode: run() issues BEGIN/COMMIT itself
+            connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            for pragma, value in self.pragmas.items():
+                connection.execute(f"PRAGMA {pragma} = {value}")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def sql(self, statement):
+        return statement.replace("%s", "?")
+
+    def run(self, operation):
+        connection = self._connection()
+        started = time.perf_counter()
+        cursor = connection.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = operation(cursor)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            return result
+        finally:
+            cursor.close()
+            elapsed = time.perf_counter() - started
+            with self._lock: # run() is called from the game thread and the session writer at once
+                self.transactions += 1
+                self.busy_seconds += elapsed
+
+    def fetchone(self, statement, params=()):
+        # Reads need no write lock; in WAL mode they see the last committed state
+        return self._connection().execute(self.sql(statement), params).fetchone()
+
+    def fetchall(self, statement, params=()):
+        return self._connection().execute(self.sql(statement), params).fetchall()
+
+    def migrate(self):
+        applied = super().migrate()
+        if applied:
+            self._connection().execute("PRAGMA optimize") # Gathers statistics for the new indexes
+        return applied
+
+    def create_index(self, cursor, table, name, columns):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+    def query_plan(self, statement, params=()):
+        rows = self._connection().execute("EXPLAIN QUERY PLAN " + self.sql(statement), params).fetchall()
+        lines = [row[3] for row in rows]
+        # "SCAN t" reads the whole table; "SCAN t USING INDEX i" walks an index in order
+        index_backed = not any(line.startswith("SCAN ") and " USING " not in line for line in lines)
+        return index_backed, lines
+
+    def insert_rows(self, cursor, table, columns, rows, ignore=False, batch_rows=INSERT_BATCH_ROWS):
+        """
+        Same contract as Storage.insert_rows. There are no round trips to save, so the
+        rows go through executemany with one prepared statement.
+        """
+        placeholders = ", ".join(["?"] * len(columns))
+        verb = self.insert_ignore if ignore else "INSERT"
+        cursor.executemany(f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+        return max(cursor.rowcount, 0), 1
+
+    def stats(self):
+        with self._lock:
+            return {'path': self.path, 'transactions': self.transactions, 'busy_seconds': round(self.busy_seconds, 6)}
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _create_tables(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS game_sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                start_time TEXT NOT NULL,
+                end_time TEXT,
+                duration_seconds REAL,
+                players_selected_json TEXT,
+                players_crossed_json TEXT,
+                players_fallen_json TEXT,
+                time_limit_reached INTEGER,
+                bridge_layout_json TEXT,
+                bridge_layout_seed TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS staff (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                role TEXT,
+                staff_id TEXT UNIQUE
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS bridge_info (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                game_session_id INTEGER NOT NULL REFERENCES game_sessions(id),
+                row_index INTEGER NOT NULL,
+                column_index INTEGER NOT NULL,
+                is_safe INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL
+            )
+        ''')
+
+
+def open_storage(backend, mysql_config=None, sqlite_path=DEFAULT_SQLITE_PATH):
+    """Opens the named backend ('mysql' or 'sqlite')."""
+    if backend == 'mysql':
+        return MySQLStorage(mysql_config)
+    if backend == 'sqlite':
+        return SQLiteStorage(sqlite_path)
+    raise ValueError(f"Unknown storage backend '{backend}'. Choose from: {', '.join(STORAGE_BACKENDS)}")
@@ -0,0 +1,187 @@
+"""
+Index and query-plan benchmark for the Glass Bridge storage backends.
+
+Creates the original tables without migrating them, loads synthetic data (a
+million game sessions by default, start times spread over a year in random
+order, tiles for every Nth session and a set of users), then for each common
+query reports the backend's plan, whether it is index-backed and its median
+time. Then it applies the pending MIGRATIONS, timing the index build, and
+measures again. Output is JSON; the exit status is 1 if any query still
+needs a full table scan after migrating:
+
+    python bridge_storage_benchmark.py --storage sqlite --sessions 1000000
+
+SQLite runs against a fresh temporary file unless --sqlite-path is given.
+MySQL uses DB_CONFIG from bridge_game and refuses to run unless game_sessions
+is empty, since the synthetic rows are left behind.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+from bridge_storage import (BRIDGE_TILES_SQL, FIND_USER_SQL, SESSION_LAYOUT_SQL, SESSIONS_BETWEEN_SQL, STORAGE_BACKENDS,
+                            open_storage)
+
+DEFAULT_SESSIONS = 1000000
+DEFAULT_TILES_EVERY = 10 # Every Nth session has stored bridge_info rows
+DEFAULT_BRIDGE_LENGTH = 10
+DEFAULT_USERS = 100000
+DEFAULT_REPEAT = 50 # Runs of each query per measurement
+LOAD_CHUNK = 20000 # Sessions per loading transaction
+WINDOW_SECONDS = 86400 # Time range picked by the sessions_between query
+EPOCH = 1704067200 # 2024-01-01 00:00:00 UTC; sessions start within the year after
+YEAR_SECONDS = 365 * 86400
+
+
+def _timestamp(seconds):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(seconds))
+
+
+def load_synthetic(storage, sessions, tiles_every, bridge_length, users, rng):
+    """Bulk-loads the synthetic rows in chunked transactions. Returns the ids of the sessions that have tiles."""
+    with_tiles = []
+    for first in range(1, sessions + 1, LOAD_CHUNK):
+        ids = range(first, min(first + LOAD_CHUNK, sessions + 1))
+        session_rows = []
+        tile_rows = []
+        for session_id in ids:
+            start = EPOCH + rng.randrange(YEAR_SECONDS)
+            duration = round(rng.uniform(20.0, 120.0), 2)
+            session_rows.append((session_id, _timestamp(start), _timestamp(start + int(duration)), duration,
+                                 1 if rng.random() < 0.3 else 0, f"layout-{session_id}"))
+            if session_id % tiles_every == 0:
+                with_tiles.append(session_id)
+                for row in range(bridge_length):
+                    safe = rng.randrange(2)
+                    tile_rows.append((session_id, row, 0, 1 if safe == 0 else 0))
+                    tile_rows.append((session_id, row, 1, 1 if safe == 1 else 0))
+
+        def operation(cursor, session_rows=session_rows, tile_rows=tile_rows):
+            storage.insert_rows(cursor, 'game_sessions', ('id', 'start_time', 'end_time', 'duration_seconds',
+                                                          'time_limit_reached', 'bridge_layout_seed'), session_rows)
+            if tile_rows:
+                storage.insert_rows(cursor, 'bridge_info', ('game_session_id', 'row_index', 'column_index', 'is_safe'),
+                                    tile_rows)
+        storage.run(operation)
+
+    for first in range(0, users, LOAD_CHUNK):
+        user_rows = [(f"player{n}", f"player{n}@example.com", "x") for n in range(first, min(first + LOAD_CHUNK, users))]
+        storage.run(lambda cursor, user_rows=user_rows: storage.insert_rows(
+            cursor, 'users', ('username', 'email', 'password'), user_rows))
+    return with_tiles
+
+
+def common_queries(sessions, with_tiles, users, rng):
+    """name -> (statement, a function returning fresh parameters) for the queries the game and reports run."""
+    def window():
+        start = EPOCH + rng.randrange(YEAR_SECONDS - WINDOW_SECONDS)
+        return (_timestamp(start), _timestamp(start + WINDOW_SECONDS))
+
+    def user():
+        n = rng.randrange(max(users, 1))
+        return (f"player{n}@example.com", f"player{n}")
+
+    return {
+        'sessions_between': (SESSIONS_BETWEEN_SQL, window),
+        'bridge_tiles': (BRIDGE_TILES_SQL, lambda: (rng.choice(with_tiles) if with_tiles else 1,)),
+        'find_user': (FIND_USER_SQL, user),
+        'session_layout': (SESSION_LAYOUT_SQL, lambda: (rng.randrange(1, sessions + 1),)),
+    }
+
+
+def measure(storage, queries, repeat):
+    """Plan, index_backed and median/max milliseconds of each query."""
+    results = {}
+    for name, (statement, params) in queries.items():
+        index_backed, plan = storage.query_plan(statement, params())
+        timings = []
+        rows = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows += len(storage.fetchall(statement, params()))
+            timings.append((time.perf_counter() - started) * 1000.0)
+        results[name] = {'index_backed': index_backed, 'plan': plan, 'median_ms': round(statistics.median(timings), 3),
+                         'max_ms': round(max(timings), 3), 'mean_rows': round(rows / repeat, 1)}
+    return results
+
+
+def run_benchmark(backend, sessions=DEFAULT_SESSIONS, tiles_every=DEFAULT_TILES_EVERY, bridge_length=DEFAULT_BRIDGE_LENGTH,
+                  users=DEFAULT_USERS, repeat=DEFAULT_REPEAT, sqlite_path=None, seed=0, verbose=False):
+    rng = random.Random(seed)
+    temporary = backend == 'sqlite' and sqlite_path is None
+    if temporary:
+        handle, sqlite_path = tempfile.mkstemp(prefix="glass_bridge_bench_", suffix=".sqlite3")
+        os.close(handle)
+    mysql_config = None
+    if backend == 'mysql':
+        from bridge_game import DB_CONFIG
+        mysql_config = DB_CONFIG
+
+    sink = sys.stderr if verbose else open(os.devnull, 'w') # Keeps stdout for the JSON report
+    storage = open_storage(backend, mysql_config, sqlite_path)
+    try:
+        with redirect_stdout(sink):
+            storage.create_tables(migrate=False)
+            if storage.fetchone("SELECT COUNT(*) FROM game_sessions")[0]:
+                raise SystemExit("ERROR: game_sessions is not empty; run the benchmark against an empty database.")
+
+            started = time.perf_counter()
+            with_tiles = load_synthetic(storage, sessions, tiles_every, bridge_length, users, rng)
+            load_seconds = time.perf_counter() - started
+
+            queries = common_queries(sessions, with_tiles, users, rng)
+            before = measure(storage, queries, repeat)
+
+            started = time.perf_counter()
+            applied = storage.migrate()
+            migrate_seconds = time.perf_counter() - started
+
+            after = measure(storage, queries, repeat)
+        return {
+            'storage': backend,
+            'sessions': sessions,
+            'sessions_with_tiles': len(with_tiles),
+            'bridge_info_rows': len(with_tiles) * bridge_length * 2,
+            'users': users,
+            'load_seconds': round(load_seconds, 3),
+            'migrations_applied': applied,
+            'schema_version': storage.schema_version(),
+            'migrate_seconds': round(migrate_seconds, 3),
+            'before_migration': before,
+            'after_migration': after,
+            'index_backed': all(result['index_backed'] for result in after.values()),
+        }
+    finally:
+        storage.close()
+        if sink is not sys.stderr:
+            sink.close()
+        if temporary:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(sqlite_path + suffix):
+                    os.remove(sqlite_path + suffix)
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Check that the common Glass Bridge queries stay index-backed at scale.")
+    parser.add_argument("--storage", choices=STORAGE_BACKENDS, default='sqlite')
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS, help="Synthetic game sessions to load")
+    parser.add_argument("--tiles-every", type=int, default=DEFAULT_TILES_EVERY, help="Store bridge_info for every Nth session")
+    parser.add_argument("--bridge-length", type=int, default=DEFAULT_BRIDGE_LENGTH, help="Rows per stored bridge")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Runs of each query per measurement")
+    parser.add_argument("--sqlite-path", default=None, help="Keep the SQLite database here instead of a temporary file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Show DEBUG output on stderr")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.storage, args.sessions, args.tiles_every, args.bridge_length, args.users, args.repeat,
+                           args.sqlite_path, args.seed, args.verbose)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report['index_backed'] else 1)
@@ -0,0 +1,141 @@
+"""
+Multi-process tournament runner for headless Glass Bridge games.
+
+Spreads BridgeEngine games across a ProcessPoolExecutor (one worker per core
+by default). Every game gets its own random stream derived from the
+tournament seed and the game's index, so any single game can be replayed with
+play_game(seed, game_index) no matter which worker or chunk originally ran it.
+Workers send back one aggregated SimulationResult per chunk, and the parent
+merges them as they complete.
+"""
+import hashlib
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from bridge_engine import BridgeEngine, DEFAULT_BRIDGE_LENGTH, DEFAULT_TIME_LIMIT, choose_remembered_or_random
+from bridge_simulation import SimulationResult, step_budget_for
+
+DEFAULT_CHUNK_SIZE = 20_000 # Games per worker task; large enough that IPC cost is negligible
+
+
+def game_seed(seed, game_index):
+    """
+    Derives the 64-bit seed of one game from the tournament seed and the game index.
+    Hashing keeps neighbouring games' streams independent.
+    """
+    digest = hashlib.blake2b(f"{seed}:{game_index}".encode("ascii"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def play_game(seed, game_index, num_players=7, bridge_length=DEFAULT_BRIDGE_LENGTH, time_limit=DEFAULT_TIME_LIMIT,
+              choose_column=choose_remembered_or_random, rng=None, columns=2, safe_per_row=1):
+    """
+    Plays (or replays) one tournament game and returns (engine, steps_taken).
+    Pass rng to reuse a random.Random instance; it is reseeded for this game.
+    """
+    if rng is None:
+        rng = random.Random()
+    rng.seed(game_seed(seed, game_index))
+    engine = BridgeEngine([f"Player {i+1}" for i in range(num_players)], bridge_length=bridge_length,
+                          time_limit=time_limit if time_limit is not None else float('inf'), rng=rng,
+                          columns=columns, safe_per_row=safe_per_row)
+    steps = 0
+
+    def counting_chooser(game):
+        nonlocal steps
+        steps += 1
+        return choose_column(game)
+
+    engine.autoplay(counting_chooser)
+    return engine, steps
+
+
+def run_chunk(seed, first_game, num_games, num_players, bridge_length, time_limit, columns=2, safe_per_row=1):
+    """
+    Worker task: plays games first_game .. first_game + num_games - 1 and aggregates them.
+    """
+    result = SimulationResult(num_players, bridge_length, step_budget_for(time_limit))
+    rng = random.Random() # One stream object per worker task, reseeded for every game
+    survivor_counts = result.survivor_counts
+    crossed_by_position = result.crossed_by_position
+    steps_counts = result.steps_counts
+    for game_index in range(first_game, first_game + num_games):
+        engine, steps = play_game(seed, game_index, num_players, bridge_length, time_limit, rng=rng,
+                                  columns=columns, safe_per_row=safe_per_row)
+        survivors = 0
+        for player in engine.players:
+            if player.crossed:
+                survivors += 1
+                crossed_by_position[player.index] += 1
+        survivor_counts[survivors] += 1
+        steps_counts[steps] += 1
+        result.time_limit_hits += engine.time_limit_reached
+    result.games = num_games
+    return result
+
+
+def run_tournament(num_games, num_players=7, bridge_length=DEFAULT_BRIDGE_LENGTH, time_limit=DEFAULT_TIME_LIMIT,
+                   seed=0, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, on_chunk=None, columns=2, safe_per_row=1):
+    """
+    Plays num_games games across worker processes and returns the merged SimulationResult.
+    on_chunk(result_so_far) is called in the parent after each chunk is merged.
+    """
+    workers = workers or os.cpu_count() or 1
+    total = SimulationResult(num_players, bridge_length, step_budget_for(time_limit))
+    chunks = ((first, min(chunk_size, num_games - first)) for first in range(0, num_games, chunk_size))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for first, count in chunks:
+            pending.add(executor.submit(run_chunk, seed, first, count, num_players, bridge_length, time_limit,
+                                        columns, safe_per_row))
+            # Keep a couple of tasks queued per worker so memory stays flat for huge sweeps
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+                    if on_chunk:
+                        on_chunk(total)
+        for future in wait(pending).done:
+            total.merge(future.result())
+            if on_chunk:
+                on_chunk(total)
+    return total
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Run a multi-process Glass Bridge tournament.")
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--players", type=int, default=7)
+    parser.add_argument("--bridge-length", type=int, default=DEFAULT_BRIDGE_LENGTH)
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT, help="Seconds; 0 for no time limit")
+    parser.add_argument("--columns", type=int, default=2, help="Panes per bridge row")
+    parser.add_argument("--safe-per-row", type=int, default=1, help="Safe panes per bridge row")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Defaults to one per core")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--replay", type=int, default=None, metavar="GAME_INDEX", help="Replay one game and print its outcome")
+    args = parser.parse_args()
+
+    if args.replay is not None:
+        engine, steps = play_game(args.seed, args.replay, args.players, args.bridge_length, args.time_limit or None,
+                                  columns=args.columns, safe_per_row=args.safe_per_row)
+        print(json.dumps({'game_index': args.replay, 'layout': engine.actual_bridge_layout.to_dict(), 'steps': steps,
+                          'winners': engine.winners(), 'fallen': engine.fallen_players(),
+                          'time_limit_reached': engine.time_limit_reached}, indent=2))
+    else:
+        started = time.perf_counter()
+        tournament = run_tournament(args.games, args.players, args.bridge_length, args.time_limit or None,
+                                    seed=args.seed, workers=args.workers, chunk_size=args.chunk_size,
+                                    columns=args.columns, safe_per_row=args.safe_per_row,
+                                    on_chunk=lambda so_far: print(f"DEBUG: {so_far.games}/{args.games} games merged"))
+        elapsed = time.perf_counter() - started
+        report = tournament.summary()
+        report['elapsed_seconds'] = round(elapsed, 3)
+        report['games_per_second'] = round(args.games / elapsed) if elapsed else None
+        print(json.dumps(report, indent=2))
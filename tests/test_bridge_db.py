@@ -0,0 +1,192 @@
+"""
+Database pool tests. The MySQL pool is replaced with a fake that behaves like
+mysql.connector's: it fails at once when empty and reconnects a dropped
+connection when it is checked out.
+"""
+import queue
+import threading
+
+import pytest
+from mysql.connector import errors
+
+import bridge_db
+from bridge_db import Database
+
+
+class FakeConnection:
+    def __init__(self, pool, number):
+        self.pool = pool
+        self.number = number
+        self.connected = True
+        self.reconnects = 0
+        self.commits = 0
+        self.rollbacks = 0
+
+    # --- What PooledMySQLConnection forwards ---
+    def cursor(self):
+        if not self.connected:
+            raise errors.OperationalError("Lost connection to MySQL server during query")
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        if not self.connected:
+            raise errors.OperationalError("Lost connection to MySQL server")
+        self.rollbacks += 1
+
+    def close(self):
+        self.pool.idle.put(self)
+
+    def disconnect(self):
+        self.connected = False
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, pool_name, pool_size, pool_reset_session, **config):
+        self.pool_size = pool_size
+        self.idle = queue.Queue()
+        self.connections = [FakeConnection(self, number) for number in range(pool_size)]
+        for connection in self.connections:
+            self.idle.put(connection)
+
+    def get_connection(self):
+        try:
+            connection = self.idle.get(block=False)
+        except queue.Empty:
+            raise errors.PoolError("Failed getting connection; pool exhausted") from None
+        if not connection.connected:
+            connection.connected = True
+            connection.reconnects += 1
+        return connection
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    monkeypatch.setattr(bridge_db.pooling, 'MySQLConnectionPool', FakePool)
+    delays = []
+    monkeypatch.setattr(bridge_db.time, 'sleep', delays.append)
+    return delays
+
+
+def test_transient_errors_are_retried_with_exponential_backoff(sleeps):
+    database = Database({}, retries=3, backoff=0.05)
+    attempts = []
+
+    def operation(cursor):
+        attempts.append(cursor.connection)
+        if len(attempts) < 3:
+            raise errors.OperationalError("Lost connection to MySQL server during query")
+        return "ok"
+
+    assert database.run(operation) == "ok"
+    assert sleeps == [0.05, 0.1]
+    assert attempts[0].rollbacks == 1 # Each failed attempt is rolled back
+    assert database.stats() == {'operations': 1, 'retried': 2, 'failed': 0, 'pool_size': 5}
+
+
+def test_backoff_is_capped_and_the_last_error_is_raised(sleeps):
+    database = Database({}, retries=8, backoff=0.5)
+
+    def operation(cursor):
+        raise errors.InterfaceError("Connection refused")
+
+    with pytest.raises(errors.InterfaceError):
+        database.run(operation)
+    assert sleeps == [0.5, 1.0, 2.0, 2.0, 2.0, 2.0, 2.0, 2.0]
+    assert database.stats()['failed'] == 1
+
+
+def test_other_errors_are_not_retried(sleeps):
+    database = Database({})
+
+    def operation(cursor):
+        raise errors.ProgrammingError("You have an error in your SQL syntax")
+
+    with pytest.raises(errors.ProgrammingError):
+        database.run(operation)
+    assert sleeps == []
+    assert database.stats()['retried'] == 0 and database.stats()['failed'] == 1
+
+
+def test_dropped_connection_is_reconnected_on_retry(sleeps):
+    database = Database({}, pool_size=1)
+    connection = database.pool.connections[0]
+    connection.disconnect() # The server dropped it while it sat idle in the pool
+
+    def operation(cursor):
+        return cursor.connection.number
+
+    assert database.run(operation) == 0
+    assert connection.reconnects == 1
+
+    def drop_mid_query(cursor):
+        if cursor.connection.reconnects == 1:
+            cursor.connection.disconnect()
+            raise errors.OperationalError("Lost connection to MySQL server during query")
+        return cursor.connection.reconnects
+
+    assert database.run(drop_mid_query) == 2 # Retried on the same, reconnected, connection
+    assert database.stats()['retried'] == 1
+
+
+def test_callers_wait_for_a_free_connection_when_the_pool_is_full(sleeps):
+    database = Database({}, pool_size=1, checkout_timeout=5.0)
+    holding = threading.Event()
+    release = threading.Event()
+    results = []
+
+    def slow(cursor):
+        holding.set()
+        release.wait(5.0)
+        return "slow"
+
+    first = threading.Thread(target=lambda: results.append(database.run(slow)))
+    first.start()
+    assert holding.wait(5.0)
+    second = threading.Thread(target=lambda: results.append(database.run(lambda cursor: "waited")))
+    second.start()
+    second.join(0.1)
+    assert second.is_alive() # Blocked on the pool rather than failing with "pool exhausted"
+    release.set()
+    first.join(5.0)
+    second.join(5.0)
+    assert results == ["slow", "waited"]
+    assert database.stats()['failed'] == 0
+
+
+def test_checkout_times_out_when_the_pool_stays_full(sleeps):
+    database = Database({}, pool_size=1, checkout_timeout=0.05)
+    database._free.acquire() # Someone holds the only connection
+
+    with pytest.raises(errors.PoolError):
+        database.run(lambda cursor: None)
+    assert sleeps == [] # Not a transient error: waiting already took checkout_timeout
+
+
+def test_close_disconnects_every_connection(sleeps):
+    database = Database({}, pool_size=3)
+    assert database.close() == 3
+    assert not any(connection.connected for connection in database.pool.connections)
+    with pytest.raises(errors.PoolError):
+        database.run(lambda cursor: None)
+
+
+def test_counters_are_exact_under_concurrency(sleeps):
+    database = Database({}, pool_size=4)
+    threads = [threading.Thread(target=lambda: [database.run(lambda cursor: None) for _ in range(500)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert database.stats()['operations'] == 4000
@@ -0,0 +1,49 @@
+"""BridgeEngine rules tests."""
+import random
+
+import pytest
+
+from bridge_engine import EVENT_TILE_SAFE, BridgeEngine, choose_remembered_or_random
+
+
+def choose_any(engine):
+    return engine.rng.randrange(engine.columns)
+
+
+def play(observed, chooser, seed, **options):
+    rng = random.Random(seed)
+    engine = BridgeEngine([f"P{i}" for i in range(7)], rng=rng, layout_seed=seed, **options)
+    if observed: # Any subscriber sends autoplay through play_move() and tick()
+        engine.subscribe(EVENT_TILE_SAFE, lambda *args: None)
+    engine.autoplay(chooser)
+    return (engine.winners(), engine.fallen_players(), engine.time_left, engine.time_limit_reached,
+            engine.revealed_tiles, engine.kept_tiles, engine.revealed_rows, list(engine.breaking_left),
+            [(p.current_tile_row, p.current_tile_col, p.is_on_bridge) for p in engine.players], rng.random())
+
+
+@pytest.mark.parametrize("chooser", [choose_remembered_or_random, choose_any])
+@pytest.mark.parametrize("options", [{}, {'time_limit': 6.0}, {'bridge_length': 18, 'time_limit': 9.5},
+                                     {'columns': 3}, {'columns': 4, 'safe_per_row': 2, 'time_limit': 12.0}])
+def test_unobserved_autoplay_plays_the_same_games(chooser, options):
+    for seed in range(200):
+        assert play(False, chooser, seed, **options) == play(True, chooser, seed, **options)
+
+
+def test_autoplay_rejects_an_invalid_column():
+    with pytest.raises(ValueError):
+        BridgeEngine(["A"], layout_seed=1).autoplay(lambda engine: 2)
+
+
+def test_an_explicit_layout_sets_the_bridge_length():
+    rows = [[True, False], [False, True], [True, False]]
+    engine = BridgeEngine(["A"], layout=rows)
+    assert engine.bridge_length == 3
+    follow_the_layout = lambda game: game.actual_bridge_layout.safe_column(game.current_player.current_tile_row + 1)
+    assert engine.autoplay(follow_the_layout) == ["A"]
+    assert engine.players[0].current_tile_row == 2
+    assert BridgeEngine(["A"], bridge_length=3, layout=rows).bridge_length == 3
+
+
+def test_a_bridge_length_that_disagrees_with_the_layout_is_rejected():
+    with pytest.raises(ValueError):
+        BridgeEngine(["A"], bridge_length=10, layout=[[True, False], [False, True]])
@@ -0,0 +1,41 @@
+"""SessionWriter tests against an in-memory SQLite connection."""
+import sqlite3
+
+from bridge_persistence import SessionWriter, run_on_connection
+
+
+def make_writer():
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    connection.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value TEXT NOT NULL)")
+    connection.commit()
+    return connection, SessionWriter(run_on_connection(connection))
+
+
+def test_on_done_gets_the_result_after_commit():
+    connection, writer = make_writer()
+    seen = []
+
+    def write(cursor):
+        cursor.execute("INSERT INTO t (value) VALUES ('a')")
+        return cursor.lastrowid
+
+    def done(row_id):
+        # A second connection would not see an uncommitted row; in_transaction tells the same here
+        seen.append((row_id, connection.in_transaction))
+
+    assert writer.submit('k', write, on_done=done)
+    assert writer.close()
+    assert seen == [(1, False)]
+
+
+def test_failed_write_calls_on_error_and_not_on_done():
+    connection, writer = make_writer()
+    done, errors = [], []
+    writer.submit('good', lambda cursor: cursor.execute("INSERT INTO t (value) VALUES ('a')"), on_done=done.append)
+    writer.submit('bad', lambda cursor: cursor.execute("INSERT INTO t (value) VALUES (NULL)"),
+                  on_error=errors.append, on_done=done.append)
+    assert writer.close()
+    assert len(done) == 1 # The batch failed, then the good job was retried alone
+    assert len(errors) == 1 and isinstance(errors[0], sqlite3.IntegrityError)
+    assert connection.execute("SELECT COUNT(*) FROM t").fetchone() == (1,)
+    assert writer.stats()['failed'] == 1
@@ -0,0 +1,129 @@
+"""Lobby server tests: real clients over loopback TCP against BridgeServer."""
+import asyncio
+import json
+
+from bridge_engine import EVENT_PLAYER_TIMED_OUT, EVENT_TURN_STARTED
+from bridge_server import DEFAULT_HOST, BridgeServer, run_loopback
+
+TIMEOUT = 1.0 # Seconds any expected event may take; far below the time limits used here
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def join(cls, port, room, name):
+        client = cls(*await asyncio.open_connection(DEFAULT_HOST, port))
+        client.send({'op': 'join', 'room': room, 'name': name})
+        return client
+
+    def send(self, message):
+        self.writer.write(json.dumps(message).encode() + b"\n")
+
+    async def next_event(self):
+        line = await asyncio.wait_for(self.reader.readline(), TIMEOUT)
+        assert line, "server closed the connection"
+        return json.loads(line)
+
+    async def events_until(self, event):
+        """Every message up to and including the first one with this event name."""
+        events = []
+        while not events or events[-1]['event'] != event:
+            events.append(await self.next_event())
+        return events
+
+    def close(self):
+        self.writer.close()
+
+
+async def wait_for(condition):
+    for _ in range(int(TIMEOUT / 0.01)):
+        if condition():
+            return True
+        await asyncio.sleep(0.01)
+    return condition()
+
+
+def run(coroutine_function, **server_options):
+    async def main():
+        server = BridgeServer(seed=0, **server_options)
+        port = await server.start(DEFAULT_HOST, 0)
+        try:
+            await coroutine_function(server, port)
+        finally:
+            await server.close()
+    asyncio.run(main())
+
+
+def test_current_player_disconnecting_before_moving_is_timed_out():
+    async def scenario(server, port):
+        first = await Client.join(port, 'r', "A")
+        second = await Client.join(port, 'r', "B") # Fills the room, which starts
+        events = await second.events_until(EVENT_TURN_STARTED)
+        assert [e['event'] for e in events] == ['joined', EVENT_TURN_STARTED]
+        assert events[-1]['player'] == 0
+
+        first.close() # Leaves on their turn; the timer has not started, so nothing else would end it
+        assert await second.next_event() == {'event': EVENT_PLAYER_TIMED_OUT, 'player': 0}
+        assert await second.next_event() == {'event': EVENT_TURN_STARTED, 'player': 1}
+        assert server.rooms['r'].engine.players[0].fallen
+
+        second.close()
+        assert await wait_for(lambda: not server.rooms)
+        assert server.stats()['games_abandoned'] == 1
+        assert server.stats()['games_finished'] == 0
+    run(scenario, room_size=2, time_limit=2.0)
+
+
+def test_players_who_left_are_timed_out_when_their_turn_comes():
+    async def scenario(server, port):
+        clients = [await Client.join(port, 'r', name) for name in "ABC"]
+        await clients[2].events_until(EVENT_TURN_STARTED)
+        clients[1].close() # Not their turn yet
+        assert await wait_for(lambda: server.rooms['r'].clients[1] is None)
+        clients[0].close()
+        events = [await clients[2].next_event() for _ in range(4)]
+        assert events == [{'event': EVENT_PLAYER_TIMED_OUT, 'player': 0}, {'event': EVENT_TURN_STARTED, 'player': 1},
+                          {'event': EVENT_PLAYER_TIMED_OUT, 'player': 1}, {'event': EVENT_TURN_STARTED, 'player': 2}]
+        clients[2].close()
+    run(scenario, room_size=3, time_limit=2.0)
+
+
+def test_leaving_before_the_start_gives_up_the_seat():
+    async def scenario(server, port):
+        first = await Client.join(port, 'r', "A")
+        second = await Client.join(port, 'r', "B")
+        assert (await second.next_event())['player'] == 1
+        first.close()
+        assert await second.next_event() == {'event': 'seated', 'player': 0}
+        room = server.rooms['r']
+        assert room.names == ["B"] and not room.started
+
+        third = await Client.join(port, 'r', "C")
+        assert (await third.next_event())['player'] == 1
+        assert not room.started # Only two of three seats are taken
+        fourth = await Client.join(port, 'r', "D")
+        assert (await fourth.next_event())['player'] == 2
+        assert (await second.next_event()) == {'event': EVENT_TURN_STARTED, 'player': 0}
+        assert room.engine is not None and [p.name for p in room.engine.players] == ["B", "C", "D"]
+        for client in (second, third, fourth):
+            client.close()
+    run(scenario, room_size=3)
+
+
+def test_everyone_leaving_before_the_start_closes_the_room():
+    async def scenario(server, port):
+        client = await Client.join(port, 'r', "A")
+        await client.next_event()
+        client.close()
+        assert await wait_for(lambda: not server.rooms)
+    run(scenario, room_size=3)
+
+
+def test_loopback_bots_finish_every_game():
+    report = asyncio.run(run_loopback(3, room_size=3, seed=1, bridge_length=5))
+    assert report['games_finished'] == 3
+    assert report['games_abandoned'] == 0
+    assert report['rooms'] == 0
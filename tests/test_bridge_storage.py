@@ -0,0 +1,107 @@
+"""Storage backend tests. SQLite runs on a temporary file; MySQL statements run on SQLite too (see MySQLOnSQLite)."""
+import sqlite3
+
+import pytest
+
+import bridge_storage
+from bridge_storage import MySQLStorage, SQLiteStorage
+
+STAFF_COLUMNS = ('name', 'role', 'staff_id')
+STAFF_ROWS = [("Front Man", "Guard", "S1"), ("Square Guard", "Guard", "SG"), ("Triangle Guard", "Guard", "TG")]
+
+
+@pytest.fixture
+def sqlite_storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "bridge.sqlite3"))
+    storage.create_tables()
+    yield storage
+    storage.close()
+
+
+class MySQLOnSQLite:
+    """
+    A cursor that runs MySQLStorage's SQL on SQLite. Like MySQL, a multi-row
+    INSERT IGNORE reports only the rows it inserted in rowcount.
+    """
+    def __init__(self, connection):
+        self.cursor = connection.cursor()
+        self.statements = []
+
+    def execute(self, statement, params=()):
+        self.statements.append(statement)
+        self.cursor.execute(statement.replace("INSERT IGNORE", "INSERT OR IGNORE").replace("%s", "?"), params)
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+
+@pytest.fixture
+def mysql_cursor(monkeypatch, sqlite_storage):
+    monkeypatch.setattr(bridge_storage, 'Database', lambda config, **pool_options: None)
+    connection = sqlite3.connect(sqlite_storage.path)
+    yield MySQLOnSQLite(connection)
+    connection.close()
+
+
+def staff_ids(storage):
+    return [row[0] for row in storage.fetchall("SELECT staff_id FROM staff ORDER BY id")]
+
+
+def test_sqlite_insert_ignore_counts_only_new_rows(sqlite_storage):
+    insert = lambda rows: sqlite_storage.run(
+        lambda cursor: sqlite_storage.insert_rows(cursor, 'staff', STAFF_COLUMNS, rows, ignore=True))
+    assert insert(STAFF_ROWS[:2]) == (2, 1)
+    assert insert(STAFF_ROWS + [STAFF_ROWS[2]]) == (1, 1) # Two rows already stored, one repeated within the call
+    assert insert(STAFF_ROWS) == (0, 1)
+    assert staff_ids(sqlite_storage) == ["S1", "SG", "TG"]
+
+
+def test_sqlite_insert_without_ignore_fails_on_a_duplicate(sqlite_storage):
+    sqlite_storage.run(lambda cursor: sqlite_storage.insert_rows(cursor, 'staff', STAFF_COLUMNS, STAFF_ROWS))
+    with pytest.raises(sqlite3.IntegrityError):
+        sqlite_storage.run(lambda cursor: sqlite_storage.insert_rows(cursor, 'staff', STAFF_COLUMNS, STAFF_ROWS[:1]))
+    assert staff_ids(sqlite_storage) == ["S1", "SG", "TG"]
+
+
+def test_mysql_insert_ignore_counts_only_new_rows(mysql_cursor, sqlite_storage):
+    storage = MySQLStorage({})
+    rows = STAFF_ROWS[:1] + STAFF_ROWS + [("Circle Guard", "Guard", "CG")]
+    assert storage.insert_rows(mysql_cursor, 'staff', STAFF_COLUMNS, rows, ignore=True, batch_rows=2) == (4, 3)
+    assert mysql_cursor.statements[0] == "INSERT IGNORE INTO staff (name, role, staff_id) VALUES (%s, %s, %s), (%s, %s, %s)"
+    assert storage.insert_rows(mysql_cursor, 'staff', STAFF_COLUMNS, STAFF_ROWS, ignore=True) == (0, 1)
+    mysql_cursor.cursor.connection.commit()
+    assert staff_ids(sqlite_storage) == ["S1", "SG", "TG", "CG"]
+
+
+def index_names(storage):
+    return {row[0] for row in storage.fetchall("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")}
+
+
+def test_create_tables_twice_applies_the_migrations_once(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "bridge.sqlite3"))
+    storage.create_tables()
+    storage.create_tables()
+    assert index_names(storage) == {'idx_game_sessions_start_time', 'idx_bridge_info_session_tile'}
+    assert storage.schema_version() == 1
+    assert storage.migrate() == []
+    assert storage.fetchall("SELECT version FROM schema_migrations") == [(1,)]
+    storage.close()
+
+
+def test_migrate_skips_the_versions_already_applied(sqlite_storage, monkeypatch):
+    calls = []
+
+    def recorded(version, apply):
+        return lambda storage, cursor: calls.append(version) or apply(storage, cursor)
+
+    migrations = [(version, description, recorded(version, apply)) for version, description, apply in bridge_storage.MIGRATIONS]
+    migrations.append((2, "Index staff by role", recorded(2, lambda storage, cursor: storage.create_index(
+        cursor, 'staff', 'idx_staff_role', ('role',)))))
+    monkeypatch.setattr(bridge_storage, 'MIGRATIONS', migrations)
+    assert sqlite_storage.schema_version() == 1
+    assert sqlite_storage.migrate() == [2]
+    assert sqlite_storage.migrate() == []
+    assert calls == [2] # Version 1 was applied by create_tables() and is not run again
+    assert sqlite_storage.schema_version() == 2
+    assert 'idx_staff_role' in index_names(sqlite_storage)